@@ -0,0 +1,154 @@
+"""
+BMP Convert Benchmark - Rows per second for the BMP colour conversion
+and the palette expansion of indexed frames
+Compares the viper and pure-Python paths in ili9341.py on the ESP32
+(no display or SD card needed, only ili9341.py and ili9341_viper.py uploaded)
+
+Then times one full 240x320 frame of each decoder the slideshow uses
+(BMP conversion, RLE literals and runs, palette expansion) with the
+SPI writes and file reads replaced by no-ops, so only CPU time is
+counted. The last line is the decode cost to pass to
+tools/slideshow_bench.py on the PC.
+"""
+
+import time
+import ili9341
+
+ROWS = 320
+WIDTH = 240
+
+def rows_per_second(func):
+    """Time func over ROWS rows of WIDTH pixels."""
+    src = bytearray(WIDTH * 3 + 3)
+    for i in range(len(src)):
+        src[i] = (i * 37) & 0xFF
+    dst = bytearray(WIDTH * 2)
+
+    start = time.ticks_ms()
+    for _ in range(ROWS):
+        func(src, 0, dst, WIDTH)
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    return ROWS * 1000 / max(elapsed, 1), dst
+
+def expand_rows_per_second(func, per_byte):
+    """Time a palette expander over ROWS rows of WIDTH pixels."""
+    step = WIDTH // per_byte
+    src = bytearray(step)
+    for i in range(step):
+        src[i] = (i * 37) & 0xFF
+    lut = bytearray(512)
+    dst = bytearray(WIDTH * 2)
+
+    start = time.ticks_ms()
+    for _ in range(ROWS):
+        func(src, 0, step, lut, dst)
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    return ROWS * 1000 / max(elapsed, 1)
+
+class NullPin:
+    """Pin stand-in: the decode timing needs no hardware."""
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def value(self, v=None):
+        return 0
+
+class NullSPI:
+    """SPI stand-in that drops every write."""
+
+    def write(self, buf):
+        pass
+
+class PatternFile:
+    """Readable file of head followed by pattern repeated forever."""
+
+    def __init__(self, head, pattern):
+        self.data = head
+        self.pattern = pattern
+        self.pos = 0
+
+    def seek(self, offset):
+        pass
+
+    def read(self, n):
+        buf = bytearray(n)
+        self.readinto(buf)
+        return bytes(buf)
+
+    def readinto(self, buf):
+        n = len(buf)
+        i = 0
+        while i < n:
+            k = min(n - i, len(self.data) - self.pos)
+            buf[i:i + k] = self.data[self.pos:self.pos + k]
+            i += k
+            self.pos += k
+            if self.pos == len(self.data):
+                self.data = self.pattern
+                self.pos = 0
+        return n
+
+def frame_ms(draw):
+    """Time one frame of draw()."""
+    start = time.ticks_ms()
+    draw()
+    return time.ticks_diff(time.ticks_ms(), start)
+
+def decode_costs():
+    """Print ms per full frame of each decoder (CPU only)."""
+    display = ili9341.Display(NullSPI(), NullPin(), NullPin())
+    w, h = display.width, display.height
+    row = bytearray(w * 3)
+    for i in range(len(row)):
+        row[i] = (i * 37) & 0xFF
+    literal = bytearray(257)
+    literal[0] = 127  # 128 literal pixels (photos)
+    run = bytearray([0x80 | 127, 0x12, 0x34])  # 128 copies (flat colour)
+    palette = (256).to_bytes(2, 'little') + bytearray(512)
+    indices = bytearray(range(256))
+
+    bmp = frame_ms(lambda: display._stream_bmp(PatternFile(b'', row), 0, w, h, 3, True,
+                                               ili9341._bgr888_to_bgr565))
+    rle = frame_ms(lambda: display.stream_rle(PatternFile(b'', literal), w, h))
+    rle_runs = frame_ms(lambda: display.stream_rle(PatternFile(b'', run), w, h))
+    idx = frame_ms(lambda: display.stream_indexed(PatternFile(palette, indices), w, h, 8))
+
+    print(f"Decode time per {w}x{h} frame ({ili9341.BMP_CONVERTER} converters, no I/O):")
+    print(f"  BMP 24bpp:           {bmp:6d} ms")
+    print(f"  RLE literals (photo): {rle:5d} ms")
+    print(f"  RLE runs (flat):      {rle_runs:5d} ms")
+    print(f"  Palette 8bpp:        {idx:6d} ms")
+    print(f"slideshow_bench.py decode costs: bmp={bmp} rle={rle} idx={idx}")
+
+def main():
+    """Main program."""
+    print("=" * 60)
+    print(" BMP Conversion Benchmark")
+    print("=" * 60)
+    print(f"Selected converter: {ili9341.BMP_CONVERTER}")
+
+    py_rate, py_out = rows_per_second(ili9341._bgr888_to_bgr565_py)
+    print(f"  Python: {py_rate:8.0f} rows/s ({ROWS / py_rate:.2f} s per frame)")
+
+    if ili9341.BMP_CONVERTER == 'viper':
+        viper_rate, viper_out = rows_per_second(ili9341._bgr888_to_bgr565_viper)
+        print(f"  Viper:  {viper_rate:8.0f} rows/s ({ROWS / viper_rate:.2f} s per frame)")
+        print(f"  Speedup: {viper_rate / py_rate:.1f}x")
+        print(f"  Identical output: {'yes' if py_out == viper_out else 'NO'}")
+    else:
+        print("  Viper emitter not available in this firmware")
+
+    for name, per_byte in (('expand8', 1), ('expand4', 2)):
+        print(f"Palette {name}:")
+        py_rate = expand_rows_per_second(getattr(ili9341, f'_{name}_py'), per_byte)
+        print(f"  Python: {py_rate:8.0f} rows/s ({ROWS / py_rate:.2f} s per frame)")
+        if ili9341.BMP_CONVERTER == 'viper':
+            viper_rate = expand_rows_per_second(getattr(ili9341, f'_{name}_viper'), per_byte)
+            print(f"  Viper:  {viper_rate:8.0f} rows/s ({ROWS / viper_rate:.2f} s per frame)")
+            print(f"  Speedup: {viper_rate / py_rate:.1f}x")
+
+    decode_costs()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+SD Stream Benchmark - SD card to display throughput
+Compares the file paths with Display.stream_blocks, which reads
+multi-block runs into one buffer and writes that buffer to SPI
+(needs sdcard.py and ili9341.py uploaded and 200 KB free on the SD card)
+
+  open()/read()   f.read(chunk) allocates a new bytes object per chunk
+  stream_raw      readinto preallocated buffers through the FAT layer
+  stream_blocks   readblocks (CMD18) straight into the SPI buffer
+
+stream_blocks reads sectors BENCH_BLOCK onwards (read only); the screen
+shows whatever those sectors hold.
+
+It then times the SD reads alone, the SPI writes alone and stream_raw
+with the threaded pipeline (pipeline=1 in config.txt), and prints how
+much of the possible overlap the reader thread achieved. MicroPython
+threads share the GIL, so the reader only runs while the other thread
+is inside a call that releases it; if the overlap is near 0% leave
+pipeline off on this firmware.
+"""
+
+import gc
+import os
+import time
+from machine import Pin, SPI
+
+SD_CS = 5
+SD_BAUDRATE = 20000000  # Lower this if the card fails at this rate
+
+TEST_FILE = '/sd/_stream_bench.raw'
+FRAME_BYTES = 240 * 320 * 2
+CHUNK = 4096
+BENCH_BLOCK = 0
+REPEATS = 3
+
+def mount():
+    """Mount SD card at the benchmark clock."""
+    import sdcard
+    spi = SPI(2, baudrate=1000000, sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+    sd = sdcard.SDCard(spi, Pin(SD_CS, Pin.OUT), baudrate=SD_BAUDRATE)
+    os.mount(sd, '/sd')
+    return sd
+
+def init_display():
+    """Display on SPI bus 1 (ESP32-2432S028R pins)."""
+    from ili9341 import Display
+    Pin(21, Pin.OUT).value(1)  # Backlight
+    spi = SPI(1, baudrate=60000000, sck=Pin(14), mosi=Pin(13), miso=Pin(12))
+    return Display(spi, dc=Pin(2), cs=Pin(15), rst=None, chunk_size=CHUNK)
+
+def write_test_file():
+    """One RAW frame of colour bars."""
+    buf = bytearray(CHUNK)
+    with open(TEST_FILE, 'wb') as f:
+        for i in range(FRAME_BYTES // CHUNK):
+            colour = (i * 2731) & 0xFFFF
+            for j in range(0, CHUNK, 2):
+                buf[j] = colour >> 8
+                buf[j + 1] = colour & 0xFF
+            f.write(buf)
+
+def read_path(display):
+    """Frame via open()/read(); return (ms, bytes allocated)."""
+    gc.collect()
+    alloc = gc.mem_alloc()
+    start = time.ticks_ms()
+    display.set_window(0, 0, display.width - 1, display.height - 1)
+    display.cs.value(0)
+    display.dc.value(1)
+    with open(TEST_FILE, 'rb') as f:
+        while True:
+            data = f.read(CHUNK)
+            if not data:
+                break
+            display.spi.write(data)
+    display.cs.value(1)
+    return time.ticks_diff(time.ticks_ms(), start), gc.mem_alloc() - alloc
+
+def readinto_path(display):
+    """Frame via Display.show_raw (readinto through FAT)."""
+    gc.collect()
+    alloc = gc.mem_alloc()
+    start = time.ticks_ms()
+    display.show_raw(TEST_FILE)
+    return time.ticks_diff(time.ticks_ms(), start), gc.mem_alloc() - alloc
+
+def block_path(display, sd):
+    """Frame via Display.stream_blocks from card sectors."""
+    gc.collect()
+    alloc = gc.mem_alloc()
+    start = time.ticks_ms()
+    display.stream_blocks(sd, BENCH_BLOCK)
+    return time.ticks_diff(time.ticks_ms(), start), gc.mem_alloc() - alloc
+
+def sd_only(display):
+    """SD reads of a frame into the display buffers, nothing sent; return ms."""
+    views = display.raw_views
+    gc.collect()
+    start = time.ticks_ms()
+    with open(TEST_FILE, 'rb') as f:
+        i = 0
+        while f.readinto(views[i]):
+            i ^= 1
+    return time.ticks_diff(time.ticks_ms(), start)
+
+def spi_only(display):
+    """SPI writes of a frame from one buffer, nothing read; return ms."""
+    view = display.raw_views[0]
+    gc.collect()
+    start = time.ticks_ms()
+    display.set_window(0, 0, display.width - 1, display.height - 1)
+    display.cs.value(0)
+    display.dc.value(1)
+    for _ in range(FRAME_BYTES // CHUNK):
+        display.spi.write(view)
+    display.cs.value(1)
+    return time.ticks_diff(time.ticks_ms(), start)
+
+def best_ms(run):
+    """Fastest of REPEATS runs of a function returning ms."""
+    return min(run() for _ in range(REPEATS))
+
+def pipeline_overlap(display):
+    """Time stream_raw with and without the reader thread; print the overlap."""
+    read_ms = best_ms(lambda: sd_only(display))
+    write_ms = best_ms(lambda: spi_only(display))
+    serial_ms = best_ms(lambda: readinto_path(display)[0])
+    print(f"  SD reads alone {read_ms} ms, SPI writes alone {write_ms} ms")
+    if not display.set_pipeline(True):
+        print("  No _thread module: pipeline not available")
+        return
+    try:
+        piped_ms = best_ms(lambda: readinto_path(display)[0])
+    finally:
+        display.set_pipeline(False)
+    # Perfect overlap hides the shorter of the two phases entirely
+    possible = min(read_ms, write_ms)
+    saved = serial_ms - piped_ms
+    overlap = saved * 100 // max(possible, 1)
+    print(f"  stream_raw {serial_ms} ms, pipelined {piped_ms} ms:"
+          f" {saved} of {possible} ms hidden ({overlap}% overlap)")
+    if overlap < 10:
+        print("  -> reads do not overlap SPI writes on this firmware, leave pipeline off")
+    else:
+        print("  -> pipeline=1 in config.txt speeds up RAW slides")
+
+def main():
+    """Main program."""
+    print("=" * 60)
+    print(" SD Stream Benchmark")
+    print("=" * 60)
+    sd = mount()
+    display = init_display()
+    print(f"SD clock: {sd.baudrate / 1000000} MHz, {CHUNK}-byte runs, {FRAME_BYTES // 1024} KB per frame")
+
+    try:
+        write_test_file()
+        tests = (('open()/read()', lambda: read_path(display)),
+                 ('stream_raw', lambda: readinto_path(display)),
+                 ('stream_blocks', lambda: block_path(display, sd)))
+        for name, run in tests:
+            best = None
+            alloc = 0
+            for _ in range(REPEATS):
+                elapsed, used = run()
+                alloc = max(alloc, used)
+                best = elapsed if best is None else min(best, elapsed)
+            rate = FRAME_BYTES * 1000 // max(best, 1)
+            print(f"  {name:14s} {rate:9d} bytes/s ({best} ms per frame, {alloc} bytes allocated)")
+        print()
+        print("Threaded pipeline (SD reader thread + SPI writer):")
+        pipeline_overlap(display)
+    finally:
+        try:
+            os.remove(TEST_FILE)
+        except OSError:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+SD Write Benchmark - Write throughput of the SD card driver
+Writes a test file with different chunk sizes and reads it back
+(needs sdcard.py uploaded and an SD card with 1 MB free)
+
+Chunks of 1024 bytes and more reach the card as multi-block writes
+(ACMD23 pre-erase + CMD25); 512-byte chunks are single-block writes.
+"""
+
+import gc
+import os
+import time
+from machine import Pin, SPI
+
+SD_CS = 5
+SD_BAUDRATE = 20000000  # Lower this if the card fails at this rate
+
+TEST_FILE = '/sd/_write_bench.bin'
+FILE_SIZE = 256 * 1024
+CHUNK_SIZES = (512, 4096, 16384)
+
+def mount():
+    """Mount SD card at the benchmark clock."""
+    import sdcard
+    spi = SPI(2, baudrate=1000000, sck=Pin(18), mosi=Pin(23), miso=Pin(19))
+    sd = sdcard.SDCard(spi, Pin(SD_CS, Pin.OUT), baudrate=SD_BAUDRATE)
+    os.mount(sd, '/sd')
+    return sd
+
+def write_file(chunk):
+    """Write FILE_SIZE bytes in chunks; return (ms, bytes allocated)."""
+    buf = bytearray(chunk)
+    for i in range(chunk):
+        buf[i] = i & 0xFF
+    gc.collect()
+    alloc = gc.mem_alloc()
+    start = time.ticks_ms()
+    with open(TEST_FILE, 'wb') as f:
+        for _ in range(FILE_SIZE // chunk):
+            f.write(buf)
+    elapsed = time.ticks_diff(time.ticks_ms(), start)
+    return elapsed, gc.mem_alloc() - alloc
+
+def verify_file(chunk):
+    """Read the file back and check the pattern."""
+    buf = bytearray(chunk)
+    with open(TEST_FILE, 'rb') as f:
+        while f.readinto(buf):
+            for i in range(0, chunk, 97):
+                if buf[i] != i & 0xFF:
+                    return False
+    return True
+
+def main():
+    """Main program."""
+    print("=" * 60)
+    print(" SD Write Benchmark")
+    print("=" * 60)
+    sd = mount()
+    print(f"SD clock: {sd.baudrate / 1000000} MHz, {FILE_SIZE // 1024} KB per test")
+
+    try:
+        for chunk in CHUNK_SIZES:
+            elapsed, alloc = write_file(chunk)
+            ok = verify_file(chunk)
+            rate = FILE_SIZE * 1000 // 1024 // max(elapsed, 1)
+            print(f"  {chunk:5d}-byte writes: {rate:5d} KB/s ({elapsed} ms, {alloc} bytes allocated)"
+                  f" {'verified' if ok else 'DATA MISMATCH'}")
+    finally:
+        try:
+            os.remove(TEST_FILE)
+        except OSError:
+            pass
+
+if __name__ == "__main__":
+    main()
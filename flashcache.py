@@ -0,0 +1,309 @@
+"""
+Hot-slide cache in internal flash for MicroPython
+Copies of the most shown slides on the board's own filesystem (littlefs)
+
+Internal flash reads much faster than the SD card over SPI, so slides
+read from the cache reach the display sooner. After a slide is drawn
+from the SD card it is offered to the cache, and copied if it fits in
+the free flash space (os.statvfs('/')), or if it scores higher than the
+least recently used slides that would have to be evicted to make room.
+The score is how often a slide was shown times its size, so repeated
+and heavy slides stay; a plain looping playlist keeps the slides that
+were cached first instead of rewriting flash on every pass.
+
+The copy itself does not run when a slide is offered: offer() only
+decides and opens the files, and copy(until) moves COPY_CHUNK bytes at a
+time while there is time left before until - the slideshow calls it
+from FrameScheduler.wait with the next slide's render start, so copying
+only uses dwell time and never makes a slide late. One slide is copied
+at a time; a copy left unfinished when the slideshow stops is removed
+on the next start (a flash file without an index line).
+
+Cached copies are used while the SD file's size and mtime still match.
+Eviction and the free-space check use the size of the copy in flash
+(a BMP's copy may be a headerless RAW file), rounded up to whole
+filesystem blocks. The cache index is a text file in the cache folder,
+one line per slide: flash file, SD size, SD mtime, slide type, shows,
+flash size, SD path.
+"""
+
+from micropython import const
+import os
+import time
+
+CACHE_DIR = '/cache'
+INDEX_NAME = 'index.txt'
+
+# Flash kept free for the filesystem, config and logs
+FLASH_RESERVE = 64 * 1024
+
+# Show counts remembered for slides not (yet) cached
+MAX_TRACKED = const(64)
+
+COPY_CHUNK = const(4096)
+
+# Assumed time of one copy chunk until one has been measured
+COPY_CHUNK_MS = const(20)
+
+
+class SourceStats:
+    """Bytes read from one source and the time spent reading them."""
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes = 0
+        self.us = 0
+
+    def add(self, n, us):
+        self.bytes += n
+        self.us += us
+
+    def rate(self):
+        """Read throughput in KB/s."""
+        return self.bytes * 1000000 // 1024 // self.us if self.us else 0
+
+
+class TimedFile:
+    """Open file that adds the bytes and time of every read to SourceStats."""
+
+    def __init__(self, f, stats):
+        self.f = f
+        self.stats = stats
+
+    def readinto(self, buf):
+        start = time.ticks_us()
+        n = self.f.readinto(buf) or 0
+        self.stats.add(n, time.ticks_diff(time.ticks_us(), start))
+        return n
+
+    def read(self, n):
+        start = time.ticks_us()
+        data = self.f.read(n)
+        self.stats.add(len(data), time.ticks_diff(time.ticks_us(), start))
+        return data
+
+    def seek(self, pos, whence=0):
+        return self.f.seek(pos, whence)
+
+    def tell(self):
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.f.close()
+
+
+class FlashCache:
+    """Slides copied from the SD card to internal flash, with LRU eviction."""
+
+    def __init__(self, root=CACHE_DIR, reserve=FLASH_RESERVE):
+        self.root = root
+        self.reserve = reserve
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.clock = 0  # Increases with every show, for LRU order
+        self.next_name = 0
+        self.shows = {}  # SD path -> shows, for slides not cached
+        # SD path -> [flash file, SD size, SD mtime, type, shows, last used, flash size]
+        self.entries = {}
+        self.flash = SourceStats('Flash')
+        self.sd = SourceStats('SD')
+        self.buffer = bytearray(COPY_CHUNK)
+        # Copy in progress: [SD path, flash file, SD size, SD mtime, type,
+        # shows, source file, flash file object, bytes written]
+        self.job = None
+        self.chunk_ms = COPY_CHUNK_MS  # Slowest chunk so far
+        try:
+            os.mkdir(root)
+        except OSError:
+            pass  # Already exists
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.root + '/' + INDEX_NAME) as f:
+                for line in f:
+                    parts = line.rstrip('\n').split(' ', 6)
+                    try:
+                        name, size, mtime, kind, shows, stored, path = parts
+                        self.entries[path] = [name, int(size), int(mtime), kind, int(shows), 0, int(stored)]
+                        self.next_name = max(self.next_name, int(name.split('.')[0]) + 1)
+                    except ValueError:
+                        pass  # Damaged line or older index format
+        except OSError:
+            pass
+        # Copies without an index line (older index, interrupted copy) only take space
+        names = set(entry[0] for entry in self.entries.values())
+        for name in os.listdir(self.root):
+            if name != INDEX_NAME and name not in names:
+                try:
+                    os.remove(self.root + '/' + name)
+                except OSError:
+                    pass
+
+    def _save(self):
+        with open(self.root + '/' + INDEX_NAME, 'w') as f:
+            for path, e in self.entries.items():
+                f.write('%s %d %d %s %d %d %s\n' % (e[0], e[1], e[2], e[3], e[4], e[6], path))
+
+    def free(self):
+        """Free bytes on the internal filesystem."""
+        st = os.statvfs('/')
+        return st[0] * st[3]
+
+    def blocks(self, size):
+        """Flash a file of size bytes takes up (whole filesystem blocks)."""
+        block = os.statvfs('/')[0]
+        return (size + block - 1) // block * block
+
+    def _remove(self, path):
+        entry = self.entries.pop(path)
+        try:
+            os.remove(self.root + '/' + entry[0])
+        except OSError:
+            pass
+
+    def open(self, filepath):
+        """Return (TimedFile, type) of the cached copy of an SD file, or None."""
+        self.clock += 1
+        entry = self.entries.get(filepath)
+        if entry:
+            try:
+                st = os.stat(filepath)
+                if (st[6], st[8]) == (entry[1], entry[2]):
+                    f = open(self.root + '/' + entry[0], 'rb')
+                    entry[4] += 1
+                    entry[5] = self.clock
+                    self.hits += 1
+                    return TimedFile(f, self.flash), entry[3]
+            except OSError:
+                pass
+            # SD file changed or is gone
+            self._remove(filepath)
+            self._save()
+        self.misses += 1
+        return None
+
+    def offer(self, filepath, source, offset, kind):
+        """
+        Start copying a slide just drawn from SD to flash if it is hot enough.
+
+        source and offset give the bytes drawn (a RAW cache copy of a BMP
+        starts after its header); kind is their slide type. Returns True
+        if a copy was started; copy() does the work.
+        """
+        shows = self.shows.pop(filepath, 0) + 1
+        if self.job:
+            # One copy at a time, offered again on its next show
+            self._remember(filepath, shows)
+            return False
+        try:
+            st = os.stat(filepath)
+            size = os.stat(source)[6] - offset
+        except OSError:
+            return False
+
+        # LRU slides to evict, only if they score lower than this one
+        score = shows * size
+        needed = self.blocks(size) + self.reserve - self.free()
+        victims = []
+        if needed > 0:
+            for path in sorted(self.entries, key=lambda p: self.entries[p][5]):
+                entry = self.entries[path]
+                if entry[4] * entry[6] >= score:
+                    break
+                victims.append(path)
+                needed -= self.blocks(entry[6])
+                if needed <= 0:
+                    break
+        if needed > 0:
+            # Not worth the flash writes (yet), remember how often it was shown
+            self._remember(filepath, shows)
+            return False
+
+        for path in victims:
+            self._remove(path)
+            self.evicted += 1
+        if victims:
+            self._save()
+
+        name = '%d.bin' % self.next_name
+        self.next_name += 1
+        src = None
+        try:
+            # Read unwrapped: the SD stats only cover slides being displayed
+            src = open(source, 'rb')
+            src.seek(offset)
+            dst = open(self.root + '/' + name, 'wb')
+        except OSError as e:
+            print(f"    Flash cache copy failed: {e}")
+            if src:
+                src.close()
+            return False
+        self.job = [filepath, name, st[6], st[8], kind, shows, src, dst, 0]
+        return True
+
+    def _remember(self, filepath, shows):
+        if len(self.shows) >= MAX_TRACKED:
+            self.shows.clear()
+        self.shows[filepath] = shows
+
+    def copy(self, until):
+        """
+        Copy the pending slide a chunk at a time until ticks_ms until.
+
+        Stops while a chunk as slow as the slowest so far still fits.
+        Returns True when no copy is pending any more.
+        """
+        job = self.job
+        if not job:
+            return True
+        buf = self.buffer
+        try:
+            while time.ticks_diff(until, time.ticks_ms()) > self.chunk_ms:
+                start = time.ticks_ms()
+                n = job[6].readinto(buf)
+                if not n:
+                    self._finish(True)
+                    return True
+                job[7].write(buf if n == len(buf) else memoryview(buf)[:n])
+                job[8] += n
+                self.chunk_ms = max(self.chunk_ms, time.ticks_diff(time.ticks_ms(), start))
+        except OSError as e:
+            print(f"    Flash cache copy failed: {e}")
+            self._finish(False)
+            return True
+        return False
+
+    def _finish(self, ok):
+        """Close the pending copy and index it (ok) or delete it."""
+        path, name, size, mtime, kind, shows, src, dst, written = self.job
+        self.job = None
+        src.close()
+        try:
+            dst.close()
+        except OSError:
+            ok = False
+        if ok:
+            self.entries[path] = [name, size, mtime, kind, shows, self.clock, written]
+            self._save()
+            print(f"    Copied to flash: {path}")
+        else:
+            try:
+                os.remove(self.root + '/' + name)
+            except OSError:
+                pass
+
+    def report(self):
+        """Print hit/miss counters and read throughput per source."""
+        print(f"Flash cache: {self.hits} hits, {self.misses} misses, {len(self.entries)} slides,"
+              f" {self.evicted} evicted, {self.free() // 1024} KB free")
+        for stats in (self.flash, self.sd):
+            if stats.bytes:
+                print(f"  {stats.name} reads: {stats.bytes // 1024} KB at {stats.rate()} KB/s")
@@ -0,0 +1,115 @@
+"""
+Frame scheduler for MicroPython
+Slide deadlines on a fixed timeline (time.ticks_ms)
+
+Each slide is due a fixed delay after the previous deadline, not after
+the previous slide finished drawing, so render time does not stretch
+the period. The scheduler learns the average render time, starts each
+slide that much early, and keeps statistics on render time, lateness,
+overruns and dropped slides.
+"""
+
+import time
+
+# A slide finishing more than this after its deadline counts as an overrun
+LATE_TOLERANCE_MS = 20
+
+
+class FrameScheduler:
+    """
+    Shows slides at absolute deadlines (time.ticks_ms).
+
+    Each deadline is the previous one plus the slide's delay, so render
+    time does not add to the period and a playlist does not drift.
+    Rendering starts early by the average render time so the slide is
+    complete at its deadline.
+
+    Late slides (policy):
+      'delay' - show it anyway and move the timeline back to now
+      'drop'  - skip a slide that could only finish after its whole slot
+                has passed, keeping the timeline (never two in a row)
+
+    Background work (the flash cache copy) runs in wait() through its
+    idle callback, bounded by the render start, so it is never charged
+    to a slide.
+    """
+
+    def __init__(self, policy='delay'):
+        self.policy = policy
+        self.deadline = None  # ticks_ms the next slide should be complete
+        self.render_avg = 0
+        self.render_start = 0
+        self.dropped_last = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the timing statistics."""
+        self.frames = 0
+        self.dropped = 0
+        self.overruns = 0
+        self.render_total = 0
+        self.render_max = 0
+        self.late_total = 0
+        self.late_max = 0
+
+    def wait(self, delay_ms, idle=None):
+        """
+        Wait until the next slide should start rendering.
+
+        idle(until) is called first to use the spare time; it must return
+        by ticks_ms until. Returns False if the slide should be dropped
+        (delay_ms is its slot).
+        """
+        if self.deadline is not None:
+            start = time.ticks_add(self.deadline, -self.render_avg)
+            if idle:
+                idle(start)
+            early = time.ticks_diff(start, time.ticks_ms())
+            if early > 0:
+                time.sleep_ms(early)
+            elif self.policy == 'drop' and not self.dropped_last and -early > delay_ms:
+                # Would only be complete after its slot ended
+                self.dropped_last = True
+                self.dropped += 1
+                self.deadline = time.ticks_add(self.deadline, delay_ms)
+                return False
+        self.dropped_last = False
+        self.render_start = time.ticks_ms()
+        return True
+
+    def done(self, delay_ms):
+        """Record a rendered slide and set the next deadline; returns (render_ms, late_ms)."""
+        now = time.ticks_ms()
+        render_ms = time.ticks_diff(now, self.render_start)
+        if self.deadline is None:
+            # First slide sets the timeline
+            self.deadline = now
+        late_ms = time.ticks_diff(now, self.deadline)
+
+        # Running average render time, new slides weighted 1/4
+        if self.frames:
+            self.render_avg = (self.render_avg * 3 + render_ms) // 4
+        else:
+            self.render_avg = render_ms
+
+        self.frames += 1
+        self.render_total += render_ms
+        self.render_max = max(self.render_max, render_ms)
+        if late_ms > 0:
+            self.late_total += late_ms
+            self.late_max = max(self.late_max, late_ms)
+        if late_ms > LATE_TOLERANCE_MS:
+            self.overruns += 1
+            if self.policy == 'delay':
+                self.deadline = now
+
+        self.deadline = time.ticks_add(self.deadline, delay_ms)
+        return render_ms, late_ms
+
+    def report(self):
+        """Print timing statistics."""
+        if not self.frames:
+            return
+        print(f"Timing: {self.frames} slides, render avg {self.render_total // self.frames} ms"
+              f" max {self.render_max} ms, late avg {self.late_total // self.frames} ms"
+              f" max {self.late_max} ms, {self.overruns} overruns, {self.dropped} dropped")
@@ -3,10 +3,16 @@ ILI9341 Display Driver for ESP32-2432S028R
 Simplified driver for displaying BMP images
 """
 
+import gc
 from micropython import const
 from machine import Pin
 import time
 
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
 # ILI9341 Commands
 ILI9341_SWRESET = const(0x01)
 ILI9341_SLPOUT = const(0x11)
@@ -21,12 +27,132 @@ ILI9341_PIXFMT = const(0x3A)
 WIDTH = const(240)
 HEIGHT = const(320)
 
+# Default show_raw chunk (two of these buffers are preallocated)
+RAW_CHUNK_SIZE = const(4096)
+
+# Buffers in the ring when the threaded SD -> SPI pipeline is on
+RAW_RING_BUFFERS = const(3)
+
+# BMP rows are read in blocks of up to this many bytes per I/O
+_BMP_BLOCK_BYTES = const(8192)
+
+# Decoder streaming buffers (input must hold two maximum RLE packets)
+_STREAM_IN_SIZE = const(1024)
+_STREAM_OUT_SIZE = const(512)
+_RLE_MAX_PACKET = const(257)
+
+# Block device sector size (stream_blocks)
+_BLOCK_SIZE = const(512)
+
+
+def _open(source):
+    """Open a file path for reading, or pass an already-open file through."""
+    if isinstance(source, str):
+        return open(source, 'rb')
+    return source
+
+
+def _bgr888_to_bgr565_py(src, start, dst, pixels):
+    """Convert BGR888 pixels (24bpp BMP row) to big-endian BGR565 - pure Python."""
+    idx = start
+    for col in range(pixels):
+        # Get BGR values (BMP is already BGR)
+        b = src[idx]
+        g = src[idx + 1]
+        r = src[idx + 2]
+        idx += 3
+        
+        # Convert to BGR565 (keep BGR order for display)
+        bgr565 = ((b & 0xF8) << 8) | ((g & 0xFC) << 3) | (r >> 3)
+        
+        # Store as big-endian
+        col2 = col * 2
+        dst[col2] = bgr565 >> 8
+        dst[col2 + 1] = bgr565 & 0xFF
+
+
+def _swap16_py(src, start, dst, pixels):
+    """Byte-swap little-endian BGR565 pixels (16bpp BMP row) - pure Python."""
+    idx = start
+    for o in range(0, pixels * 2, 2):
+        dst[o] = src[idx + 1]
+        dst[o + 1] = src[idx]
+        idx += 2
+
+
+def _rgb565le_to_bgr565_py(src, start, dst, pixels):
+    """Convert little-endian RGB565 pixels (16bpp BMP row) to BGR565 - pure Python."""
+    idx = start
+    for o in range(0, pixels * 2, 2):
+        v = src[idx] | (src[idx + 1] << 8)
+        idx += 2
+        # Swap red and blue, store big-endian
+        bgr565 = ((v & 0x1F) << 11) | (v & 0x07E0) | (v >> 11)
+        dst[o] = bgr565 >> 8
+        dst[o + 1] = bgr565 & 0xFF
+
+
+def _expand8_py(src, start, count, lut, dst):
+    """Expand count 8-bit palette indices from src[start:] into dst - pure Python."""
+    o = 0
+    for i in range(start, start + count):
+        c = src[i] << 1
+        dst[o] = lut[c]
+        dst[o + 1] = lut[c + 1]
+        o += 2
+
+
+def _expand4_py(src, start, count, lut, dst):
+    """Expand count bytes of 4-bit palette indices (2 pixels each) into dst - pure Python."""
+    o = 0
+    for i in range(start, start + count):
+        b = src[i]
+        c = (b >> 4) << 1
+        dst[o] = lut[c]
+        dst[o + 1] = lut[c + 1]
+        c = (b & 0x0F) << 1
+        dst[o + 2] = lut[c]
+        dst[o + 3] = lut[c + 1]
+        o += 4
+
+
+# Compiled conversion and palette expansion when the firmware has the
+# viper emitter, else Python.
+# The viper code is a separate module: without the emitter it fails to
+# compile (SyntaxError), which only an import can catch; so does a
+# missing ili9341_viper.py (ImportError).
+try:
+    from ili9341_viper import bgr888_to_bgr565 as _bgr888_to_bgr565_viper
+    from ili9341_viper import swap16 as _swap16_viper
+    from ili9341_viper import rgb565le_to_bgr565 as _rgb565le_to_bgr565_viper
+    from ili9341_viper import expand8 as _expand8_viper
+    from ili9341_viper import expand4 as _expand4_viper
+    _bgr888_to_bgr565 = _bgr888_to_bgr565_viper
+    _swap16 = _swap16_viper
+    _rgb565le_to_bgr565 = _rgb565le_to_bgr565_viper
+    _expand8 = _expand8_viper
+    _expand4 = _expand4_viper
+    BMP_CONVERTER = 'viper'
+except Exception:
+    _bgr888_to_bgr565 = _bgr888_to_bgr565_py
+    _swap16 = _swap16_py
+    _rgb565le_to_bgr565 = _rgb565le_to_bgr565_py
+    _expand8 = _expand8_py
+    _expand4 = _expand4_py
+    BMP_CONVERTER = 'python'
+
 
 class Display:
     """ILI9341 display driver."""
     
-    def __init__(self, spi, dc, cs, rst=None, width=WIDTH, height=HEIGHT):
-        """Initialize display."""
+    def __init__(self, spi, dc, cs, rst=None, width=WIDTH, height=HEIGHT,
+                 chunk_size=RAW_CHUNK_SIZE, pipeline=False):
+        """
+        Initialize display.
+        
+        chunk_size: bytes per read in show_raw
+        pipeline: read the SD card in a second thread while writing SPI
+        """
         self.spi = spi
         self.dc = dc
         self.cs = cs
@@ -41,8 +167,17 @@ class Display:
             self.rst.init(Pin.OUT, value=1)
         
         # Pre-allocate buffers for faster rendering
-        self.row_buffer_bgr = bytearray(width * 3 + 3)
         self.row_buffer_rgb565 = bytearray(width * 2)
+        self.bmp_block = None  # Allocated on first show_bmp (multi-row reads)
+        self.stream_in = bytearray(_STREAM_IN_SIZE)
+        self.stream_out = bytearray(_STREAM_OUT_SIZE)
+        self.lut = bytearray(512)  # Palette for indexed images (256 x RGB565)
+        self.pipeline = False
+        self.set_chunk_size(chunk_size)
+        self.set_pipeline(pipeline)
+        
+        # Stats of the last show_raw/stream_raw (updated in place, no allocation)
+        self.raw_stats = {'bytes': 0, 'ms': 0, 'gc': 0, 'alloc': 0}
         
         # Reset and initialize display
         self.reset()
@@ -147,42 +282,451 @@ class Display:
         self.cs.value(1)
     
     def show_raw(self, filepath, width=None, height=None):
-        """Display raw RGB565 file (much faster than BMP)."""
+        """Display raw RGB565 file (much faster than BMP); path or open file."""
+        try:
+            with _open(filepath) as f:
+                self.stream_raw(f, width, height)
+            return True
+            
+        except Exception as e:
+            print(f"  Error displaying raw: {e}")
+            return False
+    
+    def set_chunk_size(self, chunk_size):
+        """Allocate the show_raw buffers (two, or a ring when pipelined)."""
+        count = RAW_RING_BUFFERS if self.pipeline else 2
+        self.raw_buffers = None
+        self.raw_views = None
+        self.raw_buffers = tuple(bytearray(chunk_size) for _ in range(count))
+        self.raw_views = tuple(memoryview(b) for b in self.raw_buffers)
+        self.chunk_size = chunk_size
+    
+    def set_pipeline(self, enabled):
+        """
+        Turn the threaded SD -> SPI pipeline on or off.
+        
+        Falls back to the sequential path (returns False) when the
+        firmware has no _thread module.
+        """
+        enabled = bool(enabled) and _thread is not None
+        if enabled != self.pipeline:
+            self.pipeline = enabled
+            self.set_chunk_size(self.chunk_size)
+        # Ring state: [chunks filled, chunks drained, reader done, reader error]
+        self.ring_state = [0, 0, 0, 0]
+        self.ring_lengths = [0] * len(self.raw_buffers)
+        return enabled
+    
+    def stream_raw(self, f, width=None, height=None, x=0, y=0):
+        """
+        Stream width*height RGB565 pixels from an open file's current position.
+        
+        Alternates between two preallocated buffers with readinto, so full
+        chunks allocate nothing. Fills raw_stats: bytes sent, elapsed ms,
+        GC collections seen (heap shrank) and bytes allocated otherwise.
+        """
         if width is None:
             width = self.width
         if height is None:
             height = self.height
         
+        if self.pipeline and self._stream_raw_pipelined(f, width, height, x, y):
+            return
+        
+        views = self.raw_views
+        chunk_size = self.chunk_size
+        spi = self.spi
+        
+        start = time.ticks_ms()
+        heap = gc.mem_alloc()
+        heap_start = heap
+        collections = 0
+        sent = 0
+        
+        # Set display window
+        self.set_window(x, y, x + width - 1, y + height - 1)
+        
+        # Read and display file directly (already in RGB565 format)
+        self.cs.value(0)
+        self.dc.value(1)
+        
         try:
-            # Set display window
-            self.set_window(0, 0, width - 1, height - 1)
-            
-            # Read and display file directly (already in RGB565 format)
+            remaining = width * height * 2
+            i = 0
+            while remaining > 0:
+                mv = views[i]
+                if remaining < chunk_size:
+                    # Last partial chunk only (slicing allocates a memoryview)
+                    mv = mv[:remaining]
+                n = f.readinto(mv)
+                if not n:
+                    break
+                if n < len(mv):
+                    mv = mv[:n]
+                spi.write(mv)
+                sent += n
+                remaining -= n
+                i ^= 1
+                
+                # A drop in allocated heap means a collection ran
+                now = gc.mem_alloc()
+                if now < heap:
+                    collections += 1
+                    heap_start = now
+                heap = now
+        finally:
+            self.cs.value(1)
+        
+        stats = self.raw_stats
+        stats['bytes'] = sent
+        stats['ms'] = time.ticks_diff(time.ticks_ms(), start)
+        stats['gc'] = collections
+        stats['alloc'] = heap - heap_start
+    
+    def stream_blocks(self, device, block_num, width=None, height=None, x=0, y=0):
+        """
+        Stream width*height RGB565 pixels from block device sectors.
+        
+        Reads runs of whole blocks with device.readblocks (CMD18 on an
+        SDCard) into one preallocated buffer and hands that same buffer to
+        SPI: no filesystem, no copies, no allocation per run. The pixels
+        start at block block_num. Fills raw_stats like stream_raw.
+        """
+        if width is None:
+            width = self.width
+        if height is None:
+            height = self.height
+        
+        mv = self.raw_views[0]
+        run = self.chunk_size - self.chunk_size % _BLOCK_SIZE
+        if not run:
+            raise ValueError("chunk_size is smaller than a block")
+        view = mv if run == len(mv) else mv[:run]
+        spi = self.spi
+        
+        start = time.ticks_ms()
+        heap = gc.mem_alloc()
+        heap_start = heap
+        collections = 0
+        sent = 0
+        
+        self.set_window(x, y, x + width - 1, y + height - 1)
+        self.cs.value(0)
+        self.dc.value(1)
+        
+        try:
+            remaining = width * height * 2
+            while remaining > 0:
+                if remaining < run:
+                    # Last run: whole blocks in, only the pixels out
+                    blocks = (remaining + _BLOCK_SIZE - 1) // _BLOCK_SIZE
+                    device.readblocks(block_num, mv[:blocks * _BLOCK_SIZE])
+                    spi.write(mv[:remaining])
+                    sent += remaining
+                    break
+                device.readblocks(block_num, view)
+                spi.write(view)
+                block_num += run // _BLOCK_SIZE
+                sent += run
+                remaining -= run
+                
+                now = gc.mem_alloc()
+                if now < heap:
+                    collections += 1
+                    heap_start = now
+                heap = now
+        finally:
+            self.cs.value(1)
+        
+        stats = self.raw_stats
+        stats['bytes'] = sent
+        stats['ms'] = time.ticks_diff(time.ticks_ms(), start)
+        stats['gc'] = collections
+        stats['alloc'] = heap - heap_start
+
+    def _raw_reader(self, f, total):
+        """Pipeline producer thread: fill ring buffers from the file."""
+        state = self.ring_state
+        lengths = self.ring_lengths
+        views = self.raw_views
+        count = len(views)
+        chunk_size = self.chunk_size
+        remaining = total
+        try:
+            while remaining > 0 and not state[3]:
+                # Wait for a free buffer
+                if state[0] - state[1] >= count:
+                    time.sleep_ms(0)
+                    continue
+                slot = state[0] % count
+                mv = views[slot]
+                if remaining < chunk_size:
+                    mv = mv[:remaining]
+                n = f.readinto(mv)
+                if not n:
+                    break
+                lengths[slot] = n
+                remaining -= n
+                state[0] += 1
+        except Exception:
+            state[3] = 1
+        finally:
+            state[2] = 1
+    
+    def _stream_raw_pipelined(self, f, width, height, x, y):
+        """
+        stream_raw with a reader thread filling a ring of fixed buffers
+        while this thread drains them to SPI, so frame time approaches
+        max(read, write) instead of read + write. Only overlaps where the
+        firmware releases the GIL during SPI/SD transfers.
+        
+        Returns False, having drawn nothing, if the reader thread cannot be
+        started (stream_raw then reads sequentially).
+        """
+        views = self.raw_views
+        count = len(views)
+        chunk_size = self.chunk_size
+        lengths = self.ring_lengths
+        state = self.ring_state
+        state[0] = state[1] = state[2] = state[3] = 0
+        spi = self.spi
+        
+        start = time.ticks_ms()
+        
+        # Only the reader sets state[2]: without it the loop below never ends
+        try:
+            _thread.start_new_thread(self._raw_reader, (f, width * height * 2))
+        except Exception as e:
+            print(f"Pipeline reader not started ({e}), reading sequentially")
+            return False
+        
+        heap = gc.mem_alloc()
+        heap_start = heap
+        collections = 0
+        sent = 0
+        
+        try:
+            self.set_window(x, y, x + width - 1, y + height - 1)
             self.cs.value(0)
             self.dc.value(1)
-            
-            with open(filepath, 'rb') as f:
-                # Read in chunks for memory efficiency
-                chunk_size = 4096
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
+            while True:
+                if state[1] < state[0]:
+                    slot = state[1] % count
+                    n = lengths[slot]
+                    spi.write(views[slot] if n == chunk_size else views[slot][:n])
+                    sent += n
+                    state[1] += 1
+                    
+                    now = gc.mem_alloc()
+                    if now < heap:
+                        collections += 1
+                        heap_start = now
+                    heap = now
+                elif state[2]:
+                    # Reader finished after its last fill; drain what's left
+                    if state[1] >= state[0]:
                         break
-                    self.spi.write(chunk)
+                else:
+                    time.sleep_ms(0)
+        except Exception:
+            # Stop the reader before leaving
+            state[3] = 1
+            while not state[2]:
+                time.sleep_ms(1)
+            raise
+        finally:
+            self.cs.value(1)
+        
+        if state[3]:
+            raise OSError("SD read failed in pipeline")
+        
+        stats = self.raw_stats
+        stats['bytes'] = sent
+        stats['ms'] = time.ticks_diff(time.ticks_ms(), start)
+        stats['gc'] = collections
+        stats['alloc'] = heap - heap_start
+        return True
+    
+    def show_rle(self, filepath):
+        """Display RLE-compressed RGB565 file or open file (convert_images_fast.py --rle)."""
+        try:
+            with _open(filepath) as f:
+                header = f.read(8)
+                if header[0:4] != b'R565':
+                    print("  Not a valid RLE file")
+                    return False
+                width = int.from_bytes(header[4:6], 'little')
+                height = int.from_bytes(header[6:8], 'little')
+                self.stream_rle(f, width, height)
+            return True
             
+        except Exception as e:
+            print(f"  Error displaying RLE: {e}")
+            return False
+    
+    def stream_rle(self, f, width, height, x=0, y=0):
+        """
+        Decode RLE packets from an open file straight into SPI writes.
+        
+        Packet header n: bit 7 set -> (n & 0x7F) + 1 copies of the next
+        pixel, clear -> n + 1 literal pixels follow. Uses only the
+        preallocated stream_in/stream_out buffers.
+        """
+        inbuf = self.stream_in
+        inmv = memoryview(inbuf)
+        outmv = memoryview(self.stream_out)
+        out_size = len(outmv)
+        spi = self.spi
+        
+        self.set_window(x, y, x + width - 1, y + height - 1)
+        self.cs.value(0)
+        self.dc.value(1)
+        
+        try:
+            remaining = width * height
+            n = f.readinto(inbuf)
+            eof = n < len(inbuf)
+            pos = 0
+            opos = 0
+            
+            while remaining > 0:
+                # Keep a whole packet in the input buffer. Only refill after a
+                # full read, so the tail never overlaps its new position.
+                if not eof and n - pos < _RLE_MAX_PACKET:
+                    tail = n - pos
+                    inmv[0:tail] = inmv[pos:n]
+                    got = f.readinto(inmv[tail:])
+                    n = tail + got
+                    eof = n < len(inbuf)
+                    pos = 0
+                if pos >= n:
+                    raise ValueError("RLE data truncated")
+                
+                header = inbuf[pos]
+                count = (header & 0x7F) + 1
+                remaining -= count
+                
+                if header & 0x80:
+                    # Run: write pixel once, then double it up to fill space
+                    hi = inbuf[pos + 1]
+                    lo = inbuf[pos + 2]
+                    pos += 3
+                    nbytes = count * 2
+                    while nbytes:
+                        if opos == out_size:
+                            spi.write(outmv)
+                            opos = 0
+                        k = min(nbytes, out_size - opos)
+                        outmv[opos] = hi
+                        outmv[opos + 1] = lo
+                        done = 2
+                        while done < k:
+                            step = min(done, k - done)
+                            outmv[opos + done:opos + done + step] = outmv[opos:opos + step]
+                            done += step
+                        opos += k
+                        nbytes -= k
+                else:
+                    # Literal: copy pixels straight from the input buffer
+                    pos += 1
+                    nbytes = count * 2
+                    while nbytes:
+                        if opos == out_size:
+                            spi.write(outmv)
+                            opos = 0
+                        k = min(nbytes, out_size - opos)
+                        outmv[opos:opos + k] = inmv[pos:pos + k]
+                        pos += k
+                        opos += k
+                        nbytes -= k
+            
+            if opos:
+                spi.write(outmv[:opos])
+        finally:
             self.cs.value(1)
+    
+    def show_indexed(self, filepath):
+        """Display palette-indexed file or open file (convert_images_fast.py --palette)."""
+        try:
+            with _open(filepath) as f:
+                header = f.read(10)
+                if header[0:4] != b'P565':
+                    print("  Not a valid indexed file")
+                    return False
+                width = int.from_bytes(header[4:6], 'little')
+                height = int.from_bytes(header[6:8], 'little')
+                self.stream_indexed(f, width, height, header[8])
             return True
             
         except Exception as e:
-            print(f"  Error displaying raw: {e}")
+            print(f"  Error displaying indexed: {e}")
             return False
     
-    def show_bmp(self, filepath):
-        """Display BMP file from SD card."""
+    def stream_indexed(self, f, width, height, bpp, x=0, y=0):
+        """
+        Expand 8bpp or 4bpp palette indices from an open file into SPI writes.
+        
+        Data: colour count (u16), palette (RGB565, big-endian), indices.
+        The palette is loaded into the preallocated lut.
+        """
+        if bpp == 8:
+            expand = _expand8
+            per_byte = 1
+        elif bpp == 4:
+            expand = _expand4
+            per_byte = 2
+        else:
+            raise ValueError("unsupported bpp")
+        
+        colours = int.from_bytes(f.read(2), 'little')
+        lut = self.lut
+        if f.readinto(memoryview(lut)[:colours * 2]) != colours * 2:
+            raise ValueError("palette truncated")
+        
+        inbuf = self.stream_in
+        inmv = memoryview(inbuf)
+        outbuf = self.stream_out
+        outmv = memoryview(outbuf)
+        # Input bytes that fill the output buffer once
+        step_max = len(outbuf) // (2 * per_byte)
+        spi = self.spi
+        
+        self.set_window(x, y, x + width - 1, y + height - 1)
+        self.cs.value(0)
+        self.dc.value(1)
+        
         try:
-            with open(filepath, 'rb') as f:
-                # Read BMP header
-                header = f.read(54)
+            remaining = width * height
+            while remaining > 0:
+                need = min(len(inbuf), (remaining + per_byte - 1) // per_byte)
+                got = f.readinto(inmv[:need])
+                if not got:
+                    raise ValueError("indexed data truncated")
+                pos = 0
+                while pos < got:
+                    step = min(got - pos, step_max)
+                    expand(inbuf, pos, step, lut, outbuf)
+                    pixels = min(step * per_byte, remaining)
+                    spi.write(outmv[:pixels * 2])
+                    remaining -= pixels
+                    pos += step
+        finally:
+            self.cs.value(1)
+    
+    def show_bmp(self, filepath, copy=None):
+        """
+        Display BMP file from SD card (path or open file).
+        
+        Supports 24bpp and 16bpp BI_BITFIELDS (RGB565 or BGR565 masks),
+        bottom-up or top-down (negative height).
+        
+        copy: open file that also receives the converted BGR565 rows, top
+        to bottom (a RAW copy of what was drawn)
+        """
+        try:
+            with _open(filepath) as f:
+                # Read file header, info header and bitfield masks
+                header = f.read(66)
                 
                 # Check BMP signature
                 if header[0:2] != b'BM':
@@ -190,60 +734,91 @@ class Display:
                     return False
                 
                 # Get image info
+                data_offset = int.from_bytes(header[10:14], 'little')
                 width = int.from_bytes(header[18:22], 'little')
                 height = int.from_bytes(header[22:26], 'little')
                 bits_per_pixel = int.from_bytes(header[28:30], 'little')
+                compression = int.from_bytes(header[30:34], 'little')
                 
-                print(f"  BMP: {width}x{height}, {bits_per_pixel}bpp")
-                
-                # Only support 24-bit BMP
-                if bits_per_pixel != 24:
-                    print(f"  Unsupported: {bits_per_pixel}bpp (need 24bpp)")
-                    return False
-                
-                # Calculate row size (must be multiple of 4)
-                row_size = ((width * 3 + 3) // 4) * 4
-                
-                # Use pre-allocated buffers
-                row_buffer_bgr = self.row_buffer_bgr
-                row_buffer_rgb565 = self.row_buffer_rgb565
-                
-                # Set display window
-                self.set_window(0, 0, min(width, self.width) - 1, min(height, self.height) - 1)
+                # Negative height means rows are stored top-down
+                top_down = height >= 0x80000000
+                if top_down:
+                    height = 0x100000000 - height
                 
-                self.cs.value(0)
-                self.dc.value(1)
+                print(f"  BMP: {width}x{height}, {bits_per_pixel}bpp{' top-down' if top_down else ''}")
                 
-                # Read and convert each row - optimized version
-                for row in range(min(height, self.height)):
-                    # Seek to row (BMP is bottom-to-top)
-                    f.seek(54 + (height - 1 - row) * row_size)
-                    f.readinto(row_buffer_bgr)
-                    
-                    # Convert BGR888 to BGR565 - optimized loop
-                    idx = 0
-                    for col in range(min(width, self.width)):
-                        # Get BGR values (BMP is already BGR)
-                        b = row_buffer_bgr[idx]
-                        g = row_buffer_bgr[idx + 1]
-                        r = row_buffer_bgr[idx + 2]
-                        idx += 3
-                        
-                        # Convert to BGR565 (keep BGR order for display)
-                        bgr565 = ((b & 0xF8) << 8) | ((g & 0xFC) << 3) | (r >> 3)
-                        
-                        # Store as big-endian
-                        col2 = col * 2
-                        row_buffer_rgb565[col2] = bgr565 >> 8
-                        row_buffer_rgb565[col2 + 1] = bgr565 & 0xFF
-                    
-                    # Write row to display
-                    self.spi.write(row_buffer_rgb565)
-                
-                self.cs.value(1)
+                if bits_per_pixel == 24 and compression == 0:
+                    convert = _bgr888_to_bgr565
+                elif bits_per_pixel == 16 and compression == 3:
+                    masks = (int.from_bytes(header[54:58], 'little'),
+                             int.from_bytes(header[58:62], 'little'),
+                             int.from_bytes(header[62:66], 'little'))
+                    if masks == (0x001F, 0x07E0, 0xF800):
+                        # Already BGR565, only the byte order differs
+                        convert = _swap16
+                    elif masks == (0xF800, 0x07E0, 0x001F):
+                        convert = _rgb565le_to_bgr565
+                    else:
+                        print("  Unsupported: 16bpp masks (need RGB565 or BGR565)")
+                        return False
+                else:
+                    print(f"  Unsupported: {bits_per_pixel}bpp (need 24bpp or 16bpp bitfields)")
+                    return False
                 
+                self._stream_bmp(f, data_offset, width, height, bits_per_pixel // 8,
+                                 top_down, convert, copy)
                 return True
                 
         except Exception as e:
             print(f"  Error displaying BMP: {e}")
             return False
+    
+    def _stream_bmp(self, f, data_offset, width, height, bytes_per_pixel, top_down, convert, copy=None):
+        """Read BMP rows in multi-row blocks and send them top to bottom."""
+        # Calculate row size (must be multiple of 4)
+        row_size = ((width * bytes_per_pixel + 3) // 4) * 4
+        cols = min(width, self.width)
+        rows = min(height, self.height)
+        
+        # One block buffer, reused for every image
+        block_rows = max(1, min(rows, _BMP_BLOCK_BYTES // row_size))
+        if self.bmp_block is None or len(self.bmp_block) < block_rows * row_size:
+            self.bmp_block = None
+            self.bmp_block = bytearray(max(_BMP_BLOCK_BYTES, row_size))
+        block = self.bmp_block
+        block_mv = memoryview(block)
+        
+        # Only the visible part of each row is converted and sent
+        row_rgb565 = self.row_buffer_rgb565
+        row_out = memoryview(row_rgb565)[:cols * 2]
+        
+        # Set display window
+        self.set_window(0, 0, cols - 1, rows - 1)
+        
+        self.cs.value(0)
+        self.dc.value(1)
+        
+        try:
+            if top_down:
+                # Rows are in display order: one seek, then read forward
+                f.seek(data_offset)
+            
+            row = 0
+            while row < rows:
+                n = min(block_rows, rows - row)
+                if not top_down:
+                    # Display rows row..row+n-1 are file rows height-row-n..height-row-1
+                    f.seek(data_offset + (height - row - n) * row_size)
+                f.readinto(block_mv[:n * row_size])
+                
+                for i in range(n):
+                    # Bottom-up blocks are reversed in memory
+                    r = i if top_down else n - 1 - i
+                    convert(block, r * row_size, row_rgb565, cols)
+                    self.spi.write(row_out)
+                    if copy:
+                        copy.write(row_out)
+                
+                row += n
+        finally:
+            self.cs.value(1)
@@ -0,0 +1,88 @@
+"""
+Viper BMP row converters and palette expanders for ili9341.py
+Compiled to machine code by the MicroPython viper emitter
+
+Kept apart from ili9341.py because firmware without the viper emitter
+rejects @micropython.viper when the module is compiled (SyntaxError),
+before any of its code runs. ili9341.py imports this module inside a
+try and uses its pure-Python versions when the import fails.
+"""
+
+import micropython
+
+
+@micropython.viper
+def bgr888_to_bgr565(src: ptr8, start: int, dst: ptr8, pixels: int):
+    """Convert BGR888 pixels (24bpp BMP row) to big-endian BGR565 - viper."""
+    i = start
+    o = 0
+    end = pixels * 2
+    while o < end:
+        b = src[i]
+        g = src[i + 1]
+        r = src[i + 2]
+        dst[o] = (b & 0xF8) | (g >> 5)
+        dst[o + 1] = ((g & 0x1C) << 3) | (r >> 3)
+        i += 3
+        o += 2
+
+
+@micropython.viper
+def swap16(src: ptr8, start: int, dst: ptr8, pixels: int):
+    """Byte-swap little-endian BGR565 pixels (16bpp BMP row) - viper."""
+    i = start
+    o = 0
+    end = pixels * 2
+    while o < end:
+        dst[o] = src[i + 1]
+        dst[o + 1] = src[i]
+        i += 2
+        o += 2
+
+
+@micropython.viper
+def rgb565le_to_bgr565(src: ptr8, start: int, dst: ptr8, pixels: int):
+    """Convert little-endian RGB565 pixels (16bpp BMP row) to BGR565 - viper."""
+    i = start
+    o = 0
+    end = pixels * 2
+    while o < end:
+        lo = src[i]
+        hi = src[i + 1]
+        # hi = RRRRRGGG, lo = GGGBBBBB -> BBBBBGGG, GGGRRRRR
+        dst[o] = ((lo & 0x1F) << 3) | (hi & 0x07)
+        dst[o + 1] = (lo & 0xE0) | (hi >> 3)
+        i += 2
+        o += 2
+
+
+@micropython.viper
+def expand8(src: ptr8, start: int, count: int, lut: ptr8, dst: ptr8):
+    """Expand count 8-bit palette indices from src[start:] into dst - viper."""
+    i = start
+    end = start + count
+    o = 0
+    while i < end:
+        c = src[i] << 1
+        dst[o] = lut[c]
+        dst[o + 1] = lut[c + 1]
+        i += 1
+        o += 2
+
+
+@micropython.viper
+def expand4(src: ptr8, start: int, count: int, lut: ptr8, dst: ptr8):
+    """Expand count bytes of 4-bit palette indices (2 pixels each) into dst - viper."""
+    i = start
+    end = start + count
+    o = 0
+    while i < end:
+        b = src[i]
+        c = (b >> 4) << 1
+        dst[o] = lut[c]
+        dst[o + 1] = lut[c + 1]
+        c = (b & 0x0F) << 1
+        dst[o + 2] = lut[c]
+        dst[o + 3] = lut[c + 1]
+        i += 1
+        o += 4
@@ -0,0 +1,207 @@
+"""
+RAW cache of BMP slides for MicroPython
+Converted copies of BMP files, written to the SD card while they are drawn
+
+The first time a BMP is shown its converted BGR565 rows are also written
+to a hidden RAW file (RawCache.show_bmp), in whole sectors (SectorWriter);
+later passes draw the RAW copy, which needs no conversion. Copies are
+checked against the BMP's size and mtime, so an edited BMP is converted
+again.
+"""
+
+import os
+import struct
+
+# Converted RAW copies of BMP files (hidden, so not shown as slides)
+RAW_CACHE_DIR = '/sd/.rawcache'
+RAW_CACHE_MAGIC = b'BRC1'
+RAW_CACHE_SKIP = b'BRC0'  # Header-only marker: this BMP version is not cached
+RAW_CACHE_FORMAT = '<4sII'  # magic, BMP size, BMP mtime
+RAW_CACHE_HEADER = 512  # Pixels start on the next SD sector
+FRAME_BYTES = 240 * 320 * 2
+
+# RAW copies are written in runs of this many bytes: 15 whole sectors,
+# which is also 16 display rows
+RAW_CACHE_WRITE = 7680
+
+
+class SectorWriter:
+    """
+    Collects the rows of a RAW copy and writes them in whole sectors.
+
+    Rows are 480 bytes; writing them one at a time makes FatFs read back
+    and rewrite each partly filled sector, between the BMP reads on the
+    same card. A failed write is kept in error and later rows are
+    dropped, so the display still draws the whole BMP.
+    """
+
+    def __init__(self, size=RAW_CACHE_WRITE):
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.f = None
+        self.used = 0
+        self.count = 0
+        self.error = None
+
+    def start(self, f):
+        """Start a copy into the open file f."""
+        self.f = f
+        self.used = 0
+        self.count = 0  # Bytes written to f (after the header)
+        self.error = None
+
+    def write(self, data):
+        pos = 0
+        size = len(data)
+        while pos < size and self.error is None:
+            n = min(size - pos, len(self.buf) - self.used)
+            self.mv[self.used:self.used + n] = data[pos:pos + n]
+            self.used += n
+            pos += n
+            if self.used == len(self.buf):
+                self.flush()
+        return size
+
+    def flush(self):
+        """Write the buffered bytes (the last run may be a partial one)."""
+        if self.used and self.error is None:
+            try:
+                self.f.write(self.mv[:self.used])
+                self.count += self.used
+            except OSError as e:
+                self.error = e
+        self.used = 0
+
+
+class RawCache:
+    """
+    RAW copies of BMP files, written the first time each BMP is shown.
+
+    A copy is /sd/.rawcache/<path>.raw: a 512-byte header (magic, size and
+    mtime of the BMP) followed by the BGR565 frame. It is used while the
+    BMP's size and mtime match, and rewritten when they change.
+
+    Each BMP is tried once: one that is smaller than the screen gets a
+    header-only RAW_CACHE_SKIP marker instead, so later boots skip it
+    too, and one whose copy failed (card full, write error) is skipped
+    until the next boot.
+    """
+
+    def __init__(self, root=RAW_CACHE_DIR, base='/sd'):
+        self.root = root
+        self.base = base
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+        self.writer = SectorWriter()
+        self.skip = set()  # BMP paths not to copy (again)
+
+    def cache_path(self, filepath):
+        return self.root + filepath[len(self.base):] + '.raw'
+
+    def open(self, filepath):
+        """Open the valid copy of a BMP at its pixel data, or return None."""
+        if filepath in self.skip:
+            return None
+        try:
+            st = os.stat(filepath)
+            f = open(self.cache_path(filepath), 'rb')
+        except OSError:
+            self.misses += 1
+            return None
+        header = f.read(12)
+        if len(header) == 12:
+            fields = struct.unpack(RAW_CACHE_FORMAT, header)
+            if fields == (RAW_CACHE_MAGIC, st[6], st[8]):
+                f.seek(RAW_CACHE_HEADER)
+                self.hits += 1
+                return f
+            if fields == (RAW_CACHE_SKIP, st[6], st[8]):
+                f.close()
+                self.skip.add(filepath)
+                return None
+        f.close()
+        self.misses += 1
+        return None
+
+    def _makedirs(self, path):
+        folder = ''
+        for part in path.split('/')[1:-1]:
+            folder += '/' + part
+            try:
+                os.mkdir(folder)
+            except OSError:
+                pass  # Already exists
+
+    def show_bmp(self, display, filepath, source=None):
+        """
+        Display a BMP (filepath, or open source) and write its RAW copy.
+
+        Returns the draw result: a failed copy (card full, write error) is
+        deleted and does not fail the slide.
+        """
+        if filepath in self.skip:
+            return display.show_bmp(source or filepath)
+        cached = self.cache_path(filepath)
+        try:
+            st = os.stat(filepath)
+            with open(filepath, 'rb') as f:
+                header = f.read(26)
+            width = int.from_bytes(header[18:22], 'little')
+            height = int.from_bytes(header[22:26], 'little')
+            if height >= 0x80000000:
+                height = 0x100000000 - height  # Top-down
+            self._makedirs(cached)
+            if width < display.width or height < display.height:
+                # Would not fill the screen: never copied, remembered on the card
+                self.skip.add(filepath)
+                with open(cached, 'wb') as out:
+                    out.write(struct.pack(RAW_CACHE_FORMAT, RAW_CACHE_SKIP, st[6], st[8]))
+                print(f"    Not cached: {width}x{height} does not fill the screen")
+                return display.show_bmp(source or filepath)
+            out = open(cached, 'wb')
+        except OSError as e:
+            self.skip.add(filepath)
+            print(f"    Cache not writable: {e}")
+            return display.show_bmp(source or filepath)
+
+        # Header is written last, so an interrupted copy is never used
+        writer = self.writer
+        writer.start(out)
+        try:
+            out.write(bytearray(RAW_CACHE_HEADER))
+        except OSError as e:
+            writer.error = e
+        success = display.show_bmp(source or filepath, writer)
+        writer.flush()
+        valid = success and writer.error is None and writer.count == FRAME_BYTES
+        try:
+            if valid:
+                out.seek(0)
+                out.write(struct.pack(RAW_CACHE_FORMAT, RAW_CACHE_MAGIC, st[6], st[8]))
+            out.close()
+        except OSError as e:
+            writer.error = e
+            valid = False
+        writer.f = None
+
+        if valid:
+            self.written += 1
+            print("    Cached as RAW")
+        else:
+            # Draw failed or the card is full: keep showing the BMP,
+            # without trying again on this boot
+            self.skip.add(filepath)
+            if writer.error is not None:
+                print(f"    Cache write failed: {writer.error}")
+            try:
+                out.close()
+                os.remove(cached)
+            except OSError:
+                pass
+        return success
+
+    def report(self):
+        """Print cache counters."""
+        print(f"RAW cache: {self.hits} hits, {self.misses} misses, {self.written} written,"
+              f" {len(self.skip)} not cached")
@@ -0,0 +1,131 @@
+"""
+Read-ahead buffer for MicroPython
+The next slide's first bytes, read into RAM while the current one is shown
+
+While a slide is on screen the slideshow loads the start of the next
+one into a reserved buffer; the display decoders then read it through
+PrefetchFile like a normal file, from RAM first and from the SD card
+for whatever did not fit. The buffer is reserved once at startup
+(alloc_prefetch), sized from free heap up to one full 240x320 RGB565
+frame, so it never fragments the heap between slides.
+"""
+
+import gc
+
+# Prefetch buffer: at most one full 240x320 RGB565 frame, and leave
+# this much heap free for everything else
+PREFETCH_MAX = 240 * 320 * 2
+PREFETCH_HEAP_RESERVE = 40 * 1024
+
+
+class PrefetchFile:
+    """
+    Open file whose next bytes were read ahead into a reserved buffer.
+
+    Reads are served from the buffer first, then from the file, so the
+    display decoders use it like a normal file. Counts how many bytes
+    came from each.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+        self.f = None
+        self.start = 0
+        self.length = 0
+        self.pos = 0
+        self.file_pos = 0
+        self.from_buffer = 0
+        self.from_file = 0
+        self.total_buffer = 0
+        self.total_file = 0
+
+    def load(self, f, start=0, limit=None):
+        """Read ahead up to limit bytes of f from offset start."""
+        size = len(self.buffer)
+        if limit is not None and limit < size:
+            size = limit
+        f.seek(start)
+        n = f.readinto(self.view[:size]) or 0
+        self.f = f
+        self.start = start
+        self.length = n
+        self.pos = start
+        self.file_pos = start + n
+        self.from_buffer = 0
+        self.from_file = 0
+        return n
+
+    def readinto(self, buf):
+        want = len(buf)
+        done = 0
+        offset = self.pos - self.start
+        if 0 <= offset < self.length:
+            done = min(want, self.length - offset)
+            buf[0:done] = self.view[offset:offset + done]
+            self.pos += done
+            self.from_buffer += done
+            self.total_buffer += done
+        if done < want:
+            if self.file_pos != self.pos:
+                self.f.seek(self.pos)
+            n = self.f.readinto(memoryview(buf)[done:] if done else buf) or 0
+            self.pos += n
+            self.file_pos = self.pos
+            self.from_file += n
+            self.total_file += n
+            done += n
+        return done
+
+    def read(self, n):
+        buf = bytearray(n)
+        return bytes(buf[:self.readinto(buf)])
+
+    def seek(self, pos, whence=0):
+        if whence == 1:
+            pos += self.pos
+        elif whence == 2:
+            raise OSError("seek from end not supported")
+        self.pos = pos
+        return pos
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        if self.f:
+            self.f.close()
+            self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def report(self):
+        """Print how much of the last frame came from the prefetch buffer."""
+        total = self.from_buffer + self.from_file
+        if total:
+            print(f"    Prefetch: {self.from_buffer} of {total} bytes ({self.from_buffer * 100 // total}%)")
+
+
+def alloc_prefetch(size_kb=None):
+    """Reserve the prefetch buffer (size in KB, None = as much as fits)."""
+    if size_kb == 0:
+        return None
+    gc.collect()
+    if size_kb is None:
+        size = min(PREFETCH_MAX, gc.mem_free() - PREFETCH_HEAP_RESERVE)
+    else:
+        size = int(size_kb * 1024)
+    size = size // 512 * 512
+    while size >= 4096:
+        try:
+            prefetch = PrefetchFile(bytearray(size))
+            print(f"✓ Prefetch buffer: {size // 1024} KB")
+            return prefetch
+        except MemoryError:
+            size = size // 2 // 512 * 512
+    print("  No memory for prefetch buffer")
+    return None
@@ -1,6 +1,11 @@
 """
 SD Card driver for MicroPython on ESP32
 Compatible with standard SPI SD cards
+
+Optional sector cache (set_cache): a fixed number of 512-byte blocks with
+LRU eviction, so repeated FAT and directory sector reads do not go to the
+card. When single blocks are read in sequence, the following blocks are
+read ahead into the cache with one CMD18 multi-block read.
 """
 
 from micropython import const
@@ -14,11 +19,29 @@ _TOKEN_CMD25 = const(0xFC)
 _TOKEN_STOP_TRAN = const(0xFD)
 _TOKEN_DATA = const(0xFE)
 
+# Longest wait for a read block (SDHC allows up to 100 ms)
+_READ_TIMEOUT_MS = const(100)
+
+# Longest wait for a card to finish writing (SDXC allows up to 500 ms)
+_WRITE_TIMEOUT_MS = const(500)
+
+# Blocks staged per copy in multi-block writes (see writeblocks)
+_WRITE_STAGE_BLOCKS = const(4)
+
+# Clock after initialisation unless given to SDCard()
+DEFAULT_BAUDRATE = const(1320000)
+
+# Clock rates tried by negotiate(), lowest first
+NEGOTIATE_RATES = (1320000, 4000000, 8000000, 10000000, 13330000,
+                   16000000, 20000000, 26670000, 40000000)
+
 
 class SDCard:
-    def __init__(self, spi, cs):
+    def __init__(self, spi, cs, baudrate=DEFAULT_BAUDRATE):
         self.spi = spi
         self.cs = cs
+        self.baudrate = baudrate
+        self.cache_blocks = 0
         
         self.cmdbuf = bytearray(6)
         self.dummybuf = bytearray(512)
@@ -26,6 +49,12 @@ class SDCard:
         for i in range(512):
             self.dummybuf[i] = 0xFF
         self.dummybuf_memoryview = memoryview(self.dummybuf)
+        # Multi-block writes send blocks from here, through views made once
+        self.stage = bytearray(_WRITE_STAGE_BLOCKS * 512)
+        self.stage_mv = memoryview(self.stage)
+        self.stage_blocks = [self.stage_mv[i * 512 : (i + 1) * 512] for i in range(_WRITE_STAGE_BLOCKS)]
+        # stage_groups[n - 1] is the first n blocks, the copy target for n blocks
+        self.stage_groups = [self.stage_mv[: (i + 1) * 512] for i in range(_WRITE_STAGE_BLOCKS)]
 
         # initialise the card
         self.init_card()
@@ -79,7 +108,52 @@ class SDCard:
             raise OSError("can't set 512 block size")
 
         # set to high data rate now that it's initialised
-        self.spi.init(baudrate=1320000)
+        self.spi.init(baudrate=self.baudrate)
+
+    def set_baudrate(self, baudrate):
+        """Change the SPI clock used for data transfers."""
+        self.baudrate = baudrate
+        self.spi.init(baudrate=baudrate)
+
+    def negotiate(self, rates=NEGOTIATE_RATES, block_num=0, blocks=4, tries=3):
+        """
+        Step the clock up and keep the highest rate that reads reliably.
+
+        blocks sectors from block_num are read at the current rate as a
+        reference, then at each rate in turn (single and multi-block
+        reads, tries times); the first rate that fails or returns
+        different data ends the search. Returns the rate kept.
+        """
+        reference = bytearray(512 * blocks)
+        self._readblocks(block_num, reference)
+        check = bytearray(512 * blocks)
+        single = memoryview(check)[:512]
+        best = self.baudrate
+        for rate in rates:
+            if rate <= best:
+                continue
+            self.set_baudrate(rate)
+            try:
+                for _ in range(tries):
+                    self._readblocks(block_num, single)
+                    if check[:512] != reference[:512]:
+                        break
+                    self._readblocks(block_num, check)
+                    if check != reference:
+                        break
+                else:
+                    best = rate
+                    continue
+            except OSError:
+                pass
+            break
+
+        # Back to the last good rate; resync with a read after a failure
+        self.set_baudrate(best)
+        self._readblocks(block_num, check)
+        if check != reference:
+            raise OSError(5)  # EIO
+        return best
 
     def init_card_v1(self):
         for i in range(_CMD_TIMEOUT):
@@ -139,15 +213,16 @@ class SDCard:
     def readinto(self, buf):
         self.cs(0)
 
-        # read until start byte (0xff)
-        for i in range(_CMD_TIMEOUT):
+        # read until start byte (0xfe); poll without sleeping, a card
+        # needs well under a millisecond per block
+        start = time.ticks_ms()
+        while True:
             self.spi.readinto(self.tokenbuf, 0xFF)
             if self.tokenbuf[0] == _TOKEN_DATA:
                 break
-            time.sleep_ms(1)
-        else:
-            self.cs(1)
-            raise OSError("timeout waiting for response")
+            if time.ticks_diff(time.ticks_ms(), start) > _READ_TIMEOUT_MS:
+                self.cs(1)
+                raise OSError("timeout waiting for response")
 
         # read data
         mv = self.dummybuf_memoryview
@@ -162,40 +237,169 @@ class SDCard:
         self.cs(1)
         self.spi.write(b"\xff")
 
+    def wait_busy(self):
+        """Wait (without allocating) until the card releases busy; False on timeout."""
+        tokenbuf = self.tokenbuf
+        start = time.ticks_ms()
+        while True:
+            self.spi.readinto(tokenbuf, 0xFF)
+            if tokenbuf[0] != 0x00:
+                return True
+            if time.ticks_diff(time.ticks_ms(), start) > _WRITE_TIMEOUT_MS:
+                return False
+
     def write(self, token, buf):
         self.cs(0)
 
         # send: start of block, data, checksum
-        self.spi.read(1, token)
+        self.tokenbuf[0] = token
+        self.spi.write(self.tokenbuf)
         self.spi.write(buf)
         self.spi.write(b"\xff")
         self.spi.write(b"\xff")
 
         # check the response
-        if (self.spi.read(1, 0xFF)[0] & 0x1F) != 0x05:
+        self.spi.readinto(self.tokenbuf, 0xFF)
+        if (self.tokenbuf[0] & 0x1F) != 0x05:
             self.cs(1)
             self.spi.write(b"\xff")
-            return
+            raise OSError(5)  # EIO, data rejected
 
         # wait for write to finish
-        while self.spi.read(1, 0xFF)[0] == 0:
-            pass
-
+        ok = self.wait_busy()
         self.cs(1)
         self.spi.write(b"\xff")
+        if not ok:
+            raise OSError(110)  # ETIMEDOUT
 
     def write_token(self, token):
         self.cs(0)
-        self.spi.read(1, token)
+        self.tokenbuf[0] = token
+        self.spi.write(self.tokenbuf)
         self.spi.write(b"\xff")
         # wait for write to finish
-        while self.spi.read(1, 0xFF)[0] == 0x00:
-            pass
-
+        ok = self.wait_busy()
         self.cs(1)
         self.spi.write(b"\xff")
+        if not ok:
+            raise OSError(110)  # ETIMEDOUT
+
+    def set_cache(self, cache_size, readahead=8):
+        """
+        Enable the sector cache with cache_size bytes (0 disables it).
+
+        readahead: blocks read with one CMD18 when single blocks are read
+        in sequence (at most half the cache, 0 = no read-ahead)
+        """
+        blocks = cache_size // 512
+        self.cache_blocks = 0
+        self.cache = None
+        if not blocks:
+            return
+        self.cache = bytearray(blocks * 512)
+        self.cache_mv = memoryview(self.cache)
+        self.cache_tags = [-1] * blocks  # Block held by each slot
+        self.cache_used = [0] * blocks  # Last use of each slot, for LRU
+        self.cache_slots = {}  # Block -> slot
+        self.cache_clock = 0
+        self.readahead = min(readahead, blocks // 2)
+        self.next_block = -1  # Block after the last one read
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.readahead_blocks = 0
+        self.cache_blocks = blocks
+
+    def cache_stats(self):
+        """Return (hits, misses, hit rate in %, blocks read ahead)."""
+        if not self.cache_blocks:
+            return 0, 0, 0, 0
+        total = self.cache_hits + self.cache_misses
+        rate = self.cache_hits * 100 // total if total else 0
+        return self.cache_hits, self.cache_misses, rate, self.readahead_blocks
+
+    def _cache_slot(self, block_num):
+        """Take the least recently used slot for block_num and return it."""
+        used = self.cache_used
+        slot = 0
+        for i in range(1, self.cache_blocks):
+            if used[i] < used[slot]:
+                slot = i
+        old = self.cache_tags[slot]
+        if old >= 0:
+            del self.cache_slots[old]
+        self.cache_tags[slot] = block_num
+        self.cache_slots[block_num] = slot
+        self.cache_clock += 1
+        used[slot] = self.cache_clock
+        return slot
+
+    def _read_ahead(self, block_num):
+        """Read blocks from block_num into the cache with one CMD18."""
+        count = min(self.readahead, self.sectors - block_num)
+        # Blocks already cached end the read-ahead
+        for i in range(1, count):
+            if block_num + i in self.cache_slots:
+                count = i
+                break
+        slots = [self._cache_slot(block_num + i) for i in range(count)]
+        try:
+            if self.cmd(18, block_num * self.cdv, 0, release=False) != 0:
+                self.cs(1)
+                raise OSError(5)  # EIO
+            for slot in slots:
+                self.readinto(self.cache_mv[slot * 512 : slot * 512 + 512])
+            if self.cmd(12, 0, 0xFF, skip1=True):
+                raise OSError(5)  # EIO
+        except OSError:
+            for i in range(count):
+                self._cache_drop(block_num + i)
+            raise
+        self.readahead_blocks += count - 1
+
+    def _cache_drop(self, block_num):
+        slot = self.cache_slots.pop(block_num, None)
+        if slot is not None:
+            self.cache_tags[slot] = -1
+            self.cache_used[slot] = 0
 
     def readblocks(self, block_num, buf):
+        if not self.cache_blocks:
+            return self._readblocks(block_num, buf)
+        nblocks = len(buf) // 512
+        assert nblocks and not len(buf) % 512, "Buffer length is invalid"
+        mv = memoryview(buf)
+        slots = self.cache_slots
+        i = 0
+        while i < nblocks:
+            block = block_num + i
+            slot = slots.get(block)
+            if slot is None and nblocks == 1 and self.readahead > 1 and block == self.next_block:
+                # Sequential single-block reads: fetch the next blocks too
+                self.cache_misses += 1
+                self._read_ahead(block)
+                slot = slots[block]
+            elif slot is None:
+                # Uncached run: read straight into buf (multi-block reads
+                # of file data do not push FAT sectors out of the cache)
+                j = i + 1
+                while j < nblocks and block_num + j not in slots:
+                    j += 1
+                self._readblocks(block, mv[i * 512 : j * 512])
+                self.cache_misses += j - i
+                if nblocks == 1:
+                    slot = self._cache_slot(block)
+                    self.cache_mv[slot * 512 : slot * 512 + 512] = mv[:512]
+                i = j
+                continue
+            else:
+                self.cache_hits += 1
+                self.cache_clock += 1
+                self.cache_used[slot] = self.cache_clock
+            mv[i * 512 : i * 512 + 512] = self.cache_mv[slot * 512 : slot * 512 + 512]
+            i += 1
+        self.next_block = block_num + nblocks
+
+    def _readblocks(self, block_num, buf):
         nblocks = len(buf) // 512
         assert nblocks and not len(buf) % 512, "Buffer length is invalid"
         if nblocks == 1:
@@ -225,6 +429,10 @@ class SDCard:
     def writeblocks(self, block_num, buf):
         nblocks, err = divmod(len(buf), 512)
         assert nblocks and not err, "Buffer length is invalid"
+        if self.cache_blocks:
+            # Cached copies are stale from here on
+            for i in range(nblocks):
+                self._cache_drop(block_num + i)
         if nblocks == 1:
             # CMD24: set write address for single block
             if self.cmd(24, block_num * self.cdv, 0) != 0:
@@ -233,16 +441,39 @@ class SDCard:
             # send the data
             self.write(_TOKEN_DATA, buf)
         else:
+            # ACMD23: pre-erase hint, lets the card prepare all blocks at once
+            if self.cmd(55, 0, 0) == 0:
+                self.cmd(23, nblocks, 0)
             # CMD25: set write address for first block
             if self.cmd(25, block_num * self.cdv, 0) != 0:
                 raise OSError(5)  # EIO
-            # send the data
+            # send the data: each group of up to _WRITE_STAGE_BLOCKS blocks
+            # is copied into a preallocated view of the stage, then sent
+            # through the stage's block views. A buffer that fits the stage
+            # is copied whole; only a larger one needs a view of buf, plus
+            # one slice of it per group (never one per block)
+            blocks = self.stage_blocks
+            groups = self.stage_groups
+            if nblocks <= _WRITE_STAGE_BLOCKS:
+                groups[nblocks - 1][:] = buf
+                mv = None
+            else:
+                mv = memoryview(buf)
             offset = 0
-            mv = memoryview(buf)
-            while nblocks:
-                self.write(_TOKEN_CMD25, mv[offset : offset + 512])
-                offset += 512
-                nblocks -= 1
+            try:
+                while nblocks:
+                    group = min(nblocks, _WRITE_STAGE_BLOCKS)
+                    size = group * 512
+                    if mv is not None:
+                        groups[group - 1][:] = mv[offset : offset + size]
+                    for i in range(group):
+                        self.write(_TOKEN_CMD25, blocks[i])
+                    offset += size
+                    nblocks -= group
+            except OSError:
+                # end the transfer so the card accepts commands again
+                self.write_token(_TOKEN_STOP_TRAN)
+                raise
             self.write_token(_TOKEN_STOP_TRAN)
 
     def ioctl(self, op, arg):
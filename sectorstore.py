@@ -0,0 +1,135 @@
+"""
+Raw-sector slide store for MicroPython
+Slides in a reserved range of SD card sectors, read without a filesystem
+
+tools/make_sector_store.py writes a slideshow bundle (see slidebundle.py)
+straight into sectors start.. of the card: the first sector holds the
+bundle header and frame index, frames start on sector boundaries. There
+is no FAT lookup, cluster chain or directory read on the way to the
+pixels; aligned reads go from SDCard.readblocks (CMD18 for more than one
+sector) directly into the display buffers, and RAW frames are streamed
+with Display.stream_blocks from the card's blocks to SPI. Reads that do
+not start on a sector (RLE, palette and delta decoders) are served from
+a small buffer refilled with one multi-sector read; it reads ahead only
+while reads follow each other, not after a seek (bottom-up BMP rows).
+"""
+
+from micropython import const
+import slidebundle
+
+_SECTOR = const(512)
+
+# Sectors read at once for reads that are not sector aligned
+_BUFFER_SECTORS = const(8)
+
+# Sectors searched for a store: 0 (card without a filesystem) and 64, in
+# the gap before the first partition (tools/make_sector_store.py's
+# default on partitioned cards)
+STORE_SECTORS = (0, 64)
+
+
+class SectorFile:
+    """Read-only file over a block device starting at sector start."""
+
+    def __init__(self, device, start=0):
+        self.device = device
+        self.start = start
+        self.pos = 0
+        # Sectors first..first+count-1 are in buf (reads not sector aligned)
+        self.buf = bytearray(_BUFFER_SECTORS * _SECTOR)
+        self.buf_mv = memoryview(self.buf)
+        self.first = -1
+        self.count = 0
+        self.next = 0  # Position after the last read (sequential access)
+        try:
+            self.end = device.ioctl(4, 0)  # Sectors on the card
+        except Exception:
+            self.end = None
+
+    def readinto(self, buf):
+        mv = memoryview(buf)
+        want = len(buf)
+        done = 0
+        ahead = self.pos == self.next
+        while done < want:
+            num = self.start + self.pos // _SECTOR
+            offset = self.pos % _SECTOR
+            left = want - done
+            if self.first <= num < self.first + self.count:
+                # Buffered from an earlier read
+                o = (num - self.first) * _SECTOR + offset
+                n = min(self.count * _SECTOR - o, left)
+                mv[done:done + n] = self.buf_mv[o:o + n]
+            elif offset == 0 and left >= _SECTOR:
+                # Whole sectors straight into buf
+                n = left - left % _SECTOR
+                self.device.readblocks(num, mv[done:done + n])
+            else:
+                # Whole buffer when reading on, else only what this read needs
+                needed = (offset + left + _SECTOR - 1) // _SECTOR
+                self._fill(num, _BUFFER_SECTORS if ahead else min(needed, _BUFFER_SECTORS))
+                continue
+            done += n
+            self.pos += n
+        self.next = self.pos
+        return done
+
+    def _fill(self, num, count):
+        """Read count sectors from num on into the buffer in one multi-sector read."""
+        if self.end and num + count > self.end:
+            count = self.end - num
+            if count <= 0:
+                raise OSError(5)  # EIO, past the end of the card
+        mv = self.buf_mv if count == _BUFFER_SECTORS else self.buf_mv[:count * _SECTOR]
+        self.device.readblocks(num, mv)
+        self.first = num
+        self.count = count
+
+    def block(self):
+        """Card sector at the current position, or None if not sector aligned."""
+        if self.pos % _SECTOR:
+            return None
+        return self.start + self.pos // _SECTOR
+
+    def read(self, n):
+        buf = bytearray(n)
+        self.readinto(buf)
+        return bytes(buf)
+
+    def seek(self, pos, whence=0):
+        if whence == 1:
+            pos += self.pos
+        self.pos = pos
+        return pos
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def probe(device, start=0):
+    """True if a sector store starts at sector start."""
+    sector = bytearray(_SECTOR)
+    device.readblocks(start, sector)
+    return sector[0:4] == slidebundle.BUNDLE_MAGIC
+
+
+def find(device, starts=STORE_SECTORS):
+    """First sector in starts where a sector store begins, or None."""
+    for start in starts:
+        if probe(device, start):
+            return start
+    return None
+
+
+def open_store(device, start=0):
+    """Open the sector store at sector start as a slidebundle.Bundle."""
+    return slidebundle.Bundle(SectorFile(device, start))
@@ -0,0 +1,149 @@
+"""
+Slideshow bundle reader for MicroPython
+All frames in one file with a fixed binary index (see tools/make_bundle.py)
+
+Layout (little-endian):
+  Header, 16 bytes: magic b'SLB1', version u16, count u16, index offset u32,
+                    reserved u32
+  Index, 20 bytes per frame: data offset u32, data size u32, width u16,
+                    height u16, format u8, pad u8, reference frame u16,
+                    delay in ms u32
+  Frame data at the offsets given in the index (512-byte aligned)
+
+Delta frames (FMT_DELTA) only redraw what changed since their reference
+frame (the previous slide): rect count u16, then per rect x u16, y u16,
+width u16, height u16, format u8 (FMT_RAW/FMT_RLE), pad u8, size u32,
+followed by that many bytes of pixel data.
+"""
+
+from micropython import const
+import struct
+
+BUNDLE_MAGIC = b'SLB1'
+BUNDLE_VERSION = const(1)
+
+_HEADER_FORMAT = '<4sHHII'
+_HEADER_SIZE = const(16)
+_ENTRY_FORMAT = '<IIHHBxHI'
+_ENTRY_SIZE = const(20)
+_RECT_FORMAT = '<HHHHBxI'
+_RECT_SIZE = const(14)
+
+# Frame pixel formats
+FMT_RAW = const(0)  # Big-endian BGR565, width * height * 2 bytes
+FMT_RLE = const(1)  # RLE packets of BGR565 pixels (Display.stream_rle)
+FMT_DELTA = const(2)  # Changed rectangles against the reference frame
+FMT_PAL8 = const(3)  # 256-colour palette + 1 byte per pixel
+FMT_PAL4 = const(4)  # 16-colour palette + 2 pixels per byte
+
+
+class Bundle:
+    """Slideshow bundle opened once; frames are read by seeking."""
+
+    def __init__(self, filepath):
+        """Open bundle (path or open file, e.g. a sector store) and load its index."""
+        self.f = open(filepath, 'rb') if isinstance(filepath, str) else filepath
+        try:
+            header = self.f.read(_HEADER_SIZE)
+            if len(header) != _HEADER_SIZE:
+                raise ValueError("bundle header truncated")
+            magic, version, count, index_offset, _ = struct.unpack(_HEADER_FORMAT, header)
+            if magic != BUNDLE_MAGIC:
+                raise ValueError("not a slideshow bundle")
+            if version != BUNDLE_VERSION:
+                raise ValueError("unsupported bundle version")
+
+            # Index is small (20 bytes per frame), keep it in RAM
+            self.count = count
+            self.f.seek(index_offset)
+            self.index = self.f.read(count * _ENTRY_SIZE)
+            if len(self.index) != count * _ENTRY_SIZE:
+                raise ValueError("bundle index truncated")
+        except Exception:
+            self.f.close()
+            raise
+
+        self.rect = bytearray(_RECT_SIZE)
+        self.shown = -1  # Frame currently on screen (delta frames build on it)
+
+    def __len__(self):
+        return self.count
+
+    def frame(self, i):
+        """Return (offset, size, width, height, format, reference, delay_ms) of frame i."""
+        return struct.unpack_from(_ENTRY_FORMAT, self.index, i * _ENTRY_SIZE)
+
+    def seek(self, i):
+        """Seek the bundle file to frame i and return its index entry."""
+        entry = self.frame(i)
+        self.f.seek(entry[0])
+        return entry
+
+    def show(self, display, i, source=None):
+        """
+        Draw frame i; delta frames replay their reference chain if needed.
+
+        source: file to read from instead of the bundle file, e.g. one with
+        the frame read ahead (must use the same offsets)
+        """
+        # Walk back to a full frame or to what is already on screen
+        chain = None
+        j = i
+        while True:
+            entry = self.frame(j)
+            if entry[4] != FMT_DELTA or entry[5] == self.shown:
+                break
+            if chain is None:
+                chain = []
+            chain.append(j)
+            j = entry[5]
+            if j == i or len(chain) > self.count:
+                raise ValueError("bundle delta chain is broken")
+
+        f = source or self.f
+        if chain:
+            self._draw(display, j, f)
+            while chain:
+                self._draw(display, chain.pop(), f)
+        else:
+            self._draw(display, i, f)
+
+    def _draw(self, display, i, f):
+        """Draw one frame assuming its reference (if any) is on screen."""
+        self.shown = -1
+        offset, size, width, height, fmt, ref, delay_ms = self.frame(i)
+        f.seek(offset)
+        if fmt == FMT_RAW:
+            block = f.block() if hasattr(f, 'block') else None
+            if block is None:
+                display.stream_raw(f, width, height)
+            else:
+                # Sector store: card blocks straight to the display
+                display.stream_blocks(f.device, block, width, height)
+        elif fmt == FMT_RLE:
+            display.stream_rle(f, width, height)
+        elif fmt == FMT_PAL8:
+            display.stream_indexed(f, width, height, 8)
+        elif fmt == FMT_PAL4:
+            display.stream_indexed(f, width, height, 4)
+        elif fmt == FMT_DELTA:
+            rects = int.from_bytes(f.read(2), 'little')
+            pos = offset + 2
+            rect = self.rect
+            for _ in range(rects):
+                # Decoders may read ahead, so always seek to the next rect
+                f.seek(pos)
+                f.readinto(rect)
+                x, y, w, h, rect_fmt, rect_size = struct.unpack(_RECT_FORMAT, rect)
+                pos += _RECT_SIZE + rect_size
+                if rect_fmt == FMT_RLE:
+                    display.stream_rle(f, w, h, x, y)
+                else:
+                    display.stream_raw(f, w, h, x, y)
+        else:
+            raise ValueError("unsupported frame format")
+        self.shown = i
+
+    def close(self):
+        """Close bundle file."""
+        self.f.close()
@@ -0,0 +1,272 @@
+"""
+Cached directory index for MicroPython
+Sorted table of the slide files on the SD card, kept in a file on the card
+
+Reading the index replaces os.listdir + sort on every boot. It is only
+rebuilt when its signature changes: the names and sizes of the entries
+in the root, plus the change marker (CHANGE_NAME) that the converter
+tools write into every folder they fill, read in the root and in each
+top-level folder. That is one root listing per boot instead of a walk of
+the tree (FAT does not update directory mtimes, so those cannot be used).
+The rebuild streams os.ilistdir into small sorted run files and merges
+them, so heap use stays bounded however many files the card holds.
+
+Subdirectories are included, so each folder is a playlist played in path
+order. When the same image exists in several formats (photo.bmp and
+photo.rle) only the preferred one (TYPES order) is kept.
+
+Layout (little-endian):
+  Header, 32 bytes: magic b'SLI1', version u16, pad u16, signature
+                    CRC-32 u32, root entry count u32, file count per
+                    type u32 x 4 (in TYPES order)
+  Entries, sorted by path without extension, then path: type u8, pad u8,
+                    path length u16, size u32, followed by the path
+                    relative to the root (UTF-8)
+"""
+
+from micropython import const
+import binascii
+import os
+import struct
+
+INDEX_MAGIC = b'SLI1'
+INDEX_VERSION = const(3)
+INDEX_NAME = '.slideindex'
+
+# Written by the converter tools (tools/rgb565.py) into every output folder
+CHANGE_NAME = '.slidechange'
+
+_HEADER_FORMAT = '<4sHxxII4I'
+_HEADER_SIZE = const(32)
+_ENTRY_FORMAT = '<BxHI'
+_ENTRY_SIZE = const(8)
+
+# Slide file types in order of preference
+TYPES = ('rle', 'idx', 'raw', 'bmp')
+
+# Names sorted in RAM at a time, and run files merged at once, while rebuilding
+RUN_SIZE = const(128)
+MERGE_WAYS = const(6)
+
+_DIR_TYPE = const(0x4000)
+
+
+def file_type(name):
+    """Return the TYPES index of a slide file name, or -1."""
+    dot = name.rfind('.')
+    if dot < 0:
+        return -1
+    ext = name[dot + 1:].lower()
+    for i in range(len(TYPES)):
+        if TYPES[i] == ext:
+            return i
+    return -1
+
+
+def _walk(path):
+    """Yield (relative path, ilistdir item) for everything under path (streamed)."""
+    # Only directories still to visit are kept in RAM
+    pending = ['']
+    while pending:
+        folder = pending.pop()
+        prefix = folder + '/' if folder else ''
+        for item in os.ilistdir(path + '/' + folder if folder else path):
+            # Skip hidden files (our own index and runs, macOS '._' files)
+            if item[0][0] == '.':
+                continue
+            if item[1] == _DIR_TYPE:
+                pending.append(prefix + item[0])
+            yield prefix + item[0], item
+
+
+def _entries(path):
+    """Yield (relative path, type, size) of the slide files under path."""
+    for name, item in _walk(path):
+        if item[1] == _DIR_TYPE:
+            continue
+        kind = file_type(name)
+        if kind < 0:
+            continue
+        size = item[3] if len(item) > 3 else os.stat(path + '/' + name)[6]
+        yield name, kind, size
+
+
+def _marker(folder, crc):
+    """Fold the change marker of folder, if there is one, into crc."""
+    try:
+        with open(folder + '/' + CHANGE_NAME, 'rb') as f:
+            return binascii.crc32(f.read(64), crc)
+    except OSError:
+        return crc
+
+
+def signature(path):
+    """Return (CRC-32, entry count) of the root entries and change markers of path."""
+    crc = _marker(path, 0)
+    count = 0
+    for item in os.ilistdir(path):
+        name = item[0]
+        # Hidden files (our own index and runs) do not count
+        if name[0] == '.':
+            continue
+        count += 1
+        if item[1] == _DIR_TYPE:
+            crc = binascii.crc32(('%s/\n' % name).encode(), crc)
+            crc = _marker(path + '/' + name, crc)
+        else:
+            size = item[3] if len(item) > 3 else os.stat(path + '/' + name)[6]
+            crc = binascii.crc32(('%s %d\n' % (name, size)).encode(), crc)
+    return crc, count
+
+
+def _stem(name):
+    return name.rsplit('.', 1)[0]
+
+
+def _key(entry):
+    """Sort key: formats of one image (photo.bmp, photo.raw) end up adjacent."""
+    return _stem(entry[0]), entry[0]
+
+
+def _write_entry(f, name, kind, size):
+    data = name.encode()
+    f.write(struct.pack(_ENTRY_FORMAT, kind, len(data), size))
+    f.write(data)
+
+
+def _read_entry(f, head):
+    """Read the next entry into head; return (name, type, size) or None."""
+    if f.readinto(head) != _ENTRY_SIZE:
+        return None
+    kind, length, size = struct.unpack(_ENTRY_FORMAT, head)
+    return f.read(length).decode(), kind, size
+
+
+def _write_run(path, number, entries):
+    entries.sort(key=_key)
+    run = '%s/.slrun%d' % (path, number)
+    with open(run, 'wb') as f:
+        for name, kind, size in entries:
+            _write_entry(f, name, kind, size)
+    return run
+
+
+def _merge(runs, output, header=None):
+    """
+    Merge sorted run files into output (after header); return type counts.
+
+    With a header (the final pass) only the preferred format of each image
+    is written.
+    """
+    counts = [0] * len(TYPES)
+    files = [open(run, 'rb') for run in runs]
+    try:
+        heads = [bytearray(_ENTRY_SIZE) for _ in files]
+        current = [_read_entry(f, heads[i]) for i, f in enumerate(files)]
+        keys = [entry and _key(entry) for entry in current]
+        with open(output, 'wb') as out:
+            if header:
+                out.write(header)
+            held = None  # Last entry, written once its stem is complete
+            while True:
+                best = -1
+                for i in range(len(current)):
+                    if current[i] and (best < 0 or keys[i] < keys[best]):
+                        best = i
+                if best < 0:
+                    break
+                entry = current[best]
+                current[best] = _read_entry(files[best], heads[best])
+                keys[best] = current[best] and _key(current[best])
+                if header and held and _stem(held[0]) == _stem(entry[0]):
+                    # Same image in another format, keep the preferred one
+                    if entry[1] < held[1]:
+                        held = entry
+                    continue
+                if held:
+                    _write_entry(out, *held)
+                    counts[held[1]] += 1
+                held = entry
+            if held:
+                _write_entry(out, *held)
+                counts[held[1]] += 1
+    finally:
+        for f in files:
+            f.close()
+        for run in runs:
+            os.remove(run)
+    return counts
+
+
+def build(path):
+    """Scan path and write its index file; returns the SlideIndex."""
+    # Sorted runs of RUN_SIZE names
+    runs = []
+    batch = []
+    for entry in _entries(path):
+        batch.append(entry)
+        if len(batch) >= RUN_SIZE:
+            runs.append(_write_run(path, len(runs), batch))
+            batch = []
+    runs.append(_write_run(path, len(runs), batch))
+    batch = None
+
+    # Merge MERGE_WAYS runs at a time until one pass can finish
+    number = len(runs)
+    while len(runs) > MERGE_WAYS:
+        merged = []
+        for i in range(0, len(runs), MERGE_WAYS):
+            run = '%s/.slrun%d' % (path, number)
+            number += 1
+            _merge(runs[i:i + MERGE_WAYS], run)
+            merged.append(run)
+        runs = merged
+
+    index_path = path + '/' + INDEX_NAME
+    header = bytearray(_HEADER_SIZE)
+    counts = _merge(runs, index_path, header)
+
+    crc, entries = signature(path)
+    with open(index_path, 'r+b') as f:
+        f.write(struct.pack(_HEADER_FORMAT, INDEX_MAGIC, INDEX_VERSION, crc, entries, *counts))
+    return SlideIndex(index_path, counts)
+
+
+def load(path='/sd'):
+    """Open the index of path, rebuilding it if missing or out of date."""
+    index_path = path + '/' + INDEX_NAME
+    try:
+        with open(index_path, 'rb') as f:
+            header = f.read(_HEADER_SIZE)
+        if len(header) == _HEADER_SIZE:
+            fields = struct.unpack(_HEADER_FORMAT, header)
+            if fields[0] == INDEX_MAGIC and fields[1] == INDEX_VERSION and \
+                    (fields[2], fields[3]) == signature(path):
+                return SlideIndex(index_path, list(fields[4:]))
+    except OSError:
+        pass
+    print("Building slide index...")
+    return build(path)
+
+
+class SlideIndex:
+    """Sorted slide file table read from the index file (iterated, never loaded)."""
+
+    def __init__(self, index_path, counts):
+        self.index_path = index_path
+        self.counts = counts
+        self.count = sum(counts)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield (path, type name, size) in path order, reading the file as it goes."""
+        head = bytearray(_ENTRY_SIZE)
+        with open(self.index_path, 'rb') as f:
+            f.seek(_HEADER_SIZE)
+            while True:
+                entry = _read_entry(f, head)
+                if entry is None:
+                    break
+                yield entry[0], TYPES[entry[1]], entry[2]
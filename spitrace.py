@@ -0,0 +1,187 @@
+"""
+SPI transaction tracer for MicroPython
+Opt-in wrappers that record what the drivers do on the bus
+
+Tracer.attach(device, name) swaps device.spi and its dc/cs pins
+(ili9341.Display, sdcard.SDCard) for traced stand-ins. Every SPI call
+and pin write is counted under the current operation (begin(name)) with
+its bytes, time in ticks_us and the heap allocated since the previous
+traced call - e.g. the bytearray that write_cmd builds before its
+spi.write is charged to that write. report() prints operations ranked
+by time, and within each the calls ranked by time.
+
+Tracing adds a few microseconds per call; compare operations with each
+other rather than against untraced timings. On a PC (tools/host_machine)
+gc.mem_alloc() follows tracemalloc, and CPython frees objects at once,
+so allocation counts are a lower bound there, and the heap shrinking
+is not counted as a garbage collection.
+"""
+
+import gc
+import sys
+import time
+
+# CPython frees at once, so a shrinking heap there is not a collection
+_COUNT_COLLECTIONS = sys.implementation.name == 'micropython'
+
+
+class TracedSPI:
+    """SPI wrapper that records every transfer with its Tracer."""
+
+    def __init__(self, spi, tracer, name):
+        self.spi = spi
+        self.tracer = tracer
+        # Keys built once, recording must not allocate
+        self.k_write = name + '.write'
+        self.k_read = name + '.read'
+        self.k_readinto = name + '.readinto'
+        self.k_write_readinto = name + '.write_readinto'
+
+    def write(self, buf):
+        alloc = self.tracer.allocated()
+        start = time.ticks_us()
+        self.spi.write(buf)
+        self.tracer.record(self.k_write, len(buf), time.ticks_diff(time.ticks_us(), start), alloc)
+
+    def read(self, nbytes, write=0x00):
+        alloc = self.tracer.allocated()
+        start = time.ticks_us()
+        data = self.spi.read(nbytes, write)
+        self.tracer.record(self.k_read, nbytes, time.ticks_diff(time.ticks_us(), start), alloc)
+        return data
+
+    def readinto(self, buf, write=0x00):
+        alloc = self.tracer.allocated()
+        start = time.ticks_us()
+        self.spi.readinto(buf, write)
+        self.tracer.record(self.k_readinto, len(buf), time.ticks_diff(time.ticks_us(), start), alloc)
+
+    def write_readinto(self, write_buf, read_buf):
+        alloc = self.tracer.allocated()
+        start = time.ticks_us()
+        self.spi.write_readinto(write_buf, read_buf)
+        self.tracer.record(self.k_write_readinto, len(write_buf),
+                           time.ticks_diff(time.ticks_us(), start), alloc)
+
+    def __getattr__(self, name):
+        # init, deinit, ... go to the real SPI
+        return getattr(self.spi, name)
+
+
+class TracedPin:
+    """Pin wrapper that records every write (reads are not counted)."""
+
+    def __init__(self, pin, tracer, name):
+        self.pin = pin
+        self.tracer = tracer
+        self.key = name
+
+    def value(self, v=None):
+        if v is None:
+            return self.pin.value()
+        alloc = self.tracer.allocated()
+        start = time.ticks_us()
+        self.pin.value(v)
+        self.tracer.record(self.key, 0, time.ticks_diff(time.ticks_us(), start), alloc)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def __getattr__(self, name):
+        # init, OUT, ... go to the real pin
+        return getattr(self.pin, name)
+
+
+class Tracer:
+    """Per-operation counters of traced SPI and pin calls."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget all counters and start in operation 'other'."""
+        self.ops = {}  # Operation -> {call key: [calls, bytes, us, min, max, alloc]}
+        self.op_us = {}  # Operation -> total time inside it
+        self.op_runs = {}  # Operation -> times begun
+        self.collections = 0
+        self.op = None
+        self.begin('other')
+
+    def attach(self, device, name):
+        """Trace device.spi and device.dc/cs (when present) under name."""
+        device.spi = TracedSPI(device.spi, self, name)
+        for pin in ('dc', 'cs'):
+            if hasattr(device, pin):
+                setattr(device, pin, TracedPin(getattr(device, pin), self, name + '.' + pin))
+        # The wrappers are not charged to the first traced call
+        self.last_alloc = gc.mem_alloc()
+
+    def begin(self, name):
+        """Charge the following calls to operation name (until the next begin)."""
+        now = time.ticks_us()
+        if self.op is not None:
+            self.op_us[self.op] += time.ticks_diff(now, self.op_start)
+        if name not in self.ops:
+            self.ops[name] = {}
+            self.op_us[name] = 0
+            self.op_runs[name] = 0
+        self.op = name
+        self.stats = self.ops[name]
+        self.op_runs[name] += 1
+        # Heap allocated before the operation began is not charged to it
+        self.last_alloc = gc.mem_alloc()
+        self.op_start = time.ticks_us()
+
+    def allocated(self):
+        """Heap allocated since the last recorded call (0 if a collection ran)."""
+        used = gc.mem_alloc() - self.last_alloc
+        if used < 0:
+            if _COUNT_COLLECTIONS:
+                self.collections += 1
+            return 0
+        return used
+
+    def record(self, key, nbytes, us, alloc):
+        s = self.stats.get(key)
+        if s is None:
+            s = self.stats[key] = [0, 0, 0, nbytes, nbytes, 0]
+        s[0] += 1
+        s[1] += nbytes
+        s[2] += us
+        if nbytes < s[3]:
+            s[3] = nbytes
+        if nbytes > s[4]:
+            s[4] = nbytes
+        s[5] += alloc
+        # Bookkeeping above is not charged to the next call
+        self.last_alloc = gc.mem_alloc()
+
+    def report(self, reset=True):
+        """Print operations ranked by time, each with its calls ranked by time."""
+        current = self.op
+        self.begin(current)
+        self.op_runs[current] -= 1
+        print("SPI trace (slowest operations first):")
+        for op in sorted(self.ops, key=lambda o: -self.op_us[o]):
+            calls = self.ops[op]
+            if not calls:
+                continue
+            total = [0, 0, 0, 0]
+            for s in calls.values():
+                total[0] += s[0]
+                total[1] += s[1]
+                total[2] += s[2]
+                total[3] += s[5]
+            print(f"  {op}: {self.op_runs[op]} runs, {self.op_us[op] / 1000:.1f} ms, {total[0]} calls,"
+                  f" {total[1]} bytes, {total[2] / 1000:.1f} ms in calls, {total[3]} B allocated")
+            for key in sorted(calls, key=lambda k: -calls[k][2]):
+                s = calls[key]
+                size = f"{s[1]} B ({s[3]}-{s[4]}, avg {s[1] // s[0]})" if s[4] else "-"
+                print(f"    {key:<20} {s[0]:6d} calls  {size:<28} {s[2] / 1000:8.2f} ms"
+                      f"  {s[2] / s[0]:6.1f} us/call  {s[5]} B alloc")
+        if self.collections:
+            print(f"  (heap shrank {self.collections} times - garbage collection - allocations"
+                  f" across those are not counted)")
+        if reset:
+            self.reset()
+            self.begin(current)
@@ -4,11 +4,44 @@ Displays BMP images from SD card in a loop
 Each image shows for 2 seconds
 """
 
+import gc
 import machine
 import os
 import time
 from machine import Pin, SPI
 
+from framescheduler import FrameScheduler  # Slide timeline (framescheduler.py)
+
+try:
+    import readahead  # Next slide read into RAM (readahead.py)
+except ImportError:
+    readahead = None
+
+try:
+    import rawcache  # RAW copies of BMP slides (rawcache.py)
+except ImportError:
+    rawcache = None
+
+try:
+    import slideindex  # Cached sorted file list (slideindex.py)
+except ImportError:
+    slideindex = None
+
+try:
+    import flashcache  # Hot slides in internal flash (flashcache.py)
+except ImportError:
+    flashcache = None
+
+try:
+    import sectorstore  # Slides in raw SD sectors (sectorstore.py)
+except ImportError:
+    sectorstore = None
+
+try:
+    import spitrace  # SPI/pin call tracing (spitrace.py)
+except ImportError:
+    spitrace = None
+
 # Display pins
 TFT_MOSI = 13
 TFT_MISO = 12
@@ -24,6 +57,39 @@ SD_SCLK = 18
 SD_MOSI = 23
 SD_MISO = 19
 
+# Single-file slideshow bundle (built with tools/make_bundle.py)
+BUNDLE_FILE = '/sd/slides.bdl'
+
+# Images listed at startup (large cards are not listed in full)
+LIST_MAX = 20
+
+def open_slide(filepath, file_type, raw_cache=None, flash_cache=None):
+    """
+    Return (source, type, origin) to draw a slide.
+    
+    Uses the flash copy if there is one, else the cached RAW copy of a BMP
+    if valid, else the SD file. origin is (SD file, offset) of the bytes
+    drawn from the SD card, or None when they come from flash.
+    """
+    if flash_cache:
+        cached = flash_cache.open(filepath)
+        if cached:
+            return cached[0], cached[1], None
+    source, kind, origin = filepath, file_type, (filepath, 0)
+    if raw_cache and file_type == 'bmp':
+        f = raw_cache.open(filepath)
+        if f:
+            source, kind, origin = f, 'raw', (raw_cache.cache_path(filepath), rawcache.RAW_CACHE_HEADER)
+    if flash_cache:
+        # Time SD reads too, to compare with flash
+        try:
+            if isinstance(source, str):
+                source = open(source, 'rb')
+            source = flashcache.TimedFile(source, flash_cache.sd)
+        except OSError:
+            pass  # Shown as a failed slide
+    return source, kind, origin
+
 def init_backlight():
     """Turn on display backlight."""
     backlight = Pin(TFT_BL, Pin.OUT)
@@ -32,7 +98,7 @@ def init_backlight():
     return backlight
 
 def mount_sd_card():
-    """Mount SD card."""
+    """Mount SD card; returns the SDCard (None on error)."""
     print("Mounting SD card...")
     try:
         # Initialize SPI for SD card (SPI bus 2)
@@ -42,23 +108,90 @@ def mount_sd_card():
         # Mount SD card
         import sdcard
         sd = sdcard.SDCard(spi, cs)
-        os.mount(sd, '/sd')
+        try:
+            os.mount(sd, '/sd')
+        except OSError:
+            # No filesystem: a kiosk card may hold a sector store instead
+            if sectorstore and sectorstore.find(sd) is not None:
+                print("✓ SD card opened (sector store, no filesystem)")
+                return sd
+            raise
         
         print("✓ SD card mounted")
-        return True
+        return sd
     except Exception as e:
         print(f"✗ SD card error: {e}")
-        return False
+        return None
+
+def set_sd_speed(sd, speed):
+    """Set the SD clock from config: MHz, or 'auto' to find the fastest stable rate."""
+    if not speed:
+        return
+    try:
+        if speed == 'auto':
+            print("Negotiating SD clock...")
+            rate = sd.negotiate()
+        else:
+            rate = int(float(speed) * 1000000)
+            sd.set_baudrate(rate)
+        print(f"✓ SD clock: {rate / 1000000} MHz")
+    except Exception as e:
+        print(f"✗ SD clock error: {e}")
+
+def set_sd_cache(sd, size_kb):
+    """Enable the SD sector cache (size in KB) with sequential read-ahead."""
+    if not size_kb:
+        return
+    try:
+        sd.set_cache(int(size_kb * 1024))
+        print(f"✓ SD cache: {sd.cache_blocks} sectors, read-ahead {sd.readahead}")
+    except MemoryError:
+        print("  No memory for SD cache")
+
+def report_sd_cache(sd):
+    """Print SD sector cache hit rate."""
+    if sd and sd.cache_blocks:
+        hits, misses, rate, ahead = sd.cache_stats()
+        print(f"SD cache: {hits} hits, {misses} misses ({rate}%), {ahead} sectors read ahead")
+
+def start_trace(config, display, sd=None):
+    """Trace display and SD SPI calls if config asks for it; return the Tracer or None."""
+    if not (config and config.get('trace')):
+        return None
+    if not spitrace:
+        print("  spitrace.py not found, trace off")
+        return None
+    tracer = spitrace.Tracer()
+    tracer.attach(display, 'tft')
+    if sd:
+        tracer.attach(sd, 'sd')
+    print("✓ SPI trace on (summary after each pass)")
+    return tracer
+
+# config.txt options and their defaults; every other key is an image
+# delay. tools/make_bundle.py reads this literal to skip the same keys.
+CONFIG_OPTIONS = {
+    'pipeline': False,  # Read SD in a second thread while drawing
+    'prefetch': None,  # Prefetch buffer in KB (None = auto, 0 = off)
+    'late': 'delay',  # Late slides: 'delay' (shift timeline) or 'drop'
+    'rawcache': False,  # Keep RAW copies of BMPs in /sd/.rawcache
+    'flashcache': False,  # Keep hot slides in internal flash (/cache)
+    'sd_speed': None,  # SD clock in MHz, or 'auto' (None = driver default)
+    'sd_cache': 0,  # SD sector cache in KB (0 = off)
+    'sector_store': None,  # First sector of a sector store (None = search)
+    'trace': False  # Print SPI call summaries per pass (spitrace.py)
+}
 
-def read_config():
+def read_config(path='/sd/config.txt'):
     """Read configuration from config.txt on SD card."""
     config = {
         'delay': 2,  # Default delay in seconds
         'per_image': {}  # Per-image delays
     }
+    config.update(CONFIG_OPTIONS)
     
     try:
-        with open('/sd/config.txt', 'r') as f:
+        with open(path, 'r') as f:
             for line in f:
                 line = line.strip()
                 if not line or line.startswith('#'):
@@ -76,6 +209,45 @@ def read_config():
                             print(f"Config: default delay = {config['delay']} seconds")
                         except ValueError:
                             print(f"Invalid delay value: {value}, using default")
+                    elif key.lower() == 'pipeline':
+                        config['pipeline'] = value.lower() in ('1', 'on', 'yes', 'true')
+                        print(f"Config: pipeline = {config['pipeline']}")
+                    elif key.lower() == 'prefetch':
+                        try:
+                            config['prefetch'] = float(value)
+                            print(f"Config: prefetch = {config['prefetch']} KB")
+                        except ValueError:
+                            print(f"Invalid prefetch value: {value}")
+                    elif key.lower() == 'late':
+                        if value.lower() in ('delay', 'drop'):
+                            config['late'] = value.lower()
+                            print(f"Config: late = {config['late']}")
+                        else:
+                            print(f"Invalid late value: {value}, use delay or drop")
+                    elif key.lower() == 'rawcache':
+                        config['rawcache'] = value.lower() in ('1', 'on', 'yes', 'true')
+                        print(f"Config: rawcache = {config['rawcache']}")
+                    elif key.lower() == 'flashcache':
+                        config['flashcache'] = value.lower() in ('1', 'on', 'yes', 'true')
+                        print(f"Config: flashcache = {config['flashcache']}")
+                    elif key.lower() == 'sd_speed':
+                        config['sd_speed'] = value.lower()
+                        print(f"Config: sd_speed = {config['sd_speed']}")
+                    elif key.lower() == 'sd_cache':
+                        try:
+                            config['sd_cache'] = float(value)
+                            print(f"Config: sd_cache = {config['sd_cache']} KB")
+                        except ValueError:
+                            print(f"Invalid sd_cache value: {value}")
+                    elif key.lower() == 'sector_store':
+                        try:
+                            config['sector_store'] = int(value)
+                            print(f"Config: sector_store = {config['sector_store']}")
+                        except ValueError:
+                            print(f"Invalid sector_store value: {value}")
+                    elif key.lower() == 'trace':
+                        config['trace'] = value.lower() in ('1', 'on', 'yes', 'true')
+                        print(f"Config: trace = {config['trace']}")
                     else:
                         # Per-image delay (filename=delay)
                         try:
@@ -93,16 +265,51 @@ def read_config():
     
     return config
 
+def get_indexed_files():
+    """Get the playlist from the cached index (all folders, mixed formats)."""
+    start = time.ticks_ms()
+    index = slideindex.load('/sd')
+    types = ', '.join(f"{index.counts[k]} {slideindex.TYPES[k].upper()}"
+                      for k in range(len(slideindex.TYPES)) if index.counts[k])
+    print(f"Using {len(index)} files from index ({types}, {time.ticks_diff(time.ticks_ms(), start)} ms)")
+    return index
+
 def get_image_files():
-    """Get list of image files from SD card (RAW or BMP)."""
+    """
+    Get the playlist: (path, file type, size) entries under /sd.
+    
+    With slideindex.py this is the index itself, read lazily from the card
+    (subfolders included, each file shown in its own format). Without it
+    only the root is listed and one format is used for the whole run.
+    """
+    if slideindex:
+        try:
+            return get_indexed_files()
+        except Exception as e:
+            print(f"Slide index unavailable ({e}), scanning directory")
+    files, file_type = list_image_files()
+    return [(f, file_type, 0) for f in files]
+
+def list_image_files():
+    """Get list of image files from SD card root (RLE, indexed, RAW or BMP)."""
     try:
         files = os.listdir('/sd')
-        # Filter for RAW files first (faster), then BMP
+        # Filter for RLE files first (least SD traffic), then indexed, RAW, BMP
+        rle_files = [f for f in files if f.lower().endswith('.rle')]
+        idx_files = [f for f in files if f.lower().endswith('.idx')]
         raw_files = [f for f in files if f.lower().endswith('.raw')]
         bmp_files = [f for f in files if f.lower().endswith('.bmp')]
         
-        # Prefer RAW files if available
-        if raw_files:
+        # Prefer compressed, then RAW files if available
+        if rle_files:
+            print(f"Using {len(rle_files)} RLE files (compressed mode)")
+            rle_files.sort()
+            return rle_files, 'rle'
+        elif idx_files:
+            print(f"Using {len(idx_files)} indexed files (palette mode)")
+            idx_files.sort()
+            return idx_files, 'idx'
+        elif raw_files:
             print(f"Using {len(raw_files)} RAW files (fast mode)")
             raw_files.sort()
             return raw_files, 'raw'
@@ -114,7 +321,50 @@ def get_image_files():
         print(f"Error reading files: {e}")
         return [], 'bmp'
 
-def init_display():
+def open_bundle():
+    """Open slideshow bundle from SD card if present."""
+    try:
+        import slidebundle
+    except ImportError:
+        return None
+    
+    try:
+        bundle = slidebundle.Bundle(BUNDLE_FILE)
+    except OSError:
+        return None
+    except Exception as e:
+        print(f"Error reading bundle: {e}")
+        return None
+    
+    print(f"Using bundle with {len(bundle)} frames (single file)")
+    return bundle
+
+def open_sector_store(sd, start=None):
+    """
+    Open the raw-sector slide store on the SD card if present.
+    
+    Looks at sector start (config sector_store=N), or else at the
+    sectors make_sector_store.py uses by default (sectorstore.STORE_SECTORS).
+    """
+    if not sectorstore:
+        return None
+    
+    try:
+        if start is None:
+            start = sectorstore.find(sd)
+        elif not sectorstore.probe(sd, start):
+            start = None
+        if start is None:
+            return None
+        store = sectorstore.open_store(sd, start)
+    except Exception as e:
+        print(f"Error reading sector store: {e}")
+        return None
+    
+    print(f"Using sector store with {len(store)} frames (sector {start}, no filesystem)")
+    return store
+
+def init_display(config=None):
     """Initialize ILI9341 display."""
     print("Initializing display...")
     try:
@@ -128,6 +378,13 @@ def init_display():
         display = Display(spi, dc=Pin(TFT_DC), cs=Pin(TFT_CS), rst=None)
         
         print("✓ Display initialized")
+        
+        # Optional threaded SD -> SPI pipeline for RAW frames
+        if config and config.get('pipeline'):
+            if display.set_pipeline(True):
+                print("✓ SD/SPI pipeline enabled")
+            else:
+                print("  Pipeline unavailable (no _thread), using sequential reads")
         return display
     except ImportError:
         print("✗ Display driver not found")
@@ -137,39 +394,94 @@ def init_display():
         print(f"✗ Display error: {e}")
         return None
 
-def display_image(display, filepath, file_type='bmp'):
-    """Display an image on screen."""
+def display_image(display, filepath, file_type='bmp', source=None, raw_cache=None):
+    """
+    Display an image on screen.
+    
+    source: open file to draw instead of filepath (a PrefetchFile or a
+    cached RAW copy); raw_cache: RawCache that BMPs are copied into
+    """
     try:
+        if source is None:
+            source = filepath
         if file_type == 'raw':
             # RAW files are much faster (no conversion needed)
-            success = display.show_raw(filepath, 240, 320)
+            success = display.show_raw(source, 240, 320)
+        elif file_type == 'rle':
+            # RLE files: fewer bytes over the slow SD bus
+            success = display.show_rle(source)
+        elif file_type == 'idx':
+            # Indexed files: 1 or 1/2 byte per pixel, expanded via palette
+            success = display.show_indexed(source)
+        elif raw_cache:
+            # BMP converted once, later passes use the RAW copy
+            success = raw_cache.show_bmp(display, filepath, source)
         else:
             # BMP files need conversion
-            success = display.show_bmp(filepath)
+            success = display.show_bmp(source)
         
-        if success:
+        if success and file_type == 'raw':
+            # Per-frame stats: bytes read, time, GC collections during the frame
+            stats = display.raw_stats
+            print(f"    ✓ Displayed ({stats['bytes']} bytes, {stats['ms']} ms, {stats['gc']} GC)")
+        elif success:
             print(f"    ✓ Displayed")
         else:
             print(f"    ✗ Failed to display")
+        
+        if readahead and isinstance(source, readahead.PrefetchFile):
+            source.report()
+        return success
     except Exception as e:
         print(f"    ✗ Error: {e}")
+        return False
 
-def slideshow_simple(image_files):
+def display_bundle_frame(display, bundle, index, prefetch=None):
+    """Display one frame of an open bundle (seek, no open/close)."""
+    try:
+        # Full, RLE or delta frame (only changed rectangles are redrawn)
+        bundle.show(display, index, prefetch)
+        print(f"    ✓ Displayed")
+        if prefetch:
+            prefetch.report()
+        return True
+    except Exception as e:
+        print(f"    ✗ Error: {e}")
+        return False
+
+def playlist_loop(playlist):
+    """Yield (position, entry) over the playlist forever, one pass at a time."""
+    while True:
+        position = -1
+        for position, entry in enumerate(playlist):
+            yield position, entry
+        if position < 0:
+            return
+
+def image_delay(config, image_file):
+    """Delay for an image: by path, then by file name, else the default."""
+    per_image = config['per_image']
+    delay = per_image.get(image_file)
+    if delay is None:
+        delay = per_image.get(image_file[image_file.rfind('/') + 1:], config['delay'])
+    return delay
+
+def report_heap(count):
+    """Print heap use (stays flat however many slides the playlist has)."""
+    gc.collect()
+    print(f"Heap: {gc.mem_alloc()} bytes used, {gc.mem_free()} free, {count} slides")
+
+def slideshow_simple(playlist):
     """Simple slideshow without display driver (just prints info)."""
     print("\n" + "=" * 60)
     print(" SLIDESHOW MODE (Simple)")
     print("=" * 60)
-    print(f"Found {len(image_files)} images")
+    print(f"Found {len(playlist)} images")
     print("Press Ctrl+C to stop\n")
     
-    image_index = 0
-    
     try:
-        while True:
-            # Get current image
-            image_file = image_files[image_index]
-            
-            print(f"[{image_index + 1}/{len(image_files)}] Displaying: {image_file}")
+        for image_index, (image_file, file_type, size) in playlist_loop(playlist):
+            print(f"[{image_index + 1}/{len(playlist)}] Displaying: {image_file}")
             
             # In full version, this would display the image
             # For now, just show the filename
@@ -177,53 +489,184 @@ def slideshow_simple(image_files):
             # Wait 2 seconds
             time.sleep(2)
             
-            # Move to next image
-            image_index = (image_index + 1) % len(image_files)
-            
     except KeyboardInterrupt:
         print("\n\nSlideshow stopped")
 
-def slideshow_with_display(display, image_files, file_type='bmp', config=None):
-    """Full slideshow with display driver."""
+def prefetch_file(prefetch, source):
+    """Open the next image (path or open file) and read ahead into the prefetch buffer."""
+    try:
+        f = open(source, 'rb') if isinstance(source, str) else source
+        prefetch.load(f, f.tell())
+        return prefetch
+    except OSError:
+        return source
+
+def print_timing(render_ms, late_ms):
+    """Print render time and lateness of one slide."""
+    if late_ms > 0:
+        print(f"    Render {render_ms} ms, {late_ms} ms late")
+    else:
+        print(f"    Render {render_ms} ms, on time")
+
+def slideshow_with_display(display, playlist, config=None, sd=None):
+    """Full slideshow with display driver (playlist of (path, type, size))."""
     if config is None:
         config = {'delay': 2, 'per_image': {}}
     
+    # Dwell time is used to read the next image ahead
+    prefetch = readahead.alloc_prefetch(config.get('prefetch')) if readahead else None
+    scheduler = FrameScheduler(config.get('late', 'delay'))
+    raw_cache = None
+    if config.get('rawcache') and rawcache:
+        raw_cache = rawcache.RawCache()
+    flash_cache = None
+    if config.get('flashcache') and flashcache:
+        flash_cache = flashcache.FlashCache()
+        print(f"✓ Flash cache: {len(flash_cache.entries)} slides, {flash_cache.free() // 1024} KB free")
+    tracer = start_trace(config, display, sd)
+    
     default_delay = config['delay']
     per_image_delays = config['per_image']
     
+    count = len(playlist)
+    
     print("\n" + "=" * 60)
-    print(f" SLIDESHOW MODE ({'Fast' if file_type == 'raw' else 'Normal'})")
+    print(" SLIDESHOW MODE")
     print("=" * 60)
-    print(f"Found {len(image_files)} images")
+    print(f"Found {count} images")
     print(f"Default delay: {default_delay} seconds")
     if per_image_delays:
         print(f"Custom delays: {len(per_image_delays)} images")
     print("Press Ctrl+C to stop\n")
     
-    image_index = 0
+    # Entries are read lazily from the playlist, one ahead for prefetch
+    entries = playlist_loop(playlist)
+    upcoming = next(entries)
+    source, kind, origin = open_slide('/sd/' + upcoming[1][0], upcoming[1][1], raw_cache, flash_cache)
+    report_heap(count)
     
     try:
         while True:
             # Get current image
-            image_file = image_files[image_index]
+            image_index, (image_file, file_type, size) = upcoming
             filepath = '/sd/' + image_file
             
             # Get delay for this specific image (or use default)
-            delay = per_image_delays.get(image_file, default_delay)
+            delay = image_delay(config, image_file)
             
-            print(f"[{image_index + 1}/{len(image_files)}] {image_file} ({delay}s)")
+            delay_ms = int(delay * 1000)
             
-            # Display the image
-            display_image(display, filepath, file_type)
+            print(f"[{image_index + 1}/{count}] {image_file} ({delay}s)")
             
-            # Wait configured delay for this image
-            time.sleep(delay)
+            # Wait for this slide's deadline (copying to flash meanwhile),
+            # or drop it if too late
+            if scheduler.wait(delay_ms, flash_cache.copy if flash_cache else None):
+                # Display the image (prefetched during the previous dwell)
+                if tracer:
+                    tracer.begin(kind)
+                success = display_image(display, filepath, kind, source, raw_cache)
+                print_timing(*scheduler.done(delay_ms))
+                
+                # Copy slides shown often to internal flash (not BMPs being
+                # cached as RAW), in the dwell time of the following slides
+                if success and flash_cache and origin and not (raw_cache and kind == 'bmp'):
+                    if flash_cache.offer(filepath, origin[0], origin[1], kind):
+                        print("    Copying to flash")
+            else:
+                print("    ✗ Dropped (late)")
+                if not isinstance(source, str):
+                    source.close()
             
             # Move to next image
-            image_index = (image_index + 1) % len(image_files)
+            upcoming = next(entries)
+            if upcoming[0] == 0:
+                scheduler.report()
+                if raw_cache:
+                    raw_cache.report()
+                if flash_cache:
+                    flash_cache.report()
+                report_sd_cache(sd)
+                if tracer:
+                    tracer.report()
+                report_heap(count)
+            
+            # Read the next image ahead during the dwell time
+            if tracer:
+                tracer.begin('read ahead')
+            source, kind, origin = open_slide('/sd/' + upcoming[1][0], upcoming[1][1], raw_cache, flash_cache)
+            if prefetch:
+                source = prefetch_file(prefetch, source)
             
     except KeyboardInterrupt:
         print("\n\nSlideshow stopped")
+        scheduler.report()
+        if raw_cache:
+            raw_cache.report()
+        if flash_cache:
+            flash_cache.report()
+        report_sd_cache(sd)
+        if tracer:
+            tracer.report()
+    finally:
+        if prefetch:
+            prefetch.close()
+
+def slideshow_bundle(display, bundle, config=None, sd=None):
+    """Slideshow from a single bundle file opened once."""
+    count = len(bundle)
+    prefetch = None
+    if readahead:
+        prefetch = readahead.alloc_prefetch(config.get('prefetch') if config else None)
+    scheduler = FrameScheduler(config.get('late', 'delay') if config else 'delay')
+    tracer = start_trace(config, display, sd)
+    
+    print("\n" + "=" * 60)
+    print(" SLIDESHOW MODE (Bundle)")
+    print("=" * 60)
+    print(f"Found {count} frames")
+    print("Press Ctrl+C to stop\n")
+    
+    index = 0
+    source = None
+    
+    try:
+        while True:
+            delay_ms = bundle.frame(index)[6]
+            
+            print(f"[{index + 1}/{count}] frame ({delay_ms / 1000}s)")
+            
+            # Wait for this frame's deadline, or drop it if too late
+            if scheduler.wait(delay_ms):
+                # Display the frame (prefetched during the previous dwell)
+                if tracer:
+                    tracer.begin('frame')
+                display_bundle_frame(display, bundle, index, source)
+                print_timing(*scheduler.done(delay_ms))
+            else:
+                print("    ✗ Dropped (late)")
+            
+            # Move to next frame
+            index = (index + 1) % count
+            if index == 0:
+                scheduler.report()
+                if tracer:
+                    tracer.report()
+            
+            # Read the next frame ahead during the dwell time
+            if tracer:
+                tracer.begin('read ahead')
+            if prefetch:
+                offset, size = bundle.frame(index)[0:2]
+                prefetch.load(bundle.f, offset, size)
+                source = prefetch
+            
+    except KeyboardInterrupt:
+        print("\n\nSlideshow stopped")
+        scheduler.report()
+        if tracer:
+            tracer.report()
+    finally:
+        bundle.close()
 
 def main():
     """Main program."""
@@ -236,36 +679,51 @@ def main():
     backlight = init_backlight()
     
     # Mount SD card
-    if not mount_sd_card():
+    sd = mount_sd_card()
+    if not sd:
         print("\nCannot continue without SD card")
         return
     
     # Read configuration
     config = read_config()
+    set_sd_speed(sd, config['sd_speed'])
+    set_sd_cache(sd, config['sd_cache'])
+    
+    # Prefer a raw-sector store, then a single-file bundle
+    # (no directory scan, no per-slide open)
+    bundle = open_sector_store(sd, config['sector_store']) or open_bundle()
+    if bundle:
+        display = init_display(config)
+        if display:
+            slideshow_bundle(display, bundle, config, sd)
+            return
+        bundle.close()
     
     # Get image files
-    image_files, file_type = get_image_files()
+    playlist = get_image_files()
     
-    if not image_files:
+    if not len(playlist):
         print("\nNo image files found on SD card")
         return
     
-    print(f"\nFound {len(image_files)} images:")
-    for i, f in enumerate(image_files, 1):
-        delay = config['per_image'].get(f, config['delay'])
-        print(f"  {i}. {f} ({delay}s)")
+    print(f"\nFound {len(playlist)} images:")
+    for i, (f, file_type, size) in enumerate(playlist, 1):
+        if i > LIST_MAX:
+            print(f"  ... and {len(playlist) - LIST_MAX} more")
+            break
+        print(f"  {i}. {f} ({image_delay(config, f)}s)")
     
     # Try to initialize display
-    display = init_display()
+    display = init_display(config)
     
     if display:
         # Full slideshow with display
-        slideshow_with_display(display, image_files, file_type, config)
+        slideshow_with_display(display, playlist, config, sd)
     else:
         # Simple slideshow (just prints filenames)
         print("\nRunning in simple mode (no display driver)")
         print("Images will be listed but not displayed")
-        slideshow_simple(image_files)
+        slideshow_simple(playlist)
 
 if __name__ == "__main__":
     main()
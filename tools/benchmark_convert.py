@@ -0,0 +1,78 @@
+"""
+Conversion Benchmark
+Compares the NumPy RGB565 pipeline against the per-pixel loop
+"""
+
+import sys
+import time
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow not installed")
+    print("Run: pip install Pillow")
+    sys.exit(1)
+
+import rgb565
+from rgb565 import image_to_rgb565, image_to_rgb565_slow
+
+
+def make_test_image(width=240, height=320, seed=1):
+    """Create a noisy RGB test image (worst case for any shortcut)."""
+    import random
+    rng = random.Random(seed)
+    data = bytes(rng.getrandbits(8) for _ in range(width * height * 3))
+    return Image.frombytes('RGB', (width, height), data)
+
+
+def time_images(func, images, bgr):
+    """Return images per second for func over images."""
+    start = time.perf_counter()
+    for img in images:
+        func(img, bgr)
+    elapsed = time.perf_counter() - start
+    return len(images) / elapsed if elapsed else float('inf')
+
+
+def run_benchmark(count=5, width=240, height=320):
+    """Run both paths, check output matches, print images per second."""
+    images = [make_test_image(width, height, seed) for seed in range(count)]
+
+    print(f"Benchmark: {count} images, {width}x{height}")
+    print("=" * 60)
+
+    if rgb565.np is None:
+        print("NumPy not installed - fast path unavailable")
+        print("Run: pip install numpy")
+        return False
+
+    # Check byte-identical output before timing anything
+    for bgr in (False, True):
+        for img in images:
+            if image_to_rgb565(img, bgr) != bytes(image_to_rgb565_slow(img, bgr)):
+                print(f"  MISMATCH (bgr={bgr}) - outputs differ")
+                return False
+    print("  Output: byte-identical (RGB565 and BGR565)")
+
+    for bgr in (False, True):
+        label = 'BGR565' if bgr else 'RGB565'
+        slow = time_images(image_to_rgb565_slow, images, bgr)
+        fast = time_images(image_to_rgb565, images, bgr)
+        print(f"  {label} per-pixel: {slow:10.1f} images/s")
+        print(f"  {label} NumPy:     {fast:10.1f} images/s  ({fast / slow:.0f}x)")
+
+    return True
+
+
+def main():
+    """Main function."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 240
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 320
+
+    if not run_benchmark(count, width, height):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
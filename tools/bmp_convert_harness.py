@@ -0,0 +1,230 @@
+"""
+BMP Conversion Harness
+Checks the viper (ili9341_viper.py) and pure-Python BMP row converters
+and palette expanders of ili9341.py on a PC
+
+Runs the driver against the stand-in machine module (host_machine.py):
+  - viper and Python converters give identical bytes for random rows
+    (24bpp BGR888, 16bpp BGR565 byte swap, 16bpp RGB565), and for
+    8bpp and 4bpp palette indices
+  - show_bmp output matches the host converter (tools/rgb565.py) for
+    bottom-up, top-down and 16bpp bitfield BMPs
+  - the fallback is selected when the viper emitter is missing, when
+    ili9341_viper.py fails to compile (as on firmware without the
+    emitter) and when it is not installed
+  - rows per second for each path
+
+Host timings only compare the two code paths; on the ESP32 the viper
+path is compiled to machine code (run examples/bmp_convert_bench.py there).
+"""
+
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+import host_machine
+
+
+# (name, bytes per source pixel) of each converter pair in ili9341.py
+CONVERTERS = (('bgr888_to_bgr565', 3), ('swap16', 2), ('rgb565le_to_bgr565', 2))
+
+# (name, pixels per index byte) of each palette expander pair
+EXPANDERS = (('expand8', 1), ('expand4', 2))
+
+
+def check_rows(ili, name, bytes_per_pixel, count=200):
+    """Compare viper and Python versions of a converter on random rows."""
+    py_func = getattr(ili, f'_{name}_py')
+    viper_func = getattr(ili, f'_{name}_viper')
+    rng = random.Random(7)
+    for _ in range(count):
+        pixels = rng.randint(1, 240)
+        start = rng.randint(0, 16)
+        src = bytearray(rng.getrandbits(8) for _ in range(start + pixels * bytes_per_pixel))
+        out_py = bytearray(pixels * 2)
+        out_viper = bytearray(pixels * 2)
+        py_func(src, start, out_py, pixels)
+        viper_func(src, start, out_viper, pixels)
+        if out_py != out_viper:
+            return False
+    return True
+
+
+def check_expand(ili, name, per_byte, count=200):
+    """Compare viper and Python versions of a palette expander on random indices."""
+    py_func = getattr(ili, f'_{name}_py')
+    viper_func = getattr(ili, f'_{name}_viper')
+    rng = random.Random(11)
+    lut = bytearray(rng.getrandbits(8) for _ in range(512))
+    for _ in range(count):
+        step = rng.randint(1, 256 // per_byte)
+        start = rng.randint(0, 16)
+        src = bytearray(rng.getrandbits(8) for _ in range(start + step))
+        out_py = bytearray(step * per_byte * 2)
+        out_viper = bytearray(step * per_byte * 2)
+        py_func(src, start, step, lut, out_py)
+        viper_func(src, start, step, lut, out_viper)
+        if out_py != out_viper:
+            return False
+    return True
+
+
+def write_bmp(path, width, height, rows, bits_per_pixel, top_down=False, masks=None):
+    """Write a BMP from rows (top to bottom, already in file pixel format)."""
+    row_size = ((width * bits_per_pixel // 8 + 3) // 4) * 4
+    header_size = 40 + (12 if masks else 0)
+    data_offset = 14 + header_size
+    stored = rows if top_down else rows[::-1]
+    data = b''.join(r.ljust(row_size, b'\x00') for r in stored)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<2sIHHI', b'BM', data_offset + len(data), 0, 0, data_offset))
+        f.write(struct.pack('<IiiHHIIiiII', 40, width, -height if top_down else height, 1,
+                            bits_per_pixel, 3 if masks else 0, len(data), 2835, 2835, 0, 0))
+        if masks:
+            f.write(struct.pack('<III', *masks))
+        f.write(data)
+
+
+def check_show_bmp(ili):
+    """Display BMP variants and compare the pixels sent with rgb565.py."""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("  show_bmp check skipped (pip install Pillow)")
+        return True
+    from rgb565 import image_to_rgb565
+
+    rng = random.Random(3)
+    width, height = 240, 320
+    img = Image.frombytes('RGB', (width, height), bytes(rng.getrandbits(8) for _ in range(width * height * 3)))
+    rgb = img.tobytes()
+    expected = image_to_rgb565(img, bgr=True)
+
+    # File rows for each variant, top to bottom
+    bgr_rows = []
+    bgr565_rows = []
+    rgb565_rows = []
+    be_bgr = expected
+    be_rgb = image_to_rgb565(img)
+    for y in range(height):
+        line = rgb[y * width * 3:(y + 1) * width * 3]
+        bgr_rows.append(bytes(b for i in range(0, len(line), 3) for b in (line[i + 2], line[i + 1], line[i])))
+        a = be_bgr[y * width * 2:(y + 1) * width * 2]
+        bgr565_rows.append(bytes(b for i in range(0, len(a), 2) for b in (a[i + 1], a[i])))
+        a = be_rgb[y * width * 2:(y + 1) * width * 2]
+        rgb565_rows.append(bytes(b for i in range(0, len(a), 2) for b in (a[i + 1], a[i])))
+
+    variants = (
+        ('24bpp bottom-up', bgr_rows, 24, False, None),
+        ('24bpp top-down', bgr_rows, 24, True, None),
+        ('16bpp BGR565 bottom-up', bgr565_rows, 16, False, (0x001F, 0x07E0, 0xF800)),
+        ('16bpp RGB565 top-down', rgb565_rows, 16, True, (0xF800, 0x07E0, 0x001F)),
+    )
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        spi = host_machine.CaptureSPI()
+        display = ili.Display(spi, host_machine.Pin(), host_machine.Pin())
+        for label, rows, bits, top_down, masks in variants:
+            path = os.path.join(tmp, 'test.bmp')
+            write_bmp(path, width, height, rows, bits, top_down, masks)
+            spi.data = bytearray()
+            same = display.show_bmp(path) and bytes(spi.data[-len(expected):]) == expected
+            print(f"    {label:24s} {'yes' if same else 'NO'}")
+            ok &= same
+    return ok
+
+
+def rows_per_second(func, rows=320, width=240):
+    """Time func over rows of width pixels."""
+    src = bytearray(random.Random(1).getrandbits(8) for _ in range(width * 3 + 3))
+    dst = bytearray(width * 2)
+    start = time.perf_counter()
+    for _ in range(rows):
+        func(src, 0, dst, width)
+    elapsed = time.perf_counter() - start
+    return rows / elapsed
+
+
+def load_driver(viper_source=None):
+    """
+    Re-import ili9341.py (and ili9341_viper.py) after host_machine.install().
+
+    viper_source: text of a stand-in ili9341_viper.py to import instead
+    of the real one ('' leaves the module out entirely).
+    """
+    sys.modules.pop('ili9341_viper', None)
+    if viper_source is None:
+        return host_machine.reload_driver('ili9341')
+    with tempfile.TemporaryDirectory() as folder:
+        if viper_source:
+            # Shadows the repository copy for this import only
+            with open(os.path.join(folder, 'ili9341_viper.py'), 'w') as f:
+                f.write(viper_source)
+            sys.path.insert(0, folder)
+        else:
+            sys.modules['ili9341_viper'] = None  # Import raises ImportError
+        try:
+            return host_machine.reload_driver('ili9341')
+        finally:
+            if viper_source:
+                sys.path.remove(folder)
+            sys.modules.pop('ili9341_viper', None)
+
+
+def main():
+    """Main function."""
+    print("BMP Conversion Harness")
+    print("=" * 60)
+    ok = True
+
+    host_machine.install(viper=True)
+    ili = load_driver()
+    print(f"  Converter with viper emitter:    {ili.BMP_CONVERTER}")
+    ok &= ili.BMP_CONVERTER == 'viper'
+
+    for name, bytes_per_pixel in CONVERTERS:
+        same = check_rows(ili, name, bytes_per_pixel)
+        print(f"  Random rows identical ({name}): {'yes' if same else 'NO'}")
+        ok &= same
+
+    for name, per_byte in EXPANDERS:
+        same = check_expand(ili, name, per_byte)
+        print(f"  Random indices identical ({name}): {'yes' if same else 'NO'}")
+        ok &= same
+
+    print("  show_bmp matches rgb565.py:")
+    ok &= check_show_bmp(ili)
+
+    for name, _ in CONVERTERS:
+        py_rate = rows_per_second(getattr(ili, f'_{name}_py'))
+        viper_rate = rows_per_second(getattr(ili, f'_{name}_viper'))
+        print(f"  {name}:")
+        print(f"    Python path: {py_rate:10.0f} rows/s (host)")
+        print(f"    Viper path:  {viper_rate:10.0f} rows/s (host, interpreted)")
+
+    host_machine.install(viper=False)
+    ili = load_driver()
+    print(f"  Converter without viper emitter: {ili.BMP_CONVERTER}")
+    ok &= ili.BMP_CONVERTER == 'python'
+
+    # Firmware without the emitter rejects the module at compile time
+    ili = load_driver("@micropython.viper\ndef f(x: ptr8) -> int\n")
+    print(f"  Converter if ili9341_viper.py does not compile: {ili.BMP_CONVERTER}")
+    ok &= ili.BMP_CONVERTER == 'python'
+
+    ili = load_driver('')
+    print(f"  Converter without ili9341_viper.py: {ili.BMP_CONVERTER}")
+    ok &= ili.BMP_CONVERTER == 'python'
+
+    print("=" * 60)
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
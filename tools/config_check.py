@@ -0,0 +1,90 @@
+"""
+Config Check
+Reads one config.txt with the device parser and with make_bundle.py on a PC
+
+Runs read_config of src/slideshow.py (on the stand-in machine module,
+host_machine.py) and make_bundle.read_config on the same file:
+  - every device option key (CONFIG_OPTIONS) is read as an option, not
+    an image delay, and make_bundle skips it
+  - both parsers give the same default delay and per-image delays
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import host_machine
+from make_bundle import option_keys, read_config
+
+# A value each option accepts; other keys get '1'
+SAMPLE_VALUES = {
+    'pipeline': 'on',
+    'prefetch': '16',
+    'late': 'drop',
+    'rawcache': '1',
+    'flashcache': '1',
+    'sd_speed': 'auto',
+    'sd_cache': '8',
+    'sector_store': '64',
+    'trace': '1',
+}
+
+DELAYS = {'a.bmp': 5.0, 'album/b.raw': 2.5}
+
+
+def main():
+    """Main function."""
+    print("Config Check")
+    print("=" * 60)
+    host_machine.install()
+    src = os.path.join(host_machine.REPO_ROOT, 'src')
+    if src not in sys.path:
+        sys.path.insert(0, src)
+    slideshow = host_machine.reload_driver('slideshow')
+    ok = True
+
+    keys = option_keys()
+    same_keys = set(keys) == set(slideshow.CONFIG_OPTIONS)
+    print(f"  make_bundle reads CONFIG_OPTIONS ({len(keys)} keys): {'yes' if same_keys else 'NO'}")
+    ok &= same_keys
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'config.txt')
+        with open(path, 'w') as f:
+            f.write("# Test config\ndelay=3\n")
+            for key in keys:
+                f.write(f"{key}={SAMPLE_VALUES.get(key, '1')}\n")
+            for name, delay in DELAYS.items():
+                f.write(f"{name}={delay}\n")
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            device = slideshow.read_config(path)
+        invalid = 'Invalid' in out.getvalue()
+        print(f"  Device reads every option: {'NO' if invalid else 'yes'}")
+        ok &= not invalid
+        for key in keys:
+            if device[key] == slideshow.CONFIG_OPTIONS[key]:
+                print(f"    {key} kept its default")
+                ok = False
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            bundle = read_config(path)
+        quiet = not out.getvalue()
+        print(f"  make_bundle skips every option: {'yes' if quiet else 'NO'}")
+        ok &= quiet
+
+        for name, config in (('device', device), ('make_bundle', bundle)):
+            same = config['delay'] == 3 and config['per_image'] == DELAYS
+            print(f"  {name} delays {config['delay']:g} s, {config['per_image']}: {'yes' if same else 'NO'}")
+            ok &= same
+
+    print("=" * 60)
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ This pre-converts the images so the ESP32 doesn't have to do it
 
 import sys
 import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
@@ -14,10 +17,107 @@ except ImportError:
     print("Run: pip install Pillow")
     sys.exit(1)
 
+from rgb565 import image_to_rgb565, encode_rle, rle_header, image_to_indexed, indexed_header, write_change_marker
 
-def bmp_to_rgb565(input_path, output_path):
-    """Convert BMP to raw RGB565 format."""
-    print(f"Converting: {input_path}")
+# Manifest kept in the output directory for incremental rebuilds
+MANIFEST_NAME = '.convert_manifest.json'
+
+# Bump when the output of a conversion changes for the same input
+CONVERTER_VERSION = 1
+
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Output formats: file extension -> manifest format name
+OUTPUT_FORMATS = {'raw': 'bgr565', 'rle': 'bgr565-rle', 'idx': 'bgr565-idx'}
+
+
+def conversion_params(output_format='raw'):
+    """Parameters that affect the converted output (stored in the manifest)."""
+    return {'version': CONVERTER_VERSION, 'format': OUTPUT_FORMATS[output_format]}
+
+
+def load_manifest(output_dir):
+    """Load the conversion manifest, or an empty one."""
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    """Write the conversion manifest atomically."""
+    path = Path(output_dir) / MANIFEST_NAME
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def is_up_to_date(entry, source_file, output_file, params):
+    """
+    Check a manifest entry against the source and output on disk.
+
+    Files whose size and mtime both match the entry are taken as
+    unchanged without reading them; only when an mtime differs are the
+    files hashed. If the hashes still match, the entry's mtimes are
+    refreshed so the next run skips the hashing.
+    """
+    if not entry or entry.get('params') != params:
+        return False
+    try:
+        source_stat = source_file.stat()
+        output_stat = output_file.stat()
+    except OSError:
+        return False
+    if source_stat.st_size != entry.get('source_size'):
+        return False
+    if output_stat.st_size != entry.get('output_size'):
+        return False
+    if (source_stat.st_mtime_ns == entry.get('source_mtime_ns') and
+            output_stat.st_mtime_ns == entry.get('output_mtime_ns')):
+        return True
+    if file_sha256(source_file) != entry.get('source_sha256'):
+        return False
+    if file_sha256(output_file) != entry.get('output_sha256'):
+        return False
+    entry['source_mtime_ns'] = source_stat.st_mtime_ns
+    entry['output_mtime_ns'] = output_stat.st_mtime_ns
+    return True
+
+
+def manifest_entry(input_path, output_path, data, params):
+    """Build the manifest entry for a converted file."""
+    source_stat = os.stat(input_path)
+    return {
+        'source_sha256': file_sha256(input_path),
+        'source_size': source_stat.st_size,
+        'source_mtime_ns': source_stat.st_mtime_ns,
+        'params': params,
+        'output_sha256': hashlib.sha256(data).hexdigest(),
+        'output_size': len(data),
+        'output_mtime_ns': os.stat(output_path).st_mtime_ns,
+    }
+
+
+def convert_one(input_path, output_path, params, output_format):
+    """Convert one file quietly and return its manifest entry (worker)."""
+    data = bmp_to_rgb565(input_path, output_path, verbose=False, output_format=output_format)
+    return manifest_entry(input_path, output_path, data, params)
+
+
+def bmp_to_rgb565(input_path, output_path, verbose=True, output_format='raw'):
+    """Convert BMP to raw RGB565 format ('raw'), RLE ('rle') or palette-indexed ('idx')."""
+    if verbose:
+        print(f"Converting: {input_path}")
     
     # Open image
     img = Image.open(input_path)
@@ -27,48 +127,62 @@ def bmp_to_rgb565(input_path, output_path):
         img = img.convert('RGB')
     
     width, height = img.size
-    print(f"  Size: {width}x{height}")
+    if verbose:
+        print(f"  Size: {width}x{height}")
     
-    # Get pixel data
-    pixels = img.load()
+    # Convert to BGR565 (display uses BGR mode), big-endian
+    data = image_to_rgb565(img, bgr=True)
+    raw_size = len(data)
     
-    # Create RGB565 data
-    data = bytearray()
+    # Run-length encode (flat-colour graphics shrink a lot)
+    if output_format == 'rle':
+        data = rle_header(width, height) + encode_rle(data)
     
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y]
-            
-            # Convert to BGR565 (display uses BGR mode)
-            bgr565 = ((b & 0xF8) << 8) | ((g & 0xFC) << 3) | (r >> 3)
-            
-            # Store as big-endian
-            data.append(bgr565 >> 8)
-            data.append(bgr565 & 0xFF)
+    # Palette-indexed: 8bpp or 4bpp, quantized if over 256 colours
+    elif output_format == 'idx':
+        bpp, payload, _ = image_to_indexed(img, bgr=True)
+        data = indexed_header(width, height, bpp) + payload
     
     # Write to file
     with open(output_path, 'wb') as f:
         f.write(data)
     
-    original_size = os.path.getsize(input_path)
-    new_size = len(data)
+    if verbose:
+        original_size = os.path.getsize(input_path)
+        new_size = len(data)
+        
+        print(f"  Original: {original_size:,} bytes")
+        print(f"  RGB565:   {raw_size:,} bytes")
+        if output_format == 'rle':
+            print(f"  RLE:      {new_size:,} bytes ({raw_size / new_size:.1f}x smaller)")
+        elif output_format == 'idx':
+            print(f"  Indexed:  {new_size:,} bytes ({bpp}bpp)")
+        print(f"  Saved to: {output_path}")
+        print()
     
-    print(f"  Original: {original_size:,} bytes")
-    print(f"  RGB565:   {new_size:,} bytes")
-    print(f"  Saved to: {output_path}")
-    print()
+    return data
 
 
-def convert_directory(input_dir, output_dir):
-    """Convert all BMP files in directory."""
+def convert_directory(input_dir, output_dir, jobs=1, force=False, output_format='raw'):
+    """
+    Convert all BMP files in directory.
+    
+    Args:
+        input_dir: Directory containing BMP files
+        output_dir: Directory for .raw files
+        jobs: Worker processes (1 = serial, 0 = all cores)
+        force: Ignore the manifest and reconvert everything
+        output_format: 'raw', 'rle' (run-length encoded) or 'idx' (palette)
+    """
     input_path = Path(input_dir)
     output_path = Path(output_dir)
     
     # Create output directory
     output_path.mkdir(exist_ok=True)
     
-    # Find all BMP files
-    bmp_files = list(input_path.glob('*.bmp')) + list(input_path.glob('*.BMP'))
+    # Find all BMP files (deduplicated for case-insensitive filesystems)
+    found = list(input_path.glob('*.bmp')) + list(input_path.glob('*.BMP'))
+    bmp_files = sorted({f.name: f for f in found}.values())
     
     if not bmp_files:
         print(f"No BMP files found in {input_dir}")
@@ -78,42 +192,121 @@ def convert_directory(input_dir, output_dir):
     print("=" * 60)
     print()
     
+    params = conversion_params(output_format)
+    extension = '.' + output_format
+    manifest = {} if force else load_manifest(output_path)
+    
+    # Skip files whose source, parameters and output are unchanged
+    pending = []
     for bmp_file in bmp_files:
-        output_file = output_path / (bmp_file.stem + '.raw')
-        try:
-            bmp_to_rgb565(str(bmp_file), str(output_file))
-        except Exception as e:
-            print(f"  Error: {e}")
-            print()
+        output_file = output_path / (bmp_file.stem + extension)
+        entry = manifest.get(bmp_file.name)
+        if is_up_to_date(entry, bmp_file, output_file, params):
+            continue
+        pending.append((bmp_file, output_file))
+    
+    skipped = len(bmp_files) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} unchanged files")
+    
+    converted = 0
+    if jobs == 1:
+        for bmp_file, output_file in pending:
+            try:
+                data = bmp_to_rgb565(str(bmp_file), str(output_file), output_format=output_format)
+                manifest[bmp_file.name] = manifest_entry(bmp_file, output_file, data, params)
+                converted += 1
+            except Exception as e:
+                print(f"  Error: {e}")
+                print()
+    elif pending:
+        workers = jobs if jobs > 0 else None
+        print(f"Converting {len(pending)} files in parallel")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                (bmp_file, pool.submit(convert_one, str(bmp_file), str(output_file),
+                                       params, output_format))
+                for bmp_file, output_file in pending
+            ]
+            for bmp_file, future in futures:
+                try:
+                    manifest[bmp_file.name] = future.result()
+                    converted += 1
+                    print(f"  {bmp_file.name}")
+                except Exception as e:
+                    print(f"  {bmp_file.name}: Error: {e}")
+        print()
+    
+    # Forget files that no longer exist in the input directory
+    names = {f.name for f in bmp_files}
+    for name in list(manifest):
+        if name not in names:
+            del manifest[name]
+    save_manifest(output_path, manifest)
+    if converted:
+        write_change_marker(output_path)
     
     print("=" * 60)
-    print(f"Conversion complete! {len(bmp_files)} files converted")
+    print(f"Conversion complete! {converted} files converted, {skipped} unchanged")
     print(f"Output directory: {output_path.absolute()}")
 
 
+def parse_options(argv):
+    """Split command line into positional arguments and options."""
+    args = []
+    options = {'jobs': 1, 'force': False, 'format': 'raw'}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ('--jobs', '-j'):
+            i += 1
+            options['jobs'] = int(argv[i])
+        elif arg == '--force':
+            options['force'] = True
+        elif arg == '--rle':
+            options['format'] = 'rle'
+        elif arg == '--palette':
+            options['format'] = 'idx'
+        else:
+            args.append(arg)
+        i += 1
+    return args, options
+
+
 def main():
     """Main function."""
-    if len(sys.argv) < 2:
+    args, options = parse_options(sys.argv[1:])
+    
+    if not args:
         print("BMP to RGB565 Converter")
         print()
         print("Usage:")
-        print("  python convert_images_fast.py <input_directory> [output_directory]")
+        print("  python convert_images_fast.py <input_directory> [output_directory] [options]")
+        print()
+        print("Options:")
+        print("  --jobs N   Convert in N worker processes (0 = all cores)")
+        print("  --force    Ignore the manifest and reconvert every file")
+        print("  --rle      Write run-length encoded .rle files (flat-colour art)")
+        print("  --palette  Write palette-indexed .idx files (8bpp or 4bpp)")
         print()
         print("Examples:")
         print("  python convert_images_fast.py C:\\images")
         print("  python convert_images_fast.py C:\\images C:\\images_fast")
+        print("  python convert_images_fast.py C:\\images C:\\images_fast --jobs 0")
         print()
         print("This converts BMP files to raw RGB565 format for faster loading.")
+        print("Unchanged files are skipped using a manifest in the output directory.")
         sys.exit(1)
     
-    input_dir = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else input_dir + "_fast"
+    input_dir = args[0]
+    output_dir = args[1] if len(args) > 1 else input_dir + "_fast"
     
     if not os.path.exists(input_dir):
         print(f"Error: Directory not found: {input_dir}")
         sys.exit(1)
     
-    convert_directory(input_dir, output_dir)
+    convert_directory(input_dir, output_dir, jobs=options['jobs'], force=options['force'],
+                      output_format=options['format'])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""
+Display Benchmark
+Renders with ili9341.py into the emulated panel and compares the paths
+
+Runs the unmodified driver against ili9341_emulator.py and for each
+drawing call (fill, show_raw, show_rle, show_bmp, blit_buffer, and a
+run of small tile blits):
+  - checks the panel framebuffer against the expected pixels
+  - counts SPI calls, CS selects, commands and command/parameter bytes
+  - estimates the time on the wire at the display SPI clock
+
+With --trace the display's SPI and pins are wrapped by spitrace.py and
+its ranked per-call summary (calls, bytes, host time, allocations) is
+printed after the table.
+
+Usage:
+  python display_bench.py [spi_mhz] [--png output_dir] [--trace]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import host_machine
+from ili9341_emulator import ILI9341Emulator
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow not installed")
+    print("Run: pip install Pillow")
+    sys.exit(1)
+
+from rgb565 import image_to_rgb565, encode_rle, rle_header
+
+WIDTH = 240
+HEIGHT = 320
+BLIT = (100, 150, 40, 40)  # x, y, width, height
+TILE = 8  # Small blits: TILES tiles of TILE x TILE along the top rows
+TILES = 60
+
+
+def make_image():
+    """Test slide: colour blocks on a gradient (RLE-friendly, not flat)."""
+    rng = random.Random(7)
+    img = Image.new('RGB', (WIDTH, HEIGHT))
+    img.putdata([(x, y * 255 // HEIGHT, 128) for y in range(HEIGHT) for x in range(WIDTH)])
+    for _ in range(10):
+        x, y = rng.randrange(WIDTH - 60), rng.randrange(HEIGHT - 60)
+        img.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + 60, y + 60))
+    return img
+
+
+def make_files(folder, img):
+    """Write the slide as RAW, RLE and 24-bit BMP; return (paths, expected frame)."""
+    frame = image_to_rgb565(img, bgr=True)
+    paths = {}
+    paths['raw'] = os.path.join(folder, 'slide.raw')
+    with open(paths['raw'], 'wb') as f:
+        f.write(frame)
+    paths['rle'] = os.path.join(folder, 'slide.rle')
+    with open(paths['rle'], 'wb') as f:
+        f.write(rle_header(WIDTH, HEIGHT) + encode_rle(frame))
+    paths['bmp'] = os.path.join(folder, 'slide.bmp')
+    img.save(paths['bmp'], 'BMP')
+    return paths, frame
+
+
+def blit_expected(frame, block, rect=BLIT):
+    """Frame with the rectangle x, y, width, height replaced by block."""
+    x, y, w, h = rect
+    out = bytearray(frame)
+    for row in range(h):
+        o = ((y + row) * WIDTH + x) * 2
+        out[o:o + w * 2] = block[row * w * 2:(row + 1) * w * 2]
+    return bytes(out)
+
+
+def tile_rects():
+    """Rectangles of the small blits, left to right and down."""
+    per_row = WIDTH // TILE
+    return [((i % per_row) * TILE, (i // per_row) * TILE, TILE, TILE) for i in range(TILES)]
+
+
+def parse_options(argv):
+    """Split argv into (args, png output dir or None, trace flag)."""
+    args = []
+    png_dir = None
+    trace = False
+    i = 0
+    while i < len(argv):
+        if argv[i] == '--png':
+            png_dir = argv[i + 1]
+            i += 2
+            continue
+        if argv[i] == '--trace':
+            trace = True
+            i += 1
+            continue
+        args.append(argv[i])
+        i += 1
+    return args, png_dir, trace
+
+
+def main():
+    """Main function."""
+    args, png_dir, trace = parse_options(sys.argv[1:])
+    mhz = float(args[0]) if args else 40
+
+    print("Display Benchmark")
+    print("=" * 78)
+    host_machine.install()
+    ili = host_machine.reload_driver('ili9341')
+
+    panel = ILI9341Emulator()
+    display = ili.Display(panel, panel.dc, panel.cs)
+    panel.init(baudrate=int(mhz * 1000000))
+    print(f"SPI clock {mhz:g} MHz, {panel.call_us:g} us per SPI call, MADCTL 0x{panel.madctl:02X}")
+    tracer = None
+    if trace:
+        spitrace = host_machine.reload_driver('spitrace')
+        tracemalloc.start()  # Backs gc.mem_alloc() on the host
+        tracer = spitrace.Tracer()
+        tracer.attach(display, 'tft')
+    print()
+    print(f"  {'call':<13} {'pixels':>7} {'calls':>6} {'selects':>7} {'cmds':>5}"
+          f" {'overhead':>14} {'wire ms':>8} {'host ms':>8}  match")
+
+    if png_dir:
+        os.makedirs(png_dir, exist_ok=True)
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, frame = make_files(tmp, make_image())
+        rng = random.Random(3)
+        block = bytes(rng.getrandbits(8) for _ in range(BLIT[2] * BLIT[3] * 2))
+        tile = bytes(rng.getrandbits(8) for _ in range(TILE * TILE * 2))
+        tiles = tile_rects()
+        tiled = blit_expected(frame, block)
+        for rect in tiles:
+            tiled = blit_expected(tiled, tile, rect)
+        red = 0x001F  # BGR565: red in the low bits
+        steps = (
+            ('fill', lambda: display.fill(red), bytes([red >> 8, red & 0xFF]) * (WIDTH * HEIGHT)),
+            ('show_raw', lambda: display.show_raw(paths['raw']), frame),
+            ('show_rle', lambda: display.show_rle(paths['rle']), frame),
+            ('show_bmp', lambda: display.show_bmp(paths['bmp']), frame),
+            ('blit_buffer', lambda: display.blit_buffer(block, *BLIT), blit_expected(frame, block)),
+            (f'blit {TILE}x{TILE}', lambda: [display.blit_buffer(tile, *r) for r in tiles], tiled),
+        )
+        for name, draw, expected in steps:
+            panel.reset_stats()
+            if tracer:
+                tracer.begin(name)
+            start = time.perf_counter()
+            draw()
+            host_ms = (time.perf_counter() - start) * 1000
+            stats = panel.stats()
+            same = bytes(panel.fb) == expected
+            ok &= same
+            overhead = f"{stats['overhead_bytes']} B {stats['overhead_pct']:.2f}%"
+            print(f"  {name:<13} {stats['pixels']:7d} {stats['calls']:6d} {stats['selects']:7d}"
+                  f" {stats['commands']:5d} {overhead:>14} {stats['us'] / 1000:8.2f} {host_ms:8.1f}"
+                  f"  {'yes' if same else 'NO'}")
+            if png_dir:
+                panel.save_png(os.path.join(png_dir, name.replace(' ', '_') + '.png'))
+
+    if tracer:
+        tracer.begin('other')
+        print()
+        tracer.report()
+        tracemalloc.stop()
+    if png_dir:
+        print(f"\nPNG files written to {png_dir}")
+    print("=" * 78)
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
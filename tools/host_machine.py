@@ -0,0 +1,295 @@
+"""
+Host stand-ins for MicroPython modules
+Lets the device drivers (ili9341.py, sdcard.py) run on a PC for testing
+
+install() registers fake 'machine' and 'micropython' modules and adds the
+MicroPython-only time, gc and os functions (sleep_ms, ticks_ms, mem_alloc,
+ilistdir, ...) so the driver files can be imported unmodified.
+"""
+
+import builtins
+import gc
+import os
+import sys
+import time
+import types
+
+# Repository root (where ili9341.py and sdcard.py live)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Pin:
+    """Stand-in for machine.Pin that remembers its value."""
+
+    IN = 0
+    OUT = 1
+    PULL_UP = 2
+    PULL_DOWN = 3
+
+    def __init__(self, id=None, mode=None, pull=None, value=None):
+        self.id = id
+        self.mode = mode
+        self._value = 0 if value is None else value
+
+    def init(self, mode=None, pull=None, value=None):
+        if mode is not None:
+            self.mode = mode
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+
+class SPI:
+    """Stand-in for machine.SPI that counts traffic and reads back 0xFF."""
+
+    MSB = 0
+    LSB = 1
+
+    def __init__(self, id=None, baudrate=1000000, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.writes = 0
+
+    def init(self, baudrate=None, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def write(self, buf):
+        self.bytes_written += len(buf)
+        self.writes += 1
+
+    def read(self, nbytes, write=0x00):
+        self.bytes_read += nbytes
+        return bytes([0xFF]) * nbytes
+
+    def readinto(self, buf, write=0x00):
+        self.bytes_read += len(buf)
+        for i in range(len(buf)):
+            buf[i] = 0xFF
+
+    def write_readinto(self, write_buf, read_buf):
+        self.bytes_written += len(write_buf)
+        self.readinto(read_buf)
+
+
+class CaptureSPI(SPI):
+    """SPI stand-in that keeps every byte written."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.data = bytearray()
+
+    def write(self, buf):
+        super().write(buf)
+        self.data += bytes(buf)
+
+
+class FileBlockDevice:
+    """
+    Block device over a file (card image), like sdcard.SDCard.
+
+    Counts read calls and blocks so tests can see how a reader uses it.
+    """
+
+    def __init__(self, path, block_size=512):
+        self.f = open(path, 'r+b')
+        self.block_size = block_size
+        self.f.seek(0, 2)
+        self.blocks = self.f.tell() // block_size
+        self.reads = 0
+        self.blocks_read = 0
+
+    def readblocks(self, block_num, buf):
+        self.reads += 1
+        self.blocks_read += len(buf) // self.block_size
+        self.f.seek(block_num * self.block_size)
+        data = self.f.read(len(buf))
+        buf[:len(data)] = data
+        buf[len(data):] = bytes(len(buf) - len(data))
+
+    def writeblocks(self, block_num, buf):
+        self.f.seek(block_num * self.block_size)
+        self.f.write(buf)
+
+    def ioctl(self, op, arg):
+        if op == 4:  # number of blocks
+            return self.blocks
+        if op == 5:  # block size
+            return self.block_size
+        return 0
+
+    def close(self):
+        self.f.close()
+
+
+class MicroBytearray(bytearray):
+    """bytearray that keeps the low 8 bits of stored ints, as MicroPython does."""
+
+    def __setitem__(self, index, value):
+        if isinstance(value, int):
+            value &= 0xFF
+        super().__setitem__(index, value)
+
+
+# Stand-ins handed out by machine.SPI(id) and machine.Pin(id) (see attach())
+_attached_spi = {}
+_attached_pins = {}
+
+
+class _MachineSPI(SPI):
+    """machine.SPI: the attached device for its bus id, else a plain SPI."""
+
+    def __new__(cls, id=None, *args, **kwargs):
+        spi = _attached_spi.get(id)
+        if spi is None:
+            return super().__new__(cls)
+        spi.init(**kwargs)
+        return spi
+
+
+class _MachinePin(Pin):
+    """machine.Pin: the attached pin for its number, else a plain Pin."""
+
+    def __new__(cls, id=None, *args, **kwargs):
+        pin = _attached_pins.get(id)
+        if pin is None:
+            return super().__new__(cls)
+        if args or kwargs:
+            pin.init(*args, **kwargs)
+        return pin
+
+
+def attach(spi_id, spi, pins=None):
+    """
+    Make machine.SPI(spi_id) return spi and machine.Pin(n) return pins[n].
+
+    Lets code that creates its own buses (src/slideshow.py) talk to an
+    emulated device, e.g. attach(1, panel, {2: panel.dc, 15: panel.cs}).
+    """
+    _attached_spi[spi_id] = spi
+    _attached_pins.update(pins or {})
+
+
+def _const(value):
+    return value
+
+
+def _identity(func):
+    return func
+
+
+def _ticks_ms():
+    return int(time.perf_counter() * 1000)
+
+
+def _ticks_us():
+    return int(time.perf_counter() * 1000000)
+
+
+def _ticks_diff(a, b):
+    return a - b
+
+
+def _ticks_add(a, b):
+    return a + b
+
+
+def _mem_alloc():
+    # Python-level allocations while tracemalloc is tracing, else 0
+    import tracemalloc
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+
+def _mem_free():
+    return 110000
+
+
+def _ilistdir(path='.'):
+    # MicroPython yields (name, type, inode, size); type 0x4000 = directory
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                yield (entry.name, 0x4000, 0, 0)
+            else:
+                yield (entry.name, 0x8000, 0, entry.stat().st_size)
+
+
+def install(viper=False):
+    """
+    Register the stand-in modules.
+
+    Args:
+        viper: Provide micropython.viper/native as plain Python decorators
+               (runs emitter code as ordinary Python so its logic can be
+               checked). When False they are missing, as on firmware
+               without the native emitters, and drivers use their
+               pure-Python fallbacks.
+    """
+    machine = types.ModuleType('machine')
+    machine.Pin = _MachinePin
+    machine.SPI = _MachineSPI
+    machine.freq = lambda *args: 240000000
+    machine.reset = lambda: None
+    sys.modules['machine'] = machine
+
+    micropython = types.ModuleType('micropython')
+    micropython.const = _const
+    if viper:
+        micropython.viper = _identity
+        micropython.native = _identity
+        # Viper type annotations
+        for name in ('ptr8', 'ptr16', 'ptr32', 'uint'):
+            setattr(builtins, name, int)
+    sys.modules['micropython'] = micropython
+
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
+    time.ticks_ms = _ticks_ms
+    time.ticks_us = _ticks_us
+    time.ticks_cpu = _ticks_us
+    time.ticks_diff = _ticks_diff
+    time.ticks_add = _ticks_add
+
+    gc.mem_alloc = _mem_alloc
+    gc.mem_free = _mem_free
+
+    os.ilistdir = _ilistdir
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+
+def reload_driver(name, truncating_bytearray=False):
+    """
+    Import (or re-import) a driver module after install().
+
+    With truncating_bytearray the module's bytearray() is MicroBytearray,
+    for drivers that store values above 255 and rely on MicroPython
+    keeping the low byte (sdcard.py command arguments). Off by default:
+    item assignment becomes a Python call, slowing byte-heavy drivers.
+    """
+    sys.modules.pop(name, None)
+    module = __import__(name)
+    if truncating_bytearray:
+        module.bytearray = MicroBytearray
+    return module
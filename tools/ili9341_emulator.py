@@ -0,0 +1,247 @@
+"""
+ILI9341 Emulator
+Headless display panel that renders SPI traffic into a framebuffer
+
+ILI9341Emulator is a stand-in machine.SPI with the panel on the other
+end of the bus, plus the DC and CS pins the driver toggles. It decodes
+the command stream of ili9341.Display (CASET, PASET, RAMWR, MADCTL, and
+parameters of the other commands) into a 240x320 RGB565 framebuffer,
+so ili9341.py runs unmodified against it:
+
+    panel = ILI9341Emulator()
+    display = ili9341.Display(panel, panel.dc, panel.cs)
+    display.show_raw('photo.raw')
+    panel.save_png('photo.png')
+
+or, for code that creates its own bus (src/slideshow.py), attach() it
+to the board's display SPI bus and pins.
+
+The framebuffer is in panel (portrait) order; MADCTL MV/MX/MY change
+how the address window maps onto it and the BGR bit how PNG colours are
+read. Counters split the traffic into pixel bytes and command overhead
+(command and parameter bytes, CS selects, SPI calls) so drawing paths
+can be compared; wire_us() turns them into time at the SPI clock.
+"""
+
+import struct
+import zlib
+
+import host_machine
+
+WIDTH = 240
+HEIGHT = 320
+
+# Board wiring (src/slideshow.py)
+SPI_ID = 1
+DC_PIN = 2
+CS_PIN = 15
+
+CALL_US = 5.0  # Fixed cost per SPI call (driver/DMA setup on the ESP32)
+
+_CASET = 0x2A
+_PASET = 0x2B
+_RAMWR = 0x2C
+_MADCTL = 0x36
+
+_MADCTL_MY = 0x80
+_MADCTL_MX = 0x40
+_MADCTL_MV = 0x20
+_MADCTL_BGR = 0x08
+
+
+class SelectPin(host_machine.Pin):
+    """Chip select that counts how often the panel is selected."""
+
+    def __init__(self):
+        super().__init__(value=1)
+        self.selects = 0
+
+    def value(self, v=None):
+        if v is not None and not v and self._value:
+            self.selects += 1
+        return super().value(v)
+
+
+class ILI9341Emulator(host_machine.SPI):
+    """Stand-in machine.SPI with an ILI9341 panel attached (see module doc)."""
+
+    def __init__(self, width=WIDTH, height=HEIGHT, call_us=CALL_US):
+        super().__init__(baudrate=40000000)
+        self.width = width
+        self.height = height
+        self.call_us = call_us
+        self.dc = host_machine.Pin()
+        self.cs = SelectPin()
+        self.fb = bytearray(width * height * 2)
+        self.madctl = 0
+        self.command = None
+        self.params = bytearray()
+        self.window = [0, 0, width - 1, height - 1]  # Columns and pages
+        self.column = 0
+        self.page = 0
+        self.pending = None  # First byte of a pixel split across writes
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the traffic counters (CS selects included)."""
+        self.calls = 0
+        self.commands = 0
+        self.param_bytes = 0
+        self.pixel_bytes = 0
+        self.ignored_bytes = 0  # Clocked while CS was high
+        self.cs.selects = 0
+
+    def stats(self):
+        """Counters since reset_stats(), with overhead bytes and wire time."""
+        overhead = self.commands + self.param_bytes
+        return {
+            'calls': self.calls,
+            'selects': self.cs.selects,
+            'commands': self.commands,
+            'pixels': self.pixel_bytes // 2,
+            'pixel_bytes': self.pixel_bytes,
+            'overhead_bytes': overhead,
+            'overhead_pct': overhead * 100 / max(overhead + self.pixel_bytes, 1),
+            'us': self.wire_us(),
+        }
+
+    def wire_us(self):
+        """Time of the counted traffic at the SPI clock plus per-call cost."""
+        total = self.commands + self.param_bytes + self.pixel_bytes + self.ignored_bytes
+        return total * 8000000 / self.baudrate + self.calls * self.call_us
+
+    def attach(self, spi_id=SPI_ID, dc=DC_PIN, cs=CS_PIN):
+        """Hand this panel out for machine.SPI(spi_id) and its pins (after host_machine.install())."""
+        host_machine.attach(spi_id, self, {dc: self.dc, cs: self.cs})
+
+    # machine.SPI interface
+
+    def write(self, buf):
+        self.calls += 1
+        if self.cs.value():
+            self.ignored_bytes += len(buf)
+            return
+        if self.dc.value():
+            self._data(buf)
+            return
+        for cmd in bytes(buf):
+            self.commands += 1
+            self.command = cmd
+            self.params = bytearray()
+            if cmd == _RAMWR:
+                self.column = self.window[0]
+                self.page = self.window[1]
+                self.pending = None
+
+    def write_readinto(self, write_buf, read_buf):
+        self.write(write_buf)
+        read_buf[:] = b'\x00' * len(read_buf)
+
+    # Panel
+
+    def _data(self, buf):
+        if self.command != _RAMWR:
+            self.param_bytes += len(buf)
+            self.params += bytes(buf)
+            if self.command in (_CASET, _PASET) and len(self.params) >= 4:
+                start, end = struct.unpack('>HH', self.params[:4])
+                i = 0 if self.command == _CASET else 1
+                self.window[i] = start
+                self.window[i + 2] = end
+            elif self.command == _MADCTL:
+                self.madctl = self.params[0]
+            return
+
+        self.pixel_bytes += len(buf)
+        data = bytes(buf)
+        if self.pending is not None:
+            self._pixels(bytes([self.pending]) + data[:1])
+            data = data[1:]
+            self.pending = None
+        if len(data) & 1:
+            self.pending = data[-1]
+            data = data[:-1]
+        self._pixels(data)
+
+    def _pixels(self, data):
+        """Store whole pixels at the RAM pointer, advancing through the window."""
+        x0, y0, x1, y1 = self.window
+        if x1 < x0 or y1 < y0:
+            return  # Empty window, the panel ignores the data
+        fb = self.fb
+        direct = not self.madctl & (_MADCTL_MY | _MADCTL_MX | _MADCTL_MV)
+        i = 0
+        n = len(data)
+        while i < n:
+            if direct:
+                # Rest of the window row in one copy
+                run = min((x1 - self.column + 1) * 2, n - i)
+                if self.column < self.width and self.page < self.height:
+                    o = (self.page * self.width + self.column) * 2
+                    shown = min(run, (self.width - self.column) * 2)
+                    fb[o:o + shown] = data[i:i + shown]
+                self.column += run // 2
+                i += run
+            else:
+                o = self._offset(self.column, self.page)
+                if o is not None:
+                    fb[o:o + 2] = data[i:i + 2]
+                self.column += 1
+                i += 2
+            if self.column > x1:
+                self.column = x0
+                self.page += 1
+                if self.page > y1:
+                    self.page = y0  # Past the window end writes wrap around
+
+    def _offset(self, column, page):
+        """Framebuffer offset of a column/page address under MADCTL, or None."""
+        x, y = column, page
+        if self.madctl & _MADCTL_MV:
+            x, y = y, x
+        if self.madctl & _MADCTL_MX:
+            x = self.width - 1 - x
+        if self.madctl & _MADCTL_MY:
+            y = self.height - 1 - y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return (y * self.width + x) * 2
+        return None
+
+    # Output
+
+    def pixel(self, x, y):
+        """RGB565 word at panel position x, y (as sent, BGR order if MADCTL says so)."""
+        o = (y * self.width + x) * 2
+        return self.fb[o] << 8 | self.fb[o + 1]
+
+    def rgb(self):
+        """Framebuffer as RGB888 bytes, rows top to bottom."""
+        out = bytearray(self.width * self.height * 3)
+        bgr = self.madctl & _MADCTL_BGR
+        fb = self.fb
+        for p in range(self.width * self.height):
+            v = fb[p * 2] << 8 | fb[p * 2 + 1]
+            hi = (v >> 11) << 3
+            g = ((v >> 5) & 0x3F) << 2
+            lo = (v & 0x1F) << 3
+            r, b = (lo, hi) if bgr else (hi, lo)
+            out[p * 3] = r | r >> 5
+            out[p * 3 + 1] = g | g >> 6
+            out[p * 3 + 2] = b | b >> 5
+        return out
+
+    def save_png(self, path):
+        """Write the framebuffer as an RGB PNG file."""
+        rgb = self.rgb()
+        stride = self.width * 3
+        raw = b''.join(b'\x00' + rgb[y * stride:(y + 1) * stride] for y in range(self.height))
+
+        def chunk(kind, data):
+            body = kind + data
+            return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body))
+
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0)))
+            f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 6)))
+            f.write(chunk(b'IEND', b''))
@@ -7,22 +7,19 @@ import sys
 from pathlib import Path
 from PIL import Image
 
-
-def rgb888_to_rgb565(r, g, b):
-    """Convert RGB888 to RGB565 format."""
-    r5 = (r >> 3) & 0x1F
-    g6 = (g >> 2) & 0x3F
-    b5 = (b >> 3) & 0x1F
-    return (r5 << 11) | (g6 << 5) | b5
+from rgb565 import image_to_rgb565, image_to_indexed, indexed_header, write_change_marker
 
 
 def convert_image_to_rgb565(input_path, output_path, width=240, height=320):
     """
     Convert image to RGB565 raw format.
     
+    An output path ending in .idx writes a palette-indexed file instead
+    (8bpp or 4bpp, quantized to 256 colours if needed).
+    
     Args:
         input_path: Input image file
-        output_path: Output raw file
+        output_path: Output raw (or .idx) file
         width: Target width (default 240)
         height: Target height (default 320)
     """
@@ -33,21 +30,17 @@ def convert_image_to_rgb565(input_path, output_path, width=240, height=320):
     img = img.convert('RGB')
     img = img.resize((width, height), Image.Resampling.LANCZOS)
     
-    # Convert to RGB565
-    pixels = img.load()
-    data = bytearray()
-    
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y]
-            rgb565 = rgb888_to_rgb565(r, g, b)
-            # Big-endian format
-            data.append((rgb565 >> 8) & 0xFF)
-            data.append(rgb565 & 0xFF)
+    # Convert to RGB565 (big-endian), or palette indices + RGB565 palette
+    if str(output_path).lower().endswith('.idx'):
+        bpp, payload, _ = image_to_indexed(img)
+        data = indexed_header(width, height, bpp) + payload
+    else:
+        data = image_to_rgb565(img)
     
     # Write to file
     with open(output_path, 'wb') as f:
         f.write(data)
+    write_change_marker(Path(output_path).parent)
     
     print(f"Converted! Output: {output_path}")
     print(f"Size: {len(data)} bytes ({width}x{height})")
@@ -60,6 +53,7 @@ def main():
         print("\nExamples:")
         print("  python image_converter.py photo.jpg photo.raw")
         print("  python image_converter.py photo.jpg photo.raw 240 320")
+        print("  python image_converter.py logo.png logo.idx   (palette-indexed)")
         sys.exit(1)
     
     input_path = sys.argv[1]
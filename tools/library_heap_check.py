@@ -0,0 +1,98 @@
+"""
+Library Heap Check
+Shows that slide index rebuild and playback use constant memory on a PC
+
+Builds card-like folder trees of increasing size (nested folders, mixed
+RAW/BMP/RLE files and duplicates in two formats), then for each one:
+  - rebuilds the index with slideindex.py (as on the first boot)
+  - plays one full pass of the lazy playlist from src/slideshow.py
+and prints the peak Python heap of each step against the library size.
+Peak heap should stay flat while the file count grows.
+
+Usage:
+  python library_heap_check.py [max_files]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import host_machine
+
+SIZES = (100, 1000, 10000)
+FOLDER_SIZE = 250  # Files per folder
+EXTENSIONS = ('.raw', '.bmp', '.rle')
+
+
+def make_library(root, count):
+    """Create count empty image files in nested folders."""
+    rng = random.Random(count)
+    for i in range(count):
+        folder = os.path.join(root, f"album{i // FOLDER_SIZE:03d}", f"part{i % 3}")
+        os.makedirs(folder, exist_ok=True)
+        name = f"photo{rng.randrange(10 ** 6):06d}_{i}"
+        open(os.path.join(folder, name + rng.choice(EXTENSIONS)), 'wb').close()
+        if i % 10 == 0:
+            # Same image converted to RLE; only one of the two is played
+            open(os.path.join(folder, name + '.rle'), 'wb').close()
+
+
+def peak_heap(func):
+    """Run func and return (result, peak traced heap in bytes)."""
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def play_pass(slideshow, playlist):
+    """Iterate one full pass of the playlist the way the slideshow does."""
+    shown = 0
+    for position, entry in slideshow.playlist_loop(playlist):
+        if position == 0 and shown:
+            break
+        shown += 1
+    return shown
+
+
+def main():
+    """Main function."""
+    max_files = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+
+    host_machine.install()
+    sys.path.insert(0, os.path.join(host_machine.REPO_ROOT, 'src'))
+    slideindex = host_machine.reload_driver('slideindex')
+    slideshow = host_machine.reload_driver('slideshow')
+
+    print("Library Heap Check")
+    print("=" * 60)
+    print(f"  {'Files':>7s} {'Slides':>7s} {'Build':>8s} {'Build peak':>11s} {'Play peak':>10s}")
+
+    peaks = []
+    for count in SIZES:
+        if count > max_files:
+            break
+        with tempfile.TemporaryDirectory() as root:
+            make_library(root, count)
+            start = time.perf_counter()
+            index, build_peak = peak_heap(lambda: slideindex.load(root))
+            elapsed = time.perf_counter() - start
+            shown, play_peak = peak_heap(lambda: play_pass(slideshow, index))
+            if shown != len(index):
+                print(f"  Played {shown} of {len(index)} slides")
+                sys.exit(1)
+            print(f"  {count:7d} {len(index):7d} {elapsed:7.2f}s {build_peak:10,d}B {play_peak:9,d}B")
+            peaks.append(max(build_peak, play_peak))
+
+    print("=" * 60)
+    if len(peaks) > 1:
+        print(f"Peak heap grew {peaks[-1] / peaks[0]:.1f}x for {SIZES[len(peaks) - 1] // SIZES[0]}x the files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Slideshow Bundle Packer
+Packs converted frames, sizes, formats and delays into one indexed file
+
+The ESP32 opens the bundle once and seeks straight to each frame,
+so there is no directory scan and no per-slide open/close.
+Format is documented in slidebundle.py (the device-side reader).
+
+With --delta a slide that differs from the previous one only in a small
+region (a price, a clock) is stored as just the changed rectangles.
+"""
+
+import ast
+import sys
+import os
+import struct
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow not installed")
+    print("Run: pip install Pillow")
+    sys.exit(1)
+
+import rgb565
+from rgb565 import image_to_rgb565, encode_rle, encode_indexed
+
+# Must match slidebundle.py on the device
+BUNDLE_MAGIC = b'SLB1'
+BUNDLE_VERSION = 1
+HEADER_FORMAT = '<4sHHII'
+HEADER_SIZE = 16
+ENTRY_FORMAT = '<IIHHBxHI'
+ENTRY_SIZE = 20
+RECT_FORMAT = '<HHHHBxI'
+RECT_SIZE = 14
+
+FMT_RAW = 0
+FMT_RLE = 1
+FMT_DELTA = 2
+FMT_PAL8 = 3
+FMT_PAL4 = 4
+
+FORMAT_LABELS = {FMT_RAW: 'RAW', FMT_RLE: 'RLE', FMT_PAL8: 'PAL8', FMT_PAL4: 'PAL4'}
+
+# Unchanged gaps smaller than this are merged into one rectangle, since
+# every rectangle costs a header plus a set_window on the device
+MERGE_ROWS = 8
+MERGE_COLS = 16
+
+# Frames start on SD sector boundaries
+ALIGN = 512
+
+DEFAULT_WIDTH = 240
+DEFAULT_HEIGHT = 320
+
+IMAGE_EXTENSIONS = ('.bmp', '.png', '.jpg', '.jpeg', '.gif', '.raw')
+
+# The device script; its CONFIG_OPTIONS names the config.txt keys that
+# are options rather than image names
+SLIDESHOW_SOURCE = Path(__file__).resolve().parent.parent / 'src' / 'slideshow.py'
+
+
+def option_keys(source=SLIDESHOW_SOURCE):
+    """
+    Return the config.txt option keys of the device (CONFIG_OPTIONS).
+
+    Read from the literal in src/slideshow.py rather than imported, since
+    that script needs the MicroPython machine module.
+    """
+    tree = ast.parse(Path(source).read_text(encoding='utf-8'))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == 'CONFIG_OPTIONS' for t in node.targets):
+            return tuple(ast.literal_eval(node.value))
+    raise ValueError(f"CONFIG_OPTIONS not found in {source}")
+
+
+def read_config(config_path):
+    """
+    Read delays from a slideshow config.txt (same format as on the SD card).
+
+    The device's option keys (pipeline, rawcache, ...) are skipped.
+    """
+    options = option_keys()
+    config = {'delay': 2, 'per_image': {}}
+    try:
+        with open(config_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or '=' not in line:
+                    continue
+                key, value = line.split('=', 1)
+                key = key.strip()
+                if key.lower() in options:
+                    continue  # Used by the device only
+                try:
+                    delay = float(value.strip())
+                except ValueError:
+                    print(f"Invalid delay for {key}: {value.strip()}")
+                    continue
+                if key.lower() == 'delay':
+                    config['delay'] = delay
+                else:
+                    config['per_image'][key] = delay
+    except OSError:
+        pass
+    return config
+
+
+def load_frame(path, width, height, palette=False):
+    """
+    Load one image as (width, height, BGR565 bytes).
+
+    With palette=True images over 256 colours are quantized first, so the
+    frame can be stored palette-indexed.
+    """
+    if path.suffix.lower() == '.raw':
+        data = path.read_bytes()
+        if len(data) != width * height * 2:
+            raise ValueError(f"{path.name}: {len(data)} bytes is not {width}x{height} RGB565")
+        return width, height, data
+
+    img = Image.open(path).convert('RGB')
+    if img.size != (width, height):
+        img = img.resize((width, height), Image.Resampling.LANCZOS)
+    data = image_to_rgb565(img, bgr=True)
+    if palette and encode_indexed(data) is None:
+        img = img.quantize(colors=256).convert('RGB')
+        data = image_to_rgb565(img, bgr=True)
+    return width, height, data
+
+
+def pack_bundle(frames, output_path, align=ALIGN):
+    """
+    Write frames to a bundle file.
+
+    Args:
+        frames: List of (width, height, format, reference, delay_ms, data)
+        output_path: Bundle file to write
+        align: Byte alignment of frame data
+    """
+    with open(output_path, 'wb') as f:
+        return write_bundle(f, frames, align)
+
+
+def write_bundle(f, frames, align=ALIGN):
+    """Write a bundle to an open binary file at its start; returns the size."""
+    count = len(frames)
+    index_offset = HEADER_SIZE
+    data_offset = index_offset + count * ENTRY_SIZE
+
+    entries = []
+    offset = data_offset
+    for width, height, fmt, ref, delay_ms, data in frames:
+        offset = (offset + align - 1) // align * align
+        entries.append(struct.pack(ENTRY_FORMAT, offset, len(data), width, height, fmt, ref, delay_ms))
+        offset += len(data)
+
+    f.write(struct.pack(HEADER_FORMAT, BUNDLE_MAGIC, BUNDLE_VERSION, count, index_offset, 0))
+    f.write(b''.join(entries))
+    for entry, (_, _, _, _, _, data) in zip(entries, frames):
+        frame_offset = struct.unpack_from(ENTRY_FORMAT, entry)[0]
+        f.write(b'\x00' * (frame_offset - f.tell()))
+        f.write(data)
+
+    return offset
+
+
+def _spans(mask, gap):
+    """Return [start, end) spans of True values, merging gaps below gap."""
+    spans = []
+    for i in rgb565.np.flatnonzero(mask).tolist():
+        if spans and i - spans[-1][1] < gap:
+            spans[-1][1] = i + 1
+        else:
+            spans.append([i, i + 1])
+    return spans
+
+
+def changed_rects(prev, cur, width, height):
+    """
+    Find rectangles covering every pixel that differs between two frames.
+
+    Args:
+        prev, cur: Packed big-endian 16-bit pixel data of equal size
+
+    Returns:
+        List of (x, y, w, h)
+    """
+    np = rgb565.np
+    a = np.frombuffer(prev, dtype='>u2').reshape(height, width)
+    b = np.frombuffer(cur, dtype='>u2').reshape(height, width)
+    diff = a != b
+
+    rects = []
+    for y0, y1 in _spans(diff.any(axis=1), MERGE_ROWS):
+        band = diff[y0:y1]
+        for x0, x1 in _spans(band.any(axis=0), MERGE_COLS):
+            # Tighten rows to this column span
+            rows = np.flatnonzero(band[:, x0:x1].any(axis=1))
+            top = y0 + int(rows[0])
+            bottom = y0 + int(rows[-1]) + 1
+            rects.append((x0, top, x1 - x0, bottom - top))
+    return rects
+
+
+def encode_pixels(data, rle, palette=False):
+    """Return (format, bytes) for pixel data, choosing the smallest encoding."""
+    best = (FMT_RAW, data)
+    if rle:
+        encoded = encode_rle(data)
+        if len(encoded) < len(best[1]):
+            best = (FMT_RLE, encoded)
+    if palette:
+        indexed = encode_indexed(data)
+        if indexed and len(indexed[1]) < len(best[1]):
+            best = (FMT_PAL4 if indexed[0] == 4 else FMT_PAL8, indexed[1])
+    return best
+
+
+def encode_delta(prev, cur, width, height, rle):
+    """Encode cur as changed rectangles against prev (delta frame payload)."""
+    rects = changed_rects(prev, cur, width, height)
+    pixels = rgb565.np.frombuffer(cur, dtype='>u2').reshape(height, width)
+
+    out = bytearray(struct.pack('<H', len(rects)))
+    for x, y, w, h in rects:
+        fmt, data = encode_pixels(pixels[y:y + h, x:x + w].tobytes(), rle)
+        out += struct.pack(RECT_FORMAT, x, y, w, h, fmt, len(data))
+        out += data
+    return bytes(out), len(rects)
+
+
+def build_frames(input_dir, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT,
+                 rle=False, delta=False, palette=False):
+    """
+    Encode all images in input_dir (sorted by name) as bundle frames.
+
+    With rle=True each frame is stored RLE-compressed when that is smaller.
+    With delta=True a frame is stored as the rectangles that changed since
+    the previous frame in playlist order when that is smaller. The first
+    frame is always a full frame.
+    With palette=True frames may be stored palette-indexed (8bpp or 4bpp).
+
+    Returns:
+        List of (width, height, format, reference, delay_ms, data), or None
+    """
+    if (delta or palette) and rgb565.np is None:
+        print("Error: --delta and --palette need NumPy")
+        print("Run: pip install numpy")
+        return None
+
+    input_path = Path(input_dir)
+    files = sorted(p for p in input_path.iterdir()
+                   if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+
+    if not files:
+        print(f"No images found in {input_dir}")
+        return None
+
+    config = read_config(input_path / 'config.txt')
+
+    frames = []
+    prev = None
+    for path in files:
+        try:
+            w, h, data = load_frame(path, width, height, palette)
+        except Exception as e:
+            print(f"  {path.name}: Error: {e}")
+            continue
+        delay = config['per_image'].get(path.name, config['delay'])
+        delay_ms = int(round(delay * 1000))
+        pixels = data
+        fmt, data = encode_pixels(pixels, rle, palette)
+        ref = 0
+        label = FORMAT_LABELS[fmt]
+        if delta and prev is not None and len(prev) == len(pixels):
+            delta_data, rects = encode_delta(prev, pixels, w, h, rle)
+            if len(delta_data) < len(data):
+                fmt, data, ref = FMT_DELTA, delta_data, len(frames) - 1
+                label = f"DELTA {rects} rects"
+        prev = pixels
+        frames.append((w, h, fmt, ref, delay_ms, data))
+        print(f"  {len(frames):4d}. {path.name} ({w}x{h}, {delay}s, {label} {len(data):,} bytes)")
+
+    if not frames:
+        print("No frames packed")
+        return None
+    return frames
+
+
+def make_bundle(input_dir, output_path, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT,
+                rle=False, delta=False, palette=False):
+    """Pack all images in input_dir into one bundle (see build_frames)."""
+    print(f"Packing images from {input_dir} into {output_path}")
+    print("=" * 60)
+
+    frames = build_frames(input_dir, width, height, rle, delta, palette)
+    if not frames:
+        return False
+
+    size = pack_bundle(frames, output_path)
+
+    print("=" * 60)
+    print(f"Bundle complete! {len(frames)} frames, {size:,} bytes")
+    print(f"Copy {Path(output_path).name} to the root of the SD card")
+    return True
+
+
+def main():
+    """Main function."""
+    args = [a for a in sys.argv[1:] if a not in ('--rle', '--delta', '--palette')]
+    rle = '--rle' in sys.argv[1:]
+    delta = '--delta' in sys.argv[1:]
+    palette = '--palette' in sys.argv[1:]
+    
+    if not args:
+        print("Slideshow Bundle Packer")
+        print()
+        print("Usage:")
+        print("  python make_bundle.py <input_directory> [output_file] [width] [height] [--rle] [--delta] [--palette]")
+        print()
+        print("Options:")
+        print("  --rle       Store frames run-length encoded when smaller")
+        print("  --delta     Store only rectangles changed since the previous slide")
+        print("  --palette   Store frames palette-indexed (8bpp/4bpp, quantized to 256)")
+        print()
+        print("Examples:")
+        print("  python make_bundle.py C:\\images")
+        print("  python make_bundle.py C:\\images C:\\sd\\slides.bdl")
+        print()
+        print("Delays are read from config.txt in the input directory.")
+        sys.exit(1)
+
+    input_dir = args[0]
+    output_path = args[1] if len(args) > 1 else os.path.join(input_dir, 'slides.bdl')
+    width = int(args[2]) if len(args) > 2 else DEFAULT_WIDTH
+    height = int(args[3]) if len(args) > 3 else DEFAULT_HEIGHT
+
+    if not os.path.isdir(input_dir):
+        print(f"Error: Directory not found: {input_dir}")
+        sys.exit(1)
+
+    if not make_bundle(input_dir, output_path, width, height, rle, delta, palette):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
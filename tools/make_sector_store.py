@@ -0,0 +1,176 @@
+"""
+Sector Store Writer
+Writes slides into a reserved range of sectors on an SD card image
+
+For fixed kiosks the card needs no filesystem: the ESP32 reads the
+slides straight from the sectors (sectorstore.py). The store is a
+slideshow bundle (see make_bundle.py) written at sector --start; its
+first sector holds the header and frame index with each frame's offset,
+size, format and delay.
+
+The target is a card image file (created if missing) or a card device
+such as /dev/sdb (needs root). Sectors inside a partition listed in the
+card's MBR, or sector 0 of a card with a partition table, are only
+overwritten with --force.
+
+Without --start the store goes to sector 0 of a card without partitions
+and to sector 64 (the gap before the first partition) otherwise; the
+slideshow looks at both. Other start sectors need sector_store=N in the
+card's config.txt.
+"""
+
+import sys
+import os
+import io
+import struct
+
+from make_bundle import build_frames, write_bundle, DEFAULT_WIDTH, DEFAULT_HEIGHT
+
+SECTOR = 512
+
+# Start sectors the slideshow searches (sectorstore.STORE_SECTORS)
+STORE_SECTORS = (0, 64)
+
+
+def partitions(image_path):
+    """Return [(first sector, sector count)] from the image's MBR (empty if none)."""
+    try:
+        with open(image_path, 'rb') as f:
+            mbr = f.read(SECTOR)
+    except OSError:
+        return []
+    if len(mbr) < SECTOR or mbr[510:512] != b'\x55\xaa':
+        return []
+    found = []
+    for i in range(4):
+        entry = mbr[446 + i * 16:462 + i * 16]
+        kind = entry[4]
+        first, count = struct.unpack_from('<II', entry, 8)
+        if kind and count:
+            found.append((first, count))
+    # A boot sector without a partition table is a whole-card filesystem
+    if not found and mbr[0] in (0xEB, 0xE9):
+        found.append((0, 0xFFFFFFFF))
+    return found
+
+
+def check_range(image_path, start, sectors):
+    """Return an error message if the store would overwrite a filesystem."""
+    parts = partitions(image_path)
+    if parts and start == 0:
+        return "sector 0 holds the card's partition table or boot sector"
+    end = start + sectors
+    for first, count in parts:
+        if start < first + count and first < end:
+            return f"sectors {start}-{end - 1} overlap the partition at sectors {first}-{first + count - 1}"
+    return None
+
+
+def default_start(image_path):
+    """Start sector for a card: 0 without partitions, else the gap before the first."""
+    return STORE_SECTORS[1] if partitions(image_path) else STORE_SECTORS[0]
+
+
+def write_store(image_path, start, frames, max_sectors=None, force=False):
+    """
+    Write frames as a sector store at sector start of image_path.
+
+    Returns the number of sectors used, or None on error.
+    """
+    data = io.BytesIO()
+    write_bundle(data, frames, SECTOR)
+    store = data.getvalue()
+    sectors = (len(store) + SECTOR - 1) // SECTOR
+    store += b'\x00' * (sectors * SECTOR - len(store))
+
+    if max_sectors is not None and sectors > max_sectors:
+        print(f"Error: store needs {sectors} sectors, only {max_sectors} reserved")
+        return None
+
+    problem = check_range(image_path, start, sectors)
+    if problem and not force:
+        print(f"Error: {problem}")
+        print("Use --force to overwrite it anyway")
+        return None
+
+    mode = 'r+b' if os.path.exists(image_path) else 'wb'
+    with open(image_path, mode) as f:
+        f.seek(start * SECTOR)
+        f.write(store)
+    return sectors
+
+
+def parse_options(argv):
+    """Split argv into (args, options) for --start, --sectors and flags."""
+    args = []
+    options = {'start': None, 'sectors': None, 'rle': False, 'palette': False,
+               'delta': False, 'force': False}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ('--start', '--sectors'):
+            options[arg[2:]] = int(argv[i + 1])
+            i += 2
+            continue
+        if arg in ('--rle', '--palette', '--delta', '--force'):
+            options[arg[2:]] = True
+        else:
+            args.append(arg)
+        i += 1
+    return args, options
+
+
+def main():
+    """Main function."""
+    args, options = parse_options(sys.argv[1:])
+
+    if len(args) < 2:
+        print("Sector Store Writer")
+        print()
+        print("Usage:")
+        print("  python make_sector_store.py <input_directory> <card_image> [width] [height]")
+        print("         [--start N] [--sectors N] [--rle] [--delta] [--palette] [--force]")
+        print()
+        print("Options:")
+        print(f"  --start N     First sector of the store (default {STORE_SECTORS[0]}, or"
+              f" {STORE_SECTORS[1]} on a partitioned card)")
+        print("  --sectors N   Size of the reserved range; fail if the slides need more")
+        print("  --rle, --delta, --palette   Frame encodings, as for make_bundle.py")
+        print("  --force       Overwrite sectors used by a partition")
+        print()
+        print("Examples:")
+        print("  python make_sector_store.py C:\\images kiosk.img")
+        print("  sudo python make_sector_store.py images /dev/sdb --rle")
+        print()
+        print("Other start sectors need sector_store=N in the card's config.txt.")
+        sys.exit(1)
+
+    input_dir, image_path = args[0], args[1]
+    width = int(args[2]) if len(args) > 2 else DEFAULT_WIDTH
+    height = int(args[3]) if len(args) > 3 else DEFAULT_HEIGHT
+
+    if not os.path.isdir(input_dir):
+        print(f"Error: Directory not found: {input_dir}")
+        sys.exit(1)
+
+    if options['start'] is None:
+        options['start'] = default_start(image_path)
+    print(f"Writing slides from {input_dir} to {image_path} at sector {options['start']}")
+    print("=" * 60)
+    frames = build_frames(input_dir, width, height, options['rle'], options['delta'], options['palette'])
+    if not frames:
+        sys.exit(1)
+
+    sectors = write_store(image_path, options['start'], frames, options['sectors'], options['force'])
+    if sectors is None:
+        sys.exit(1)
+
+    print("=" * 60)
+    print(f"Store complete! {len(frames)} frames in sectors "
+          f"{options['start']}-{options['start'] + sectors - 1} ({sectors * SECTOR:,} bytes)")
+    if options['start'] not in STORE_SECTORS:
+        print(f"Add sector_store={options['start']} to config.txt on the card's FAT partition")
+
+
+if __name__ == "__main__":
+    main()
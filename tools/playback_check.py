@@ -0,0 +1,176 @@
+"""
+Playback Check
+Runs the slideshow's prefetch, RAW cache and scheduler modules on a PC
+
+Imports readahead.py, rawcache.py and framescheduler.py on the stand-in
+machine module (host_machine.py), without src/slideshow.py:
+  - PrefetchFile returns the same bytes as the file, from the buffer
+    first, and after seeking back into the buffer
+  - RawCache writes a RAW copy identical to the drawn frame, uses it on
+    the next pass, redoes it when the BMP changes, and marks a BMP
+    smaller than the screen as not cached (also after a reboot)
+  - FrameScheduler keeps a fixed period, hands spare time to the idle
+    callback, and with late=drop skips one slide after an overrun
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import host_machine
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow not installed")
+    print("Run: pip install Pillow")
+    sys.exit(1)
+
+from rgb565 import image_to_rgb565
+
+WIDTH = 240
+HEIGHT = 320
+DELAY_MS = 40
+RENDER_MS = 10
+
+
+def report(label, passed):
+    print(f"  {label}: {'yes' if passed else 'NO'}")
+    return passed
+
+
+def check_prefetch(readahead, tmp):
+    """Read a file through PrefetchFile in odd-sized chunks."""
+    rng = random.Random(1)
+    data = bytes(rng.getrandbits(8) for _ in range(10000))
+    path = os.path.join(tmp, 'prefetch.bin')
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    ok = True
+    prefetch = readahead.PrefetchFile(bytearray(4096))
+    with open(path, 'rb') as f:
+        loaded = prefetch.load(f, 100)
+        chunks = []
+        buf = bytearray(700)
+        while True:
+            n = prefetch.readinto(buf)
+            if not n:
+                break
+            chunks.append(bytes(buf[:n]))
+        ok &= report("Prefetched bytes match the file", b''.join(chunks) == data[100:])
+        ok &= report(f"{prefetch.from_buffer} from buffer, {prefetch.from_file} from file",
+                     loaded == 4096 and prefetch.from_buffer == 4096 and prefetch.from_file == 10000 - 100 - 4096)
+        prefetch.seek(200)
+        ok &= report("Seek back into the buffer", prefetch.read(50) == data[200:250])
+    return ok
+
+
+def check_raw_cache(rawcache, ili, tmp):
+    """Show BMPs through RawCache twice, then after a change and a reboot."""
+    sd = os.path.join(tmp, 'sd')
+    os.makedirs(sd)
+    img = Image.new('RGB', (WIDTH, HEIGHT), (30, 140, 220))
+    img.paste((250, 20, 60), (40, 60, 200, 120))
+    slide = os.path.join(sd, 'slide.bmp')
+    small = os.path.join(sd, 'small.bmp')
+    img.save(slide)
+    img.resize((100, 100)).save(small)
+    frame = image_to_rgb565(img, bgr=True)
+
+    spi = host_machine.CaptureSPI()
+    display = ili.Display(spi, host_machine.Pin(), host_machine.Pin())
+    root = os.path.join(sd, '.rawcache')
+
+    ok = True
+    cache = rawcache.RawCache(root, sd)
+    ok &= report("First pass misses", cache.open(slide) is None)
+    spi.data = bytearray()
+    drawn = cache.show_bmp(display, slide)
+    ok &= report("BMP drawn while copying", drawn and bytes(spi.data[-len(frame):]) == frame)
+    f = cache.open(slide)
+    if f is None:
+        return report("Second pass uses the copy", False)
+    with f:
+        ok &= report("Second pass uses the copy", f.read() == frame)
+
+    cache.show_bmp(display, small)
+    ok &= report("Small BMP not cached", small in cache.skip
+                 and os.path.getsize(cache.cache_path(small)) == 12)
+
+    cache = rawcache.RawCache(root, sd)  # Next boot
+    ok &= report("Small BMP skipped after reboot", cache.open(small) is None and small in cache.skip)
+    st = os.stat(slide)
+    os.utime(slide, (st.st_atime, st.st_mtime + 10))
+    ok &= report("Changed BMP copied again", cache.open(slide) is None
+                 and cache.show_bmp(display, slide) and cache.written == 1)
+    return ok
+
+
+def run_slides(scheduler, render_ms, idle=None):
+    """Show slides with the given render times; returns (late_ms, shown) lists."""
+    late = []
+    shown = []
+    for ms in render_ms:
+        if not scheduler.wait(DELAY_MS, idle):
+            shown.append(False)
+            continue
+        time.sleep_ms(ms)
+        late.append(scheduler.done(DELAY_MS)[1])
+        shown.append(True)
+    return late, shown
+
+
+def check_scheduler(framescheduler):
+    """Check the timeline of the delay and drop policies."""
+    ok = True
+    budgets = []
+
+    def idle(until):
+        budgets.append(time.ticks_diff(until, time.ticks_ms()))
+
+    scheduler = framescheduler.FrameScheduler('delay')
+    start = time.ticks_ms()
+    late, _ = run_slides(scheduler, [RENDER_MS] * 10, idle)
+    period = time.ticks_diff(time.ticks_ms(), start) / 9
+    print(f"    Period {period:.1f} ms for a {DELAY_MS} ms delay, render {RENDER_MS} ms, max late {max(late)} ms")
+    ok &= report("Fixed period", abs(period - DELAY_MS) <= 5 and scheduler.overruns == 0)
+    ok &= report("Dwell time given to idle", len(budgets) == 9 and min(budgets) > 0)
+
+    scheduler = framescheduler.FrameScheduler('drop')
+    renders = [RENDER_MS] * 3 + [3 * DELAY_MS] + [RENDER_MS] * 3
+    late, shown = run_slides(scheduler, renders)
+    print(f"    Shown {''.join('x' if s else '-' for s in shown)}, {scheduler.overruns} overruns")
+    ok &= report("One slide dropped after an overrun", scheduler.dropped == 1 and shown.count(False) == 1)
+    return ok
+
+
+def main():
+    """Main function."""
+    print("Playback Check")
+    print("=" * 60)
+    host_machine.install()
+    ili = host_machine.reload_driver('ili9341')
+    readahead = host_machine.reload_driver('readahead')
+    rawcache = host_machine.reload_driver('rawcache')
+    framescheduler = host_machine.reload_driver('framescheduler')
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("readahead.py:")
+        ok &= check_prefetch(readahead, tmp)
+        print("rawcache.py:")
+        ok &= check_raw_cache(rawcache, ili, tmp)
+    print("framescheduler.py:")
+    ok &= check_scheduler(framescheduler)
+
+    print("=" * 60)
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+RGB565 Conversion Engine
+Shared pixel pipeline used by the image converters
+
+Converts a whole Pillow image to packed big-endian RGB565 or BGR565
+in one NumPy array operation. Falls back to the per-pixel loop when
+NumPy is not installed. Also holds the RLE and palette frame encoders,
+and the change marker the converters leave for the device's slide index.
+"""
+
+import os
+import struct
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def image_to_rgb565(img, bgr=False):
+    """
+    Convert a Pillow image to packed big-endian 16-bit pixels.
+
+    Args:
+        img: Pillow image (converted to RGB if needed)
+        bgr: Pack as BGR565 (blue in the high bits) instead of RGB565
+
+    Returns:
+        bytes, 2 bytes per pixel, rows top to bottom
+    """
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    if np is None:
+        return bytes(image_to_rgb565_slow(img, bgr))
+
+    # (height, width, 3) uint8 -> uint16 so the shifts don't overflow
+    pixels = np.asarray(img, dtype=np.uint16)
+    r = pixels[:, :, 0]
+    g = pixels[:, :, 1]
+    b = pixels[:, :, 2]
+
+    if bgr:
+        packed = ((b & 0xF8) << 8) | ((g & 0xFC) << 3) | (r >> 3)
+    else:
+        packed = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+    # '>u2' stores each pixel big-endian, as the display expects
+    return packed.astype('>u2').tobytes()
+
+
+def image_to_rgb565_slow(img, bgr=False):
+    """Reference per-pixel conversion (original converter loop)."""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    width, height = img.size
+    pixels = img.load()
+    data = bytearray()
+
+    for y in range(height):
+        for x in range(width):
+            r, g, b = pixels[x, y]
+
+            if bgr:
+                value = ((b & 0xF8) << 8) | ((g & 0xFC) << 3) | (r >> 3)
+            else:
+                value = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+            # Store as big-endian
+            data.append(value >> 8)
+            data.append(value & 0xFF)
+
+    return data
+
+
+# RLE packets (see Display.stream_rle in ili9341.py):
+#   0x80 | (n - 1), pixel hi, pixel lo    -> run of n copies (n <= 128)
+#   n - 1, n pixels (2n bytes)            -> n literal pixels (n <= 128)
+RLE_MAGIC = b'R565'
+RLE_MAX_PACKET = 128
+
+
+def rle_header(width, height):
+    """8-byte header of a standalone .rle file: magic, width, height."""
+    return struct.pack('<4sHH', RLE_MAGIC, width, height)
+
+
+def encode_rle(data):
+    """Run-length encode packed 16-bit pixels (bytes, 2 per pixel)."""
+    if len(data) % 2:
+        raise ValueError("pixel data must be a whole number of 16-bit pixels")
+
+    out = bytearray()
+    literal_start = None  # byte offset of pending literal pixels
+    literal_count = 0
+
+    def flush_literal(start, count):
+        while count:
+            n = min(count, RLE_MAX_PACKET)
+            out.append(n - 1)
+            out.extend(data[start:start + n * 2])
+            start += n * 2
+            count -= n
+
+    for start, length in _pixel_runs(data):
+        if length == 1:
+            if literal_count == 0:
+                literal_start = start * 2
+            literal_count += 1
+            continue
+
+        if literal_count:
+            flush_literal(literal_start, literal_count)
+            literal_count = 0
+
+        pixel = data[start * 2:start * 2 + 2]
+        while length:
+            n = min(length, RLE_MAX_PACKET)
+            out.append(0x80 | (n - 1))
+            out.extend(pixel)
+            length -= n
+
+    if literal_count:
+        flush_literal(literal_start, literal_count)
+
+    return bytes(out)
+
+
+def decode_rle(data, pixels):
+    """Decode RLE packets back to packed 16-bit pixels (reference decoder)."""
+    out = bytearray()
+    pos = 0
+    while len(out) < pixels * 2:
+        header = data[pos]
+        n = (header & 0x7F) + 1
+        if header & 0x80:
+            out.extend(data[pos + 1:pos + 3] * n)
+            pos += 3
+        else:
+            out.extend(data[pos + 1:pos + 1 + n * 2])
+            pos += 1 + n * 2
+    return bytes(out)
+
+
+def _pixel_runs(data):
+    """Yield (first pixel index, length) for each run of equal pixels."""
+    count = len(data) // 2
+    if not count:
+        return
+
+    if np is not None:
+        px = np.frombuffer(data, dtype='>u2', count=count)
+        starts = np.concatenate(([0], np.flatnonzero(px[1:] != px[:-1]) + 1))
+        lengths = np.diff(np.append(starts, count))
+        yield from zip(starts.tolist(), lengths.tolist())
+        return
+
+    start = 0
+    for i in range(1, count + 1):
+        if i == count or data[i * 2:i * 2 + 2] != data[start * 2:start * 2 + 2]:
+            yield start, i - start
+            start = i
+
+
+# Palette-indexed frames (see Display.stream_indexed in ili9341.py):
+#   colour count u16 (little-endian), palette (2 bytes per colour, big-endian
+#   16-bit pixels), then indices: 8bpp one byte per pixel, 4bpp two pixels
+#   per byte with the left pixel in the high nibble
+INDEXED_MAGIC = b'P565'
+
+
+def indexed_header(width, height, bpp):
+    """10-byte header of a standalone .idx file: magic, width, height, bpp."""
+    return struct.pack('<4sHHBx', INDEXED_MAGIC, width, height, bpp)
+
+
+def encode_indexed(data, max_colours=256):
+    """
+    Palette-encode packed 16-bit pixels without losing any colour.
+
+    Returns:
+        (bpp, payload) with bpp 4 or 8, or None if there are more than
+        max_colours distinct pixels
+    """
+    if np is None:
+        raise RuntimeError("palette export needs NumPy (pip install numpy)")
+
+    px = np.frombuffer(data, dtype='>u2')
+    palette, indices = np.unique(px, return_inverse=True)
+    if len(palette) > max_colours:
+        return None
+
+    indices = indices.astype(np.uint8)
+    if len(palette) <= 16:
+        bpp = 4
+        if len(indices) % 2:
+            indices = np.append(indices, np.uint8(0))
+        indices = (indices[0::2] << 4) | indices[1::2]
+    else:
+        bpp = 8
+
+    payload = (struct.pack('<H', len(palette))
+               + palette.astype('>u2').tobytes()
+               + indices.tobytes())
+    return bpp, payload
+
+
+def image_to_indexed(img, bgr=False, max_colours=256):
+    """
+    Convert a Pillow image to a palette-indexed frame.
+
+    Images with more than max_colours distinct RGB565 colours are
+    quantized first (lossy).
+
+    Returns:
+        (bpp, payload, pixels) where pixels is the packed 16-bit data the
+        display will actually show
+    """
+    data = image_to_rgb565(img, bgr)
+    result = encode_indexed(data, max_colours)
+    if result is None:
+        img = img.convert('RGB').quantize(colors=max_colours).convert('RGB')
+        data = image_to_rgb565(img, bgr)
+        result = encode_indexed(data, max_colours)
+    bpp, payload = result
+    return bpp, payload, data
+
+
+# Must match slideindex.py on the device
+CHANGE_NAME = '.slidechange'
+
+
+def write_change_marker(folder):
+    """
+    Write a new change marker into an output folder.
+
+    slideindex.py only lists the root of the card on boot; a new marker
+    tells it that files in this folder changed (for example an image
+    replaced by one with the same name and size), so it rebuilds.
+    """
+    with open(os.path.join(folder, CHANGE_NAME), 'w') as f:
+        f.write(f"{time.time_ns()}\n")
@@ -0,0 +1,383 @@
+"""
+SD Card Emulator
+SPI-mode SD card over a card image file, for running sdcard.py on a PC
+
+SDCardEmulator is a stand-in machine.SPI with the card on the other end
+of the bus: every byte the driver clocks out is answered the way a card
+in SPI mode would, so sdcard.SDCard runs unmodified against it:
+
+    sdcard = host_machine.reload_driver('sdcard', truncating_bytearray=True)
+    card = SDCardEmulator('card.img')
+    sd = sdcard.SDCard(card, card.cs)
+
+(sdcard.py stores command arguments above 255 in a bytearray and relies
+on MicroPython keeping the low byte, where CPython raises ValueError.)
+
+Commands: CMD0, 8, 9, 12, 16, 17, 18, 24, 25, 55, 58 and ACMD23, 41.
+The card is SDHC (block addresses, CSD 2.0) or, with high_capacity=False,
+a v1 SDSC card (byte addresses, CSD 1.0).
+
+Time is virtual (microseconds in card.now). Each SPI call costs call_us,
+each byte 8 clocks at the SPI baudrate plus byte_us; the card answers
+commands after command_us, sends a read block read_us after CMD17/18
+and stays busy for write_us after each written block. Within CMD18 and
+CMD25 the following blocks only take burst_read_us/burst_write_us, as
+cards stream consecutive blocks. use_virtual_time() makes
+time.sleep_ms/ticks_ms follow the same clock, so the driver's polling
+sleeps and timeouts cost what they would on the board.
+"""
+
+import time
+
+import host_machine
+
+BLOCK = 512
+
+_TOKEN_DATA = 0xFE
+_TOKEN_CMD25 = 0xFC
+_TOKEN_STOP_TRAN = 0xFD
+
+_R1_IDLE = 0x01
+_R1_ILLEGAL = 0x04
+_R1_CRC_ERROR = 0x08
+_R1_ADDRESS_ERROR = 0x20
+_R1_PARAMETER_ERROR = 0x40
+
+# Default timing (a typical class 10 card behind the ESP32 SPI driver)
+CALL_US = 5.0
+BYTE_US = 0.0
+COMMAND_US = 0.0
+READ_US = 100.0
+WRITE_US = 250.0
+BURST_READ_US = 10.0
+BURST_WRITE_US = 50.0
+INIT_POLLS = 2  # ACMD41 calls answered "busy" before the card is ready
+
+
+class SDCardEmulator(host_machine.SPI):
+    """Stand-in machine.SPI with an SPI-mode SD card attached (see module doc)."""
+
+    def __init__(self, image_path, high_capacity=True, call_us=CALL_US, byte_us=BYTE_US,
+                 command_us=COMMAND_US, read_us=READ_US, write_us=WRITE_US,
+                 burst_read_us=BURST_READ_US, burst_write_us=BURST_WRITE_US):
+        super().__init__()
+        self.f = open(image_path, 'r+b')
+        self.f.seek(0, 2)
+        self.high_capacity = high_capacity
+        # CSD sizes count whole 512 KB (SDHC) or 256 KB (SDSC) units
+        unit = 1024 if high_capacity else 512
+        self.sectors = self.f.tell() // BLOCK // unit * unit
+        if not high_capacity:
+            self.sectors = min(self.sectors, 4096 * 512)  # 12-bit C_SIZE
+        if not self.sectors:
+            raise ValueError("card image too small")
+
+        self.call_us = call_us
+        self.byte_us = byte_us
+        self.command_us = command_us
+        self.read_us = read_us
+        self.write_us = write_us
+        self.burst_read_us = burst_read_us
+        self.burst_write_us = burst_write_us
+        self.cs = host_machine.Pin(value=1)
+
+        self.now = 0.0  # Virtual time in microseconds
+        self.idle = True  # Until ACMD41 completes
+        self.init_polls = 0
+        self.app_cmd = False
+        self.cmd_buf = bytearray()
+        self.segments = []  # [ready time, bytes, position, done callback]
+        self.busy_until = 0.0
+        self.next_block = -1  # Block the running CMD18 sends next
+        self.write_mode = 0  # 0, 24 or 25 while waiting for write data
+        self.write_block = 0
+        self.write_first = True  # Next block is the first of its command
+        self.write_buf = None  # Data block being received (with CRC)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the traffic counters."""
+        self.calls = 0
+        self.bytes = 0
+        self.wait_bytes = 0  # Bytes the host clocked while the card was not ready
+        self.wait_calls = 0  # SPI calls made only of such bytes
+        self.sleep_us = 0.0
+        self.commands = {}
+        self.blocks_read = 0
+        self.blocks_written = 0
+
+    def close(self):
+        self.f.close()
+
+    # Virtual clock
+
+    def use_virtual_time(self):
+        """Point time.sleep_ms/us and ticks_ms/us at the card clock."""
+        time.sleep_ms = lambda ms: self.sleep(ms * 1000)
+        time.sleep_us = self.sleep
+        time.ticks_ms = lambda: int(self.now // 1000)
+        time.ticks_us = lambda: int(self.now)
+        time.ticks_cpu = time.ticks_us
+
+    def sleep(self, us):
+        self.now += us
+        self.sleep_us += us
+
+    def byte_time(self):
+        """Microseconds to clock one byte at the current baudrate."""
+        return 8000000 / self.baudrate + self.byte_us
+
+    # machine.SPI interface
+
+    def write(self, buf):
+        self._transfer(buf, None)
+
+    def read(self, nbytes, write=0xFF):
+        buf = bytearray(nbytes)
+        self.readinto(buf, write)
+        return bytes(buf)
+
+    def readinto(self, buf, write=0xFF):
+        self._transfer(bytes([write]) * len(buf), buf)
+
+    def write_readinto(self, write_buf, read_buf):
+        self._transfer(write_buf, read_buf)
+
+    # Bus
+
+    def _transfer(self, mosi, miso):
+        """Exchange len(mosi) bytes; card output goes to miso (if given)."""
+        self.calls += 1
+        self.now += self.call_us
+        n = len(mosi)
+        self.bytes += n
+        t = self.byte_time()
+        if self.cs.value():
+            # Card not selected: MISO floats high
+            self.now += n * t
+            if miso is not None:
+                miso[:n] = b'\xff' * n
+            return
+        waited = self.wait_bytes
+        i = 0
+        while i < n:
+            k = self._bulk(mosi, miso, i, n, t)
+            if k:
+                i += k
+                continue
+            self.now += t
+            out = self._clock(mosi[i])
+            if miso is not None:
+                miso[i] = out
+            i += 1
+        if self.wait_bytes - waited == n:
+            self.wait_calls += 1  # A poll that found the card not ready
+
+    def _bulk(self, mosi, miso, i, n, t):
+        """Move a run of block data at once; return bytes handled (0 = none)."""
+        if self.write_buf is not None:
+            k = min(n - i, BLOCK + 2 - len(self.write_buf))
+            self.write_buf += bytes(mosi[i:i + k])
+            self.now += k * t
+            if miso is not None:
+                miso[i:i + k] = b'\xff' * k
+            if len(self.write_buf) == BLOCK + 2:
+                self._write_done()
+            return k
+        if not self.segments or self.cmd_buf:
+            return 0
+        seg = self.segments[0]
+        if self.now + t < seg[0] or len(seg[1]) - seg[2] < 16:
+            return 0
+        k = min(n - i, len(seg[1]) - seg[2])
+        if bytes(mosi[i:i + k]).count(b'\xff') != k:
+            return 0  # Host sends a command mid-block, go byte by byte
+        if miso is not None:
+            miso[i:i + k] = seg[1][seg[2]:seg[2] + k]
+        seg[2] += k
+        self.now += k * t
+        if seg[2] == len(seg[1]):
+            self._segment_done()
+        return k
+
+    def _clock(self, byte):
+        """One byte: take MOSI, return MISO."""
+        if self.write_mode:
+            out = self._output()
+            if byte == _TOKEN_STOP_TRAN and self.write_mode == 25:
+                self.write_mode = 0
+                self.busy_until = self.now + self.byte_time()
+            elif byte == (_TOKEN_DATA if self.write_mode == 24 else _TOKEN_CMD25):
+                self.write_buf = bytearray()
+            return out
+
+        if self.cmd_buf or (byte & 0xC0) == 0x40:
+            self.cmd_buf.append(byte)
+            if len(self.cmd_buf) == 6:
+                cmd = bytes(self.cmd_buf)
+                self.cmd_buf = bytearray()
+                self._command(cmd)
+                return 0xFF
+        return self._output()
+
+    def _output(self):
+        """Next byte from the card: queued response/data, or idle/busy filler."""
+        if self.segments:
+            seg = self.segments[0]
+            if self.now >= seg[0]:
+                out = seg[1][seg[2]]
+                seg[2] += 1
+                if seg[2] == len(seg[1]):
+                    self._segment_done()
+                return out
+            self.wait_bytes += 1
+            return 0xFF
+        if self.now < self.busy_until:
+            self.wait_bytes += 1
+            return 0x00
+        return 0xFF
+
+    def _segment_done(self):
+        seg = self.segments.pop(0)
+        if seg[3]:
+            seg[3]()
+
+    def _send(self, data, delay_us, done=None):
+        """Queue bytes the card sends delay_us from now (at least one byte later)."""
+        ready = max(self.now + delay_us, self.now + self.byte_time())
+        self.segments.append([ready, data, 0, done])
+
+    # Commands
+
+    def _command(self, cmd):
+        index = cmd[0] & 0x3F
+        arg = int.from_bytes(cmd[1:5], 'big')
+        app = self.app_cmd
+        self.app_cmd = False
+        name = ('ACMD%d' if app else 'CMD%d') % index
+        self.commands[name] = self.commands.get(name, 0) + 1
+
+        if index == 12:
+            # Stop transmission: drop the block in flight
+            self.segments = []
+            self.next_block = -1
+            self._r1(0, stuff=True)
+            return
+        if index == 0:
+            if cmd[5] != 0x95:
+                self._r1(_R1_CRC_ERROR)
+                return
+            self.idle = True
+            self.init_polls = 0
+            self.segments = []
+            self.write_mode = 0
+            self._r1(0)
+        elif index == 8:
+            if not self.high_capacity:
+                self._r1(_R1_ILLEGAL)
+            elif cmd[5] != 0x87:
+                self._r1(_R1_CRC_ERROR)
+            else:
+                # R7: voltage accepted, check pattern echoed
+                self._r1(0, bytes([0x00, 0x00, arg >> 8 & 0x0F, arg & 0xFF]))
+        elif index == 55:
+            self.app_cmd = True
+            self._r1(0)
+        elif app and index == 41:
+            self.init_polls += 1
+            if self.init_polls > INIT_POLLS:
+                self.idle = False
+            self._r1(0)
+        elif app and index == 23:
+            self._r1(0)  # Pre-erase count, only a hint
+        elif index == 58:
+            ocr0 = 0x00 if self.idle else 0x80 | (0x40 if self.high_capacity else 0)
+            self._r1(0, bytes([ocr0, 0xFF, 0x80, 0x00]))
+        elif self.idle:
+            self._r1(_R1_ILLEGAL)
+        elif index == 9:
+            self._r1(0)
+            self._send(self._block_data(self._csd()), self.read_us)
+        elif index == 16:
+            self._r1(0 if arg == BLOCK else _R1_PARAMETER_ERROR)
+        elif index in (17, 18, 24, 25):
+            block = arg if self.high_capacity else arg // BLOCK
+            if block >= self.sectors or (not self.high_capacity and arg % BLOCK):
+                self._r1(_R1_ADDRESS_ERROR)
+                return
+            self._r1(0)
+            if index == 17:
+                self._send_block(block, False, self.read_us)
+            elif index == 18:
+                self._send_block(block, True, self.read_us)
+            else:
+                self.write_mode = index
+                self.write_block = block
+                self.write_first = True
+        else:
+            self._r1(_R1_ILLEGAL)
+
+    def _r1(self, flags, extra=b'', stuff=False):
+        """Queue an R1 response (idle bit while initialising) plus extra bytes."""
+        r1 = bytes([flags | (_R1_IDLE if self.idle else 0)])
+        if stuff:
+            r1 = b'\xff' + r1  # CMD12: stuff byte before the response
+        self._send(r1 + extra, self.command_us)
+
+    def _csd(self):
+        csd = bytearray(16)
+        if self.high_capacity:
+            c_size = self.sectors // 1024 - 1
+            csd[0] = 0x40
+            csd[7] = c_size >> 16 & 0x3F
+            csd[8] = c_size >> 8 & 0xFF
+            csd[9] = c_size & 0xFF
+        else:
+            # 512-byte blocks, C_SIZE_MULT 7: capacity = (C_SIZE + 1) * 256 KB
+            c_size = self.sectors // 512 - 1
+            csd[5] = 9
+            csd[6] = c_size >> 10 & 0x03
+            csd[7] = c_size >> 2 & 0xFF
+            csd[8] = (c_size & 0x03) << 6
+            csd[9] = 0x03
+            csd[10] = 0x80
+        return csd
+
+    def _block_data(self, data):
+        return bytes([_TOKEN_DATA]) + bytes(data) + b'\x00\x00'
+
+    def _send_block(self, block, multiple, delay_us):
+        """Queue one data block; CMD18 queues the next when this one is sent."""
+        self.f.seek(block * BLOCK)
+        data = self.f.read(BLOCK)
+        self.next_block = block + 1 if multiple else -1
+        self._send(self._block_data(data), delay_us, self._block_sent)
+
+    def _block_sent(self):
+        # Counted once the host has clocked the whole block out
+        self.blocks_read += 1
+        if self.next_block < 0:
+            return
+        if self.next_block >= self.sectors:
+            self._send(bytes([0x09]), self.read_us)  # Data error token: out of range
+            self.next_block = -1
+            return
+        self._send_block(self.next_block, True, self.burst_read_us)
+
+    def _write_done(self):
+        """Full data block received: store it, answer, go busy."""
+        data = bytes(self.write_buf[:BLOCK])
+        self.write_buf = None
+        self.f.seek(self.write_block * BLOCK)
+        self.f.write(data)
+        self.f.flush()
+        self.blocks_written += 1
+        self.write_block += 1
+        if self.write_mode == 24:
+            self.write_mode = 0
+        # Data accepted, then busy (0x00) while programming
+        self._send(bytes([0xE5]), 0, self._start_busy)
+
+    def _start_busy(self):
+        self.busy_until = self.now + (self.write_us if self.write_first else self.burst_write_us)
+        self.write_first = False
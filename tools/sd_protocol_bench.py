@@ -0,0 +1,140 @@
+"""
+SD Protocol Benchmark
+Protocol overhead of sdcard.py per byte of payload, on a PC
+
+Runs the unmodified driver against the SPI-mode card emulator
+(sd_emulator.py) and times single-block (CMD17/CMD24) and multi-block
+(CMD18/CMD25) reads and writes on the emulator's virtual clock. For each
+case the time beyond the payload's own bytes on the wire is split into:
+  card     polling while the card reads a block or finishes a write
+  calls    fixed cost of the other SPI calls (driver/DMA setup, call_us)
+  framing  command, response, token, CRC and CS release bytes
+
+Usage:
+  python sd_protocol_bench.py [clock_mhz] [--call-us N] [--byte-us N]
+         [--command-us N] [--read-us N] [--write-us N]
+         [--burst-read-us N] [--burst-write-us N]
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+import host_machine
+import sd_emulator
+
+CARD_MB = 8
+PAYLOAD = 128 * 1024  # Bytes per case
+CASES = (
+    ('read', 1), ('read', 8), ('read', 32),
+    ('write', 1), ('write', 4), ('write', 8), ('write', 32),
+)
+
+
+def parse_options(argv):
+    """Split argv into (args, emulator keyword options)."""
+    args = []
+    options = {}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith('--') and arg.endswith('-us'):
+            options[arg[2:].replace('-', '_')] = float(argv[i + 1])
+            i += 2
+            continue
+        args.append(arg)
+        i += 1
+    return args, options
+
+
+def run_case(sd, card, image, kind, blocks, rng):
+    """Move PAYLOAD bytes in runs of blocks; return (stats dict, data ok)."""
+    run = blocks * sd_emulator.BLOCK
+    start_block = rng.randrange(card.sectors - PAYLOAD // sd_emulator.BLOCK)
+    buf = bytearray(run)
+    if kind == 'write':
+        data = bytes(rng.getrandbits(8) for _ in range(PAYLOAD))
+
+    card.reset_stats()
+    begin = card.now
+    for i in range(PAYLOAD // run):
+        block = start_block + i * blocks
+        if kind == 'read':
+            sd.readblocks(block, buf)
+        else:
+            sd.writeblocks(block, data[i * run:(i + 1) * run])
+    elapsed = card.now - begin
+
+    # Check the bytes against the image file
+    image.seek(start_block * sd_emulator.BLOCK)
+    stored = image.read(PAYLOAD)
+    ok = stored[-run:] == buf if kind == 'read' else stored == data
+
+    t = card.byte_time()
+    stats = {
+        'elapsed': elapsed,
+        'card': card.wait_bytes * t + card.wait_calls * card.call_us + card.sleep_us,
+        'calls': (card.calls - card.wait_calls) * card.call_us,
+        'framing': (card.bytes - PAYLOAD - card.wait_bytes) * t,
+        'spi_calls': card.calls,
+    }
+    return stats, ok
+
+
+def main():
+    """Main function."""
+    args, options = parse_options(sys.argv[1:])
+    clock = float(args[0]) * 1000000 if args else 20000000
+
+    print("SD Protocol Benchmark")
+    print("=" * 78)
+    host_machine.install()
+    sdcard = host_machine.reload_driver('sdcard', truncating_bytearray=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'card.img')
+        with open(path, 'wb') as f:
+            f.truncate(CARD_MB * 1024 * 1024)
+
+        card = sd_emulator.SDCardEmulator(path, **options)
+        card.use_virtual_time()
+        sd = sdcard.SDCard(card, card.cs, baudrate=int(clock))
+        print(f"Clock {clock / 1000000:g} MHz, call {card.call_us:g} us, byte +{card.byte_us:g} us,"
+              f" command {card.command_us:g} us")
+        print(f"Card: read {card.read_us:g} us (burst {card.burst_read_us:g}),"
+              f" write {card.write_us:g} us (burst {card.burst_write_us:g})")
+        print(f"Card init: {card.now / 1000:.1f} ms, {PAYLOAD // 1024} KB per case")
+        print()
+        print(f"  {'case':<18} {'bytes/s':>10} {'calls/blk':>9} {'overhead ns/byte':>17}"
+              f" {'card':>6} {'calls':>6} {'framing':>7}")
+
+        rng = random.Random(1)
+        ok = True
+        with open(path, 'rb') as image:
+            for kind, blocks in CASES:
+                stats, good = run_case(sd, card, image, kind, blocks, rng)
+                ok &= good
+                total_blocks = PAYLOAD // sd_emulator.BLOCK
+                command = {('read', True): 'CMD17', ('read', False): 'CMD18',
+                           ('write', True): 'CMD24', ('write', False): 'CMD25'}[(kind, blocks == 1)]
+                name = f"{kind} {blocks:2d} ({command})"
+                rate = PAYLOAD * 1000000 / stats['elapsed']
+                overhead = stats['card'] + stats['calls'] + stats['framing']
+                print(f"  {name:<18} {rate:10,.0f} {stats['spi_calls'] / total_blocks:9.1f}"
+                      f" {overhead * 1000 / PAYLOAD:17.1f}"
+                      f" {stats['card'] * 100 / overhead:5.0f}% {stats['calls'] * 100 / overhead:5.0f}%"
+                      f" {stats['framing'] * 100 / overhead:6.0f}%"
+                      f"{'' if good else '  DATA MISMATCH'}")
+        card.close()
+
+    print()
+    print(f"Payload alone: {clock / 8:,.0f} bytes/s ({8000000000 / clock:.1f} ns/byte on the wire)")
+    print("=" * 78)
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
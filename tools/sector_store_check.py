@@ -0,0 +1,120 @@
+"""
+Sector Store Check
+Writes a sector store into a card image and plays it back on a PC
+
+Runs the device reader (sectorstore.py + slidebundle.py + ili9341.py)
+against a file-backed block device (host_machine.FileBlockDevice):
+  - every frame sent to the display matches the source image
+  - sectors inside the card's partition are refused without --force
+  - the store is found at make_sector_store.py's default start sector
+  - block reads per frame (multi-sector reads become CMD18 on the card)
+"""
+
+import os
+import random
+import struct
+import sys
+import tempfile
+
+import host_machine
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow not installed")
+    print("Run: pip install Pillow")
+    sys.exit(1)
+
+from rgb565 import image_to_rgb565
+from make_bundle import build_frames
+from make_sector_store import write_store, default_start
+
+WIDTH = 240
+HEIGHT = 320
+PARTITION = (2048, 8192)  # First sector and size of the fake FAT partition
+
+
+def make_images(folder):
+    """Write test slides (flat blocks and noise); return expected BGR565 frames."""
+    rng = random.Random(5)
+    expected = []
+    for i in range(3):
+        img = Image.new('RGB', (WIDTH, HEIGHT), (20 * i, 120, 200))
+        for _ in range(12):
+            x, y = rng.randrange(WIDTH - 40), rng.randrange(HEIGHT - 40)
+            img.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + 40, y + 40))
+        if i == 2:
+            noise = bytes(rng.getrandbits(8) for _ in range(WIDTH * 60 * 3))
+            img.paste(Image.frombytes('RGB', (WIDTH, 60), noise), (0, 100))
+        img.save(os.path.join(folder, f"slide{i}.png"))
+        expected.append(image_to_rgb565(img, bgr=True))
+    return expected
+
+
+def make_card(path):
+    """Create a card image with an MBR and one FAT partition entry."""
+    first, count = PARTITION
+    mbr = bytearray(512)
+    mbr[446 + 4] = 0x0C  # FAT32 LBA
+    struct.pack_into('<II', mbr, 446 + 8, first, count)
+    mbr[510:512] = b'\x55\xaa'
+    with open(path, 'wb') as f:
+        f.write(mbr)
+        f.truncate((first + count) * 512)
+
+
+def main():
+    """Main function."""
+    print("Sector Store Check")
+    print("=" * 60)
+    host_machine.install()
+    ili = host_machine.reload_driver('ili9341')
+    sectorstore = host_machine.reload_driver('sectorstore')
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = make_images(tmp)
+        card = os.path.join(tmp, 'card.img')
+        make_card(card)
+        start = default_start(card)  # Before the partition
+
+        for rle in (False, True):
+            print(f"  {'RLE' if rle else 'RAW'} frames:")
+            frames = build_frames(tmp, WIDTH, HEIGHT, rle=rle)
+
+            refused = write_store(card, PARTITION[0], frames) is None
+            print(f"  Partition sectors refused: {'yes' if refused else 'NO'}")
+            ok &= refused
+
+            sectors = write_store(card, start, frames, max_sectors=PARTITION[0] - start)
+            if sectors is None:
+                print("FAIL")
+                sys.exit(1)
+
+            device = host_machine.FileBlockDevice(card)
+            found = sectorstore.find(device) == start
+            print(f"  Store found at sector {start}: {'yes' if found else 'NO'}")
+            ok &= found
+
+            spi = host_machine.CaptureSPI()
+            display = ili.Display(spi, host_machine.Pin(), host_machine.Pin())
+            store = sectorstore.open_store(device, start)
+            for i in range(len(store)):
+                spi.data = bytearray()
+                device.reads = device.blocks_read = 0
+                store.show(display, i)
+                same = bytes(spi.data[-len(expected[i]):]) == expected[i]
+                size = store.frame(i)[1]
+                print(f"  Frame {i}: {size:6d} bytes, {device.reads:3d} reads, {device.blocks_read:4d} sectors"
+                      f" ({device.blocks_read / max(device.reads, 1):.1f} per read), matches: {'yes' if same else 'NO'}")
+                ok &= same
+            device.close()
+
+    print("=" * 60)
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
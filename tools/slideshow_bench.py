@@ -0,0 +1,360 @@
+"""
+Slideshow Benchmark
+Frames per second of each slide format across SD clocks, on a PC
+
+Runs the display path of src/slideshow.py (display_image,
+display_bundle_frame) with the unmodified drivers on the emulated bus:
+the SD card is sd_emulator.py on SPI bus 2 and the display is
+ili9341_emulator.py on SPI bus 1, each timed on its modelled clock.
+Slide files are stored in contiguous sectors of the card image (FAT
+cluster chains and directory reads are not modelled) and read through
+sectorstore.SectorFile; bundle frames come from sector stores.
+
+For two kinds of kiosk content (photos, flat graphics) and each format:
+  - frames per second at SD clocks of 1, 10 and 40 MHz (read + draw +
+    decode)
+  - draw time alone (what a prefetched slide costs at the transition)
+  - decode time: CPU time the ESP32 spends converting or expanding
+    pixels (BMP, RLE, palette)
+  - KB read from the card and sent to the display per frame
+  - peak Python heap per frame (CPython tracemalloc, only for comparing
+    formats with each other, not a device figure)
+Every frame is checked against the expected pixels.
+
+Decoding runs at host speed here, so its CPU time is not modelled; pass
+the ms per full frame that examples/bmp_convert_bench.py prints on the
+board (bmp=, rle=, idx=). Each frame is charged those costs in
+proportion to the pixels that went through each decoder. Without them
+decode shows '?' and fps is marked '*': bus time only, an upper bound.
+
+Usage:
+  python slideshow_bench.py [sd_mhz ...] [bmp=MS] [rle=MS] [idx=MS]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+import host_machine
+import sd_emulator
+from ili9341_emulator import ILI9341Emulator
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Pillow not installed")
+    print("Run: pip install Pillow")
+    sys.exit(1)
+
+import rgb565
+from rgb565 import image_to_rgb565, encode_rle, rle_header, image_to_indexed, indexed_header
+from make_bundle import build_frames, write_bundle, ALIGN
+
+WIDTH = 240
+HEIGHT = 320
+SLIDES = 3
+SD_CLOCKS = (1, 10, 40)
+FIRST_SECTOR = 2048
+SD_BUS = 2
+SD_CS = 5
+
+# Decoders whose ESP32 CPU time is passed in (ms per full frame)
+DECODERS = ('bmp', 'rle', 'idx')
+
+# (name, slide file type or None for a sector store, build_frames options)
+FORMATS = (
+    ('raw', 'raw', None),
+    ('bmp', 'bmp', None),
+    ('rle', 'rle', None),
+    ('idx', 'idx', None),
+    ('store raw', None, {}),
+    ('store rle', None, {'rle': True}),
+    ('store delta', None, {'rle': True, 'delta': True}),
+    ('store palette', None, {'rle': True, 'palette': True}),
+)
+
+
+def photo_slides():
+    """Photo-like slides: gradients with noise (few repeated pixels)."""
+    slides = []
+    for i in range(SLIDES):
+        gx = Image.linear_gradient('L').rotate(90 * i).resize((WIDTH, HEIGHT))
+        gy = Image.linear_gradient('L').resize((WIDTH, HEIGHT))
+        noise = Image.effect_noise((WIDTH, HEIGHT), 40 + 10 * i)
+        slides.append(Image.merge('RGB', (gx, noise, gy)))
+    return slides
+
+
+def graphic_slides():
+    """Flat UI-style slides; each differs from the previous in one panel."""
+    rng = random.Random(11)
+    img = Image.new('RGB', (WIDTH, HEIGHT), (240, 240, 235))
+    img.paste((30, 60, 140), (0, 0, WIDTH, 48))
+    for _ in range(8):
+        x, y = rng.randrange(WIDTH - 80), rng.randrange(60, HEIGHT - 60)
+        img.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + 80, y + 50))
+    slides = []
+    for i in range(SLIDES):
+        img = img.copy()
+        img.paste((200, 40 + 70 * i, 40), (20, 260, 220, 300))
+        slides.append(img)
+    return slides
+
+
+def slide_files(img):
+    """{file type: (file bytes, expected BGR565 frame)} for one slide."""
+    frame = image_to_rgb565(img, bgr=True)
+    bmp = io.BytesIO()
+    img.save(bmp, 'BMP')
+    files = {
+        'raw': (frame, frame),
+        'bmp': (bmp.getvalue(), frame),
+        'rle': (rle_header(WIDTH, HEIGHT) + encode_rle(frame), frame),
+    }
+    if rgb565.np is not None:
+        bpp, payload, pixels = image_to_indexed(img, bgr=True)
+        files['idx'] = (indexed_header(WIDTH, HEIGHT, bpp) + payload, pixels)
+    return files
+
+
+def store_bytes(folder, options):
+    """Sector store (bundle) bytes for the slides in folder, or None."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames = build_frames(folder, WIDTH, HEIGHT, **options)
+    if not frames:
+        return None
+    data = io.BytesIO()
+    write_bundle(data, frames, ALIGN)
+    return data.getvalue()
+
+
+class Card:
+    """Card image being filled with blobs on sector boundaries."""
+
+    def __init__(self):
+        self.blobs = []
+        self.next_sector = FIRST_SECTOR
+
+    def add(self, data):
+        """Place data at the next free sector; return that sector."""
+        start = self.next_sector
+        self.blobs.append((start, data))
+        self.next_sector += (len(data) + 511) // 512
+        return start
+
+    def write(self, path):
+        # Whole 512 KB units, as the emulated SDHC card reports its size
+        sectors = (self.next_sector + 1023) // 1024 * 1024
+        with open(path, 'wb') as f:
+            f.truncate(sectors * 512)
+            for start, data in self.blobs:
+                f.seek(start * 512)
+                f.write(data)
+
+
+def build_content(tmp, card):
+    """
+    Lay out every content kind and format on the card.
+
+    Returns {content: {format: [(sector, expected frame), ...]}}.
+    """
+    content = {}
+    for kind, slides in (('photo', photo_slides()), ('graphic', graphic_slides())):
+        folder = os.path.join(tmp, kind)
+        os.makedirs(folder)
+        per_format = {}
+        files = []
+        for i, img in enumerate(slides):
+            img.save(os.path.join(folder, f"slide{i}.png"))
+            files.append(slide_files(img))
+        for name, file_type, options in FORMATS:
+            if file_type:
+                if file_type not in files[0]:
+                    continue  # Palette needs NumPy
+                per_format[name] = [(card.add(f[file_type][0]), f[file_type][1]) for f in files]
+                continue
+            if options.get('palette') or options.get('delta'):
+                if rgb565.np is None:
+                    continue
+            data = store_bytes(folder, options)
+            if data is None:
+                continue
+            expected = [f['idx'][1] if options.get('palette') else f['raw'][1] for f in files]
+            per_format[name] = [(card.add(data), expected)]
+        content[kind] = per_format
+    return content
+
+
+def count_decoded(display):
+    """
+    Count the pixels each decoder of display handles.
+
+    Returns {decoder: pixels}, updated as frames are drawn.
+    """
+    pixels = dict.fromkeys(DECODERS, 0)
+
+    def counted(name, method, size):
+        def call(*args, **kwargs):
+            pixels[name] += size(*args)
+            return method(*args, **kwargs)
+        return call
+
+    display._stream_bmp = counted('bmp', display._stream_bmp, lambda f, offset, w, h, *rest:
+                                  min(w, display.width) * min(h, display.height))
+    display.stream_rle = counted('rle', display.stream_rle, lambda f, w, h, *rest: w * h)
+    display.stream_indexed = counted('idx', display.stream_indexed, lambda f, w, h, *rest: w * h)
+    return pixels
+
+
+def decode_us(pixels, costs):
+    """Modelled decode time of one frame, and whether every decoder had a cost."""
+    us = 0
+    known = True
+    for name, count in pixels.items():
+        if count:
+            if name in costs:
+                us += costs[name] * 1000 * count / (WIDTH * HEIGHT)
+            else:
+                known = False
+    return us, known
+
+
+def run_format(slideshow, sectorstore, display, decoded, panel, card, sd, file_type, entries):
+    """
+    Draw every slide of one format once.
+
+    Returns (read us, draw us, bytes read, bytes sent, peak heap, frames ok,
+    {decoder: pixels}) per frame.
+    """
+    results = []
+    frames = []
+    if file_type:
+        for sector, expected in entries:
+            frames.append((lambda s=sector: slideshow.display_image(
+                display, 'slide.' + file_type, file_type, sectorstore.SectorFile(sd, s)), expected))
+    else:
+        sector, expected = entries[0]
+        bundle = sectorstore.open_store(sd, sector)
+        for i in range(len(bundle)):
+            frames.append((lambda i=i: slideshow.display_bundle_frame(display, bundle, i), expected[i]))
+
+    for draw, expected in frames:
+        card.reset_stats()
+        panel.reset_stats()
+        sd_start = card.now
+        for name in decoded:
+            decoded[name] = 0
+        tracemalloc.reset_peak()
+        heap = tracemalloc.get_traced_memory()[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            drawn = draw()
+        peak = tracemalloc.get_traced_memory()[1] - heap
+        stats = panel.stats()
+        results.append((card.now - sd_start, stats['us'], card.blocks_read * 512,
+                        stats['pixel_bytes'] + stats['overhead_bytes'], peak,
+                        drawn and bytes(panel.fb) == expected, dict(decoded)))
+    return results
+
+
+def main():
+    """Main function."""
+    clocks = []
+    costs = {}
+    for arg in sys.argv[1:]:
+        if '=' in arg:
+            name, ms = arg.split('=', 1)
+            if name not in DECODERS:
+                print(f"Unknown decoder {name}: use {', '.join(DECODERS)}")
+                sys.exit(1)
+            costs[name] = float(ms)
+        else:
+            clocks.append(float(arg))
+    clocks = clocks or SD_CLOCKS
+
+    print("Slideshow Benchmark")
+    print("=" * 78)
+    host_machine.install()
+    src = os.path.join(host_machine.REPO_ROOT, 'src')
+    if src not in sys.path:
+        sys.path.insert(0, src)
+    if rgb565.np is None:
+        print("NumPy not installed: palette and delta formats skipped")
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        card_layout = Card()
+        content = build_content(tmp, card_layout)
+        image = os.path.join(tmp, 'card.img')
+        card_layout.write(image)
+
+        card = sd_emulator.SDCardEmulator(image)
+        card.use_virtual_time()
+        panel = ILI9341Emulator()
+        host_machine.attach(SD_BUS, card, {SD_CS: card.cs})
+        panel.attach()
+
+        sdcard = host_machine.reload_driver('sdcard', truncating_bytearray=True)
+        sectorstore = host_machine.reload_driver('sectorstore')
+        slideshow = host_machine.reload_driver('slideshow')
+        with contextlib.redirect_stdout(io.StringIO()):
+            display = slideshow.init_display()
+            sd = sdcard.SDCard(card, card.cs)
+        decoded = count_decoded(display)
+
+        print(f"Display SPI {panel.baudrate / 1000000:g} MHz; SD card read {card.read_us:g} us,"
+              f" {card.call_us:g} us per SPI call; {SLIDES} slides of {WIDTH}x{HEIGHT}")
+        given = ', '.join(f"{k}={v:g}" for k, v in costs.items()) or 'none given'
+        print(f"Decode ms per frame on the ESP32: {given}")
+        tracemalloc.start()
+
+        for kind, per_format in content.items():
+            print()
+            print(f"{kind.capitalize()} slides")
+            clock_heads = ''.join(f" {'fps@' + format(c, 'g'):>9}" for c in clocks)
+            print(f"  {'format':<14} {'KB read':>8} {'KB sent':>8} {'py heap':>8} {'draw ms':>8}"
+                  f" {'decode':>7}{clock_heads}")
+            for name, file_type, _ in FORMATS:
+                if name not in per_format:
+                    continue
+                fps = []
+                for mhz in clocks:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        slideshow.set_sd_speed(sd, mhz)
+                    results = run_format(slideshow, sectorstore, display, decoded, panel, card, sd,
+                                         file_type, per_format[name])
+                    n = len(results)
+                    decode = [decode_us(r[6], costs) for r in results]
+                    total_us = sum(r[0] + r[1] + d[0] for r, d in zip(results, decode))
+                    fps.append(n * 1000000 / total_us)
+                    good = all(r[5] for r in results)
+                    ok &= good
+                known = all(d[1] for d in decode)
+                read_kb = sum(r[2] for r in results) / n / 1024
+                sent_kb = sum(r[3] for r in results) / n / 1024
+                heap = max(r[4] for r in results)
+                draw_ms = sum(r[1] for r in results) / n / 1000
+                decode_ms = f"{sum(d[0] for d in decode) / n / 1000:7.1f}" if known else f"{'?':>7}"
+                rates = ''.join(f" {r:8.1f}{' ' if known else '*'}" for r in fps)
+                print(f"  {name:<14} {read_kb:8.1f} {sent_kb:8.1f} {heap:8d} {draw_ms:8.1f} {decode_ms}{rates}"
+                      f"{'' if good else '  MISMATCH'}")
+
+        tracemalloc.stop()
+        card.close()
+
+    print()
+    print("fps = read + draw + decode per frame; with prefetch the transition costs draw + decode ms")
+    print("decode = ESP32 CPU time from bmp=/rle=/idx= (examples/bmp_convert_bench.py);"
+          " ? and * = not given, fps is bus time only")
+    print("py heap = CPython tracemalloc peak per frame in bytes; compare formats, not a device figure")
+    print("=" * 78)
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()